@@ -0,0 +1,198 @@
+import asyncio
+
+from db_pool import ManagedPool
+from startup import load_module
+
+
+class PsycopgConnection:
+    """A psycopg2 connection in asynchronous mode, driven by the running event loop.
+
+    Every fetch is one transaction opened with SET LOCAL statement_timeout,
+    like ManagedPool checkouts, so it also works behind pgbouncer in
+    transaction mode.
+    """
+
+    def __init__(self, conn, statement_timeout_ms):
+        self._conn = conn
+        self.statement_timeout_ms = statement_timeout_ms
+
+    @property
+    def closed(self):
+        return bool(self._conn.closed)
+
+    async def _wait(self):
+        extensions = load_module('psycopg2.extensions')
+        loop = asyncio.get_running_loop()
+        fileno = self._conn.fileno()
+        while True:
+            state = self._conn.poll()
+            if state == extensions.POLL_OK:
+                return
+            ready = loop.create_future()
+            if state == extensions.POLL_READ:
+                loop.add_reader(fileno, ready.set_result, None)
+                remove = loop.remove_reader
+            elif state == extensions.POLL_WRITE:
+                loop.add_writer(fileno, ready.set_result, None)
+                remove = loop.remove_writer
+            else:
+                raise Exception(f"Unexpected poll state {state}")
+            try:
+                await ready
+            finally:
+                remove(fileno)
+
+    async def fetch(self, query, params=None):
+        """Rows returned by query (None for statements without results)."""
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute(f"BEGIN; SET LOCAL statement_timeout = {int(self.statement_timeout_ms)}; {query}", params)
+            await self._wait()
+            rows = cursor.fetchall() if cursor.description is not None else None
+            cursor.execute("ROLLBACK")
+            await self._wait()
+            return rows
+        finally:
+            cursor.close()
+
+    def close(self):
+        self._conn.close()
+
+
+async def open_connection(statement_timeout_ms, **connect_kwargs):
+    """Connect with psycopg2's asynchronous mode; the default AsyncPool connector."""
+    psycopg2 = load_module('psycopg2')
+    connection = PsycopgConnection(psycopg2.connect(async_=1, **connect_kwargs), statement_timeout_ms)
+    try:
+        await connection._wait()
+    except BaseException:
+        connection.close()
+        raise
+    return connection
+
+
+class _IdleConnections(list):
+    def closeall(self):
+        while self:
+            try:
+                self.pop().close()
+            except Exception:
+                pass
+
+
+class AsyncPool(ManagedPool):
+    """ManagedPool for asyncio code: the same breaker and limits, without blocking the event loop.
+
+    Connections come from connect(statement_timeout_ms, **connect_kwargs),
+    a coroutine function returning an object with `await fetch(query,
+    params)`, `close()` and `closed`; by default open_connection, which
+    needs nothing beyond psycopg2. Checkout waits are asyncio waits, so a
+    saturated pool parks the request instead of a thread.
+
+    The driver is psycopg2's own asynchronous mode rather than asyncpg so
+    the service keeps one Postgres client, and the breaker, limits and
+    metrics are ManagedPool's; what is added here is the poll loop in
+    PsycopgConnection and the asyncio checkout.
+    """
+
+    def __init__(self, connect_kwargs, connect=None, **kwargs):
+        self._connect = connect
+        super().__init__(connect_kwargs, **kwargs)
+
+    def _reset_state(self):
+        super()._reset_state()
+        # Semaphores belong to one event loop; made on first use in it
+        self._async_slots = None
+        self._slots_loop = None
+
+    def _slots_for_loop(self):
+        loop = asyncio.get_running_loop()
+        if self._slots_loop is not loop:
+            self._async_slots = asyncio.Semaphore(self.maxconn)
+            self._slots_loop = loop
+        return self._async_slots
+
+    async def _new_connection(self):
+        # Looked up at call time so fake_db.install can swap the connector in
+        connect = self._connect or open_connection
+        return await asyncio.wait_for(
+            connect(self.statement_timeout_ms, **self.connect_kwargs),
+            self.connect_kwargs.get('connect_timeout') or None
+        )
+
+    async def getconn(self):
+        """A connection, or None when the database is unavailable or the pool is saturated."""
+        if not self._allow_attempt():
+            return None
+        started = asyncio.get_running_loop().time()
+        slots = self._slots_for_loop()
+        try:
+            await asyncio.wait_for(slots.acquire(), self.checkout_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._probing = False
+            print("Database pool exhausted, using fallback data")
+            return None
+
+        try:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = _IdleConnections()
+                idle = self._pool
+            conn = None
+            while idle and conn is None:
+                conn = idle.pop()
+                if conn.closed:
+                    conn = None
+            if conn is None:
+                connect_started = asyncio.get_running_loop().time()
+                conn = await self._new_connection()
+                self._observe("connect", asyncio.get_running_loop().time() - connect_started)
+        except Exception as e:
+            slots.release()
+            print(f"Database unavailable: {e}")
+            self._record_failure(e)
+            return None
+
+        self._observe("checkout", asyncio.get_running_loop().time() - started)
+        return conn
+
+    def putconn(self, conn, broken=False):
+        """Return a connection; broken=True discards it and counts a failure."""
+        if conn is None:
+            return
+        try:
+            with self._lock:
+                idle = self._pool
+            if broken or conn.closed or idle is None or len(idle) >= self.maxconn:
+                conn.close()
+            else:
+                idle.append(conn)
+        except Exception as e:
+            print(f"Error returning connection to pool: {e}")
+        finally:
+            if self._async_slots is not None:
+                self._async_slots.release()
+        if broken:
+            self._record_failure("query failed")
+        else:
+            self._record_success()
+
+    async def fetch(self, query, params=None):
+        """Rows for query on a pooled connection, or None when no connection is available or it fails."""
+        conn = await self.getconn()
+        if conn is None:
+            return None
+        failed = False
+        try:
+            return await conn.fetch(query, params)
+        except asyncio.CancelledError:
+            # The query may still be running; the connection can't be reused
+            conn.close()
+            raise
+        except Exception as e:
+            print(f"Database error: {e}")
+            failed = True
+            return None
+        finally:
+            self.putconn(conn, failed)
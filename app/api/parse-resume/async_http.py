@@ -0,0 +1,223 @@
+import asyncio
+import inspect
+import json
+import sys
+import tempfile
+import time
+
+from werkzeug.wrappers import Request
+
+from ingest import SPOOL_BYTES
+
+
+def json_response(payload, status=200, headers=None):
+    return json.dumps(payload).encode('utf-8'), status, dict(headers or {}, **{"Content-Type": "application/json"})
+
+
+def wsgi_environ(scope, body, size):
+    """The WSGI environ werkzeug needs to parse a request whose body is already spooled."""
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'SERVER_NAME': (scope.get('server') or ('localhost', 0))[0],
+        'SERVER_PORT': str((scope.get('server') or ('localhost', 0))[1]),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'CONTENT_LENGTH': str(size)
+    }
+    for name, value in scope.get('headers', ()):
+        key = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key == 'CONTENT_LENGTH':
+            continue
+        if key != 'CONTENT_TYPE':
+            key = 'HTTP_' + key
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class AsyncApp:
+    """A small ASGI application for the parser's asyncio server.
+
+    Only the single-upload route, the one that gains from the event loop,
+    is written against it; mount_wsgi serves every other path from the
+    Flask app unchanged. That keeps one copy of each view and needs no
+    ASGI stack beyond gunicorn's own worker, where porting the views to
+    Starlette or Quart would mean a second framework and two copies.
+
+    Routes match exact paths. Request bodies are spooled (in memory up to
+    spool_bytes, then on disk) and refused with 413 past max_body_bytes;
+    handlers get a werkzeug Request over the spooled body, with any form
+    already parsed off the event loop, and return (body, status, headers)
+    as built by json_response. observe(path, status, seconds) is an
+    optional metrics hook, and on_shutdown callables (plain or async) run
+    when the server stops.
+    """
+
+    def __init__(self, max_body_bytes, spool_bytes=SPOOL_BYTES, observe=None):
+        self.max_body_bytes = max_body_bytes
+        self.spool_bytes = spool_bytes
+        self.routes = {}
+        self.on_shutdown = []
+        self._observe = observe or (lambda path, status, seconds: None)
+        self._wsgi_app = None
+        self._wsgi_max_body_bytes = None
+
+    def route(self, path, methods=('GET',)):
+        def register(handler):
+            for method in methods:
+                self.routes[(path, method)] = handler
+            return handler
+        return register
+
+    def mount_wsgi(self, wsgi_app, max_body_bytes):
+        """Serve unrouted paths from wsgi_app, run on the loop's default executor.
+
+        Its response is streamed as the app yields it. The app records its
+        own metrics, so these requests are not passed to observe.
+        """
+        self._wsgi_app = wsgi_app
+        self._wsgi_max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for hook in self.on_shutdown:
+                    try:
+                        result = hook()
+                        if inspect.isawaitable(result):
+                            await result
+                    except Exception as e:
+                        print(f"Error during shutdown: {e}")
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _read_body(self, scope, receive, max_body_bytes):
+        """The request body spooled to a file, or None if it is larger than max_body_bytes."""
+        for name, value in scope.get('headers', ()):
+            if name.lower() == b'content-length' and value.isdigit() and int(value) > max_body_bytes:
+                return None
+        body = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+        size = 0
+        more = True
+        while more:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                raise ConnectionResetError("Client disconnected")
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > max_body_bytes:
+                body.close()
+                return None
+            body.write(chunk)
+            more = message.get('more_body', False)
+        body.seek(0)
+        return body
+
+    async def _http(self, scope, receive, send):
+        started = time.perf_counter()
+        path = scope['path']
+        handler = self.routes.get((path, scope['method']))
+        if handler is None:
+            if any(route_path == path for route_path, _ in self.routes):
+                response = json_response({"error": "Method not allowed"}, 405)
+            elif self._wsgi_app is not None:
+                try:
+                    await self._wsgi(scope, receive, send)
+                except ConnectionResetError:
+                    pass
+                return
+            else:
+                response = json_response({"error": "Not found"}, 404)
+                path = 'unmatched'
+        else:
+            try:
+                response = await self._dispatch(handler, scope, receive)
+            except ConnectionResetError:
+                return
+            except Exception as e:
+                response = json_response({"error": str(e)}, 500)
+
+        await self._send_response(send, *response)
+        self._observe(path, response[1], time.perf_counter() - started)
+
+    async def _dispatch(self, handler, scope, receive):
+        body = await self._read_body(scope, receive, self.max_body_bytes)
+        if body is None:
+            return json_response({"error": f"Request body exceeds the {self.max_body_bytes} byte limit"}, 413)
+        size = body.seek(0, 2)
+        body.seek(0)
+        request = Request(wsgi_environ(scope, body, size))
+        try:
+            if request.method == 'POST':
+                # Multipart parsing copies the files out; keep it off the event loop
+                await asyncio.get_running_loop().run_in_executor(None, lambda: request.files)
+            return await handler(request)
+        finally:
+            request.close()
+            body.close()
+
+    async def _send_response(self, send, body, status, headers):
+        headers = dict(headers, **{"Content-Length": str(len(body))})
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in headers.items()]
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _wsgi(self, scope, receive, send):
+        body = await self._read_body(scope, receive, self._wsgi_max_body_bytes)
+        if body is None:
+            await self._send_response(send, *json_response(
+                {"error": f"Request body exceeds the {self._wsgi_max_body_bytes} byte limit"}, 413))
+            return
+        size = body.seek(0, 2)
+        body.seek(0)
+        environ = dict(wsgi_environ(scope, body, size), **{
+            'wsgi.version': (1, 0),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False
+        })
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = headers
+
+        loop = asyncio.get_running_loop()
+        result = None
+        try:
+            result = await loop.run_in_executor(None, self._wsgi_app, environ, start_response)
+            chunks = iter(result)
+            # A WSGI app may call start_response as late as its first chunk
+            chunk = await loop.run_in_executor(None, next, chunks, None)
+            await send({
+                'type': 'http.response.start',
+                'status': started['status'],
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in started['headers']]
+            })
+            while chunk is not None:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(None, next, chunks, None)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(None, result.close)
+            body.close()
@@ -0,0 +1,160 @@
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# File types the parser understands when walking directories
+RESUME_EXTENSIONS = ('.pdf', '.txt')
+
+# Set in the parent before the pool forks, so children inherit the warm
+# catalog and matcher instead of loading their own copy
+_parse_file = None
+_target_field = None
+
+
+def iter_resume_paths(sources, stdin=None):
+    """Expand directories, glob patterns and '-' (paths on stdin) into file paths."""
+    for source in sources:
+        if source == '-':
+            for line in (stdin or sys.stdin):
+                path = line.strip()
+                if path:
+                    yield path
+        elif os.path.isdir(source):
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(RESUME_EXTENSIONS):
+                        yield os.path.join(root, name)
+        elif glob.has_magic(source):
+            for path in sorted(glob.iglob(source, recursive=True)):
+                if os.path.isfile(path):
+                    yield path
+        else:
+            yield source
+
+
+def _parse_one(path):
+    started = time.perf_counter()
+    record = {"path": path}
+    try:
+        record["bytes"] = os.path.getsize(path)
+        record["result"] = _parse_file(path, _target_field)
+        record["ok"] = True
+    except Exception as e:
+        record["ok"] = False
+        record["error"] = str(e)
+    record["elapsedMs"] = round((time.perf_counter() - started) * 1000, 3)
+    return record
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_batch(paths, parse_file, target_field="Software Development", jobs=None, chunksize=1, output=None,
+              before_fork=None):
+    """Parse many resumes on a process pool, writing one JSON line per file as it finishes.
+
+    parse_file(path, target_field) must return the response dict. A final
+    summary line reports totals and throughput. Returns the number of files
+    that failed. before_fork(), if given, runs just before the pool forks
+    (route.settle_before_fork, so no child inherits a held import lock).
+    """
+    global _parse_file, _target_field
+    _parse_file = parse_file
+    _target_field = target_field
+
+    # Parser logging goes to stderr so stdout stays valid JSONL
+    output = output or sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        jobs = jobs or os.cpu_count() or 1
+        started = time.perf_counter()
+        latencies = []
+        total_bytes = 0
+        failures = 0
+
+        if before_fork is not None:
+            before_fork()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(processes=jobs) as pool:
+            for record in pool.imap_unordered(_parse_one, paths, chunksize=chunksize):
+                latencies.append(record["elapsedMs"])
+                total_bytes += record.get("bytes", 0)
+                if not record["ok"]:
+                    failures += 1
+                output.write(json.dumps(record) + "\n")
+                output.flush()
+
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        summary = {
+            "summary": True,
+            "files": len(latencies),
+            "ok": len(latencies) - failures,
+            "errors": failures,
+            "jobs": jobs,
+            "elapsedSeconds": round(elapsed, 3),
+            "filesPerSecond": round(len(latencies) / elapsed, 3) if elapsed > 0 else None,
+            "megabytesPerSecond": round(total_bytes / elapsed / 1e6, 3) if elapsed > 0 else None,
+            "latencyMs": {
+                "p50": _percentile(latencies, 0.50),
+                "p95": _percentile(latencies, 0.95),
+                "p99": _percentile(latencies, 0.99),
+                "max": latencies[-1] if latencies else None
+            }
+        }
+        output.write(json.dumps(summary) + "\n")
+        output.flush()
+        return failures
+
+
+def parse_concurrently(items, parse, max_workers=4, max_inflight_bytes=64 * 1024 * 1024):
+    """Run parse over items on a thread pool, yielding records in completion order.
+
+    items yields (index, name, size, load) where load() returns the file
+    object to parse. Files are only loaded once there is a free slot and
+    enough of the in-flight byte budget, so a large batch never holds more
+    than max_workers files or max_inflight_bytes in memory at once. A single
+    file bigger than the budget is still parsed, just on its own.
+    """
+    def run(index, name, size, load):
+        started = time.perf_counter()
+        record = {"index": index, "filename": name, "bytes": size}
+        try:
+            record["result"] = parse(load())
+            record["ok"] = True
+        except Exception as e:
+            record["ok"] = False
+            record["error"] = str(e)
+        record["elapsedMs"] = round((time.perf_counter() - started) * 1000, 3)
+        return record
+
+    pending = {}
+    inflight_bytes = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for index, name, size, load in items:
+            # Wait for capacity before loading the next file
+            while pending and (len(pending) >= max_workers or inflight_bytes + size > max_inflight_bytes):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    inflight_bytes -= pending.pop(future)
+                    yield future.result()
+
+            future = executor.submit(run, index, name, size, load)
+            pending[future] = size
+            inflight_bytes += size
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                inflight_bytes -= pending.pop(future)
+                yield future.result()
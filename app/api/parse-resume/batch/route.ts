@@ -0,0 +1,111 @@
+import { NextRequest, NextResponse } from 'next/server';
+import { getResumeParserPool, uploadPayload } from '@/lib/resume-parser-pool';
+
+// Per-batch limits, so one large upload can't starve the parser pool or the heap
+const MAX_FILES = parseInt(process.env.RESUME_BATCH_MAX_FILES || '', 10) || 200;
+const MAX_FILE_BYTES = parseInt(process.env.RESUME_BATCH_MAX_FILE_BYTES || '', 10) || 20 * 1024 * 1024;
+const CONCURRENCY = parseInt(process.env.RESUME_BATCH_CONCURRENCY || '', 10) || 4;
+const MAX_INFLIGHT_BYTES = parseInt(process.env.RESUME_BATCH_MAX_INFLIGHT_BYTES || '', 10) || 64 * 1024 * 1024;
+
+interface BatchRecord {
+  index: number;
+  filename: string;
+  bytes: number;
+  ok: boolean;
+  result?: unknown;
+  error?: string;
+  elapsedMs: number;
+}
+
+// Parse many resumes in one request and stream NDJSON results in completion order
+export async function POST(request: NextRequest) {
+  const formData = await request.formData();
+  const files = formData.getAll('resume').filter((value): value is File => value instanceof File);
+
+  if (files.length === 0) {
+    return NextResponse.json({ error: 'No files provided' }, { status: 400 });
+  }
+  if (files.length > MAX_FILES) {
+    return NextResponse.json(
+      { error: `Too many files: ${files.length} (limit ${MAX_FILES})` },
+      { status: 413 }
+    );
+  }
+
+  const targetField = (formData.get('targetField') as string | null) || undefined;
+  const encoder = new TextEncoder();
+
+  const stream = new ReadableStream<Uint8Array>({
+    async start(controller) {
+      const started = Date.now();
+      let nextIndex = 0;
+      let failures = 0;
+      let inflightBytes = 0;
+      const waiters: Array<() => void> = [];
+
+      // Byte budget shared by the runners; a lone oversized file still gets through
+      const acquire = async (size: number) => {
+        while (inflightBytes > 0 && inflightBytes + size > MAX_INFLIGHT_BYTES) {
+          await new Promise<void>((resolve) => waiters.push(resolve));
+        }
+        inflightBytes += size;
+      };
+      const release = (size: number) => {
+        inflightBytes -= size;
+        waiters.splice(0).forEach((resolve) => resolve());
+      };
+
+      const parseOne = async (index: number, file: File): Promise<BatchRecord> => {
+        const begin = Date.now();
+        const record: BatchRecord = { index, filename: file.name, bytes: file.size, ok: false, elapsedMs: 0 };
+
+        if (file.size > MAX_FILE_BYTES) {
+          record.error = `File exceeds the ${MAX_FILE_BYTES} byte limit`;
+          record.elapsedMs = Date.now() - begin;
+          return record;
+        }
+
+        await acquire(file.size);
+        try {
+          // The bytes go to the worker over its pipe, no temp file needed
+          const data = await uploadPayload(file);
+          record.result = await getResumeParserPool().parse({ data, filename: file.name }, targetField);
+          record.ok = true;
+        } catch (err) {
+          record.error = err instanceof Error ? err.message : String(err);
+        } finally {
+          release(file.size);
+        }
+
+        record.elapsedMs = Date.now() - begin;
+        return record;
+      };
+
+      const runner = async () => {
+        while (nextIndex < files.length) {
+          const index = nextIndex++;
+          const record = await parseOne(index, files[index]);
+          if (!record.ok) {
+            failures++;
+          }
+          controller.enqueue(encoder.encode(JSON.stringify(record) + '\n'));
+        }
+      };
+
+      await Promise.all(Array.from({ length: Math.min(CONCURRENCY, files.length) }, runner));
+
+      controller.enqueue(encoder.encode(JSON.stringify({
+        summary: true,
+        files: files.length,
+        ok: files.length - failures,
+        errors: failures,
+        elapsedMs: Date.now() - started,
+      }) + '\n'));
+      controller.close();
+    },
+  });
+
+  return new Response(stream, {
+    headers: { 'Content-Type': 'application/x-ndjson' },
+  });
+}
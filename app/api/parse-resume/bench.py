@@ -0,0 +1,280 @@
+"""Micro-benchmarks for each stage of the resume pipeline.
+
+Runs fully offline: the database is replaced by fake_db, the result cache
+and catalog snapshot are disabled, and every resume is generated by
+synthetic.py. Results are written as JSON; pass --baseline with an earlier
+run to fail on regressions.
+
+    python bench.py --output bench.json
+    python bench.py --quick --baseline bench.json --threshold 0.25
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_FORMAT = 1
+
+# Catalog sizes to time, from the real ~80 skills up to a very large catalog
+CATALOG_SIZES = [80, 1000, 10000, 50000]
+QUICK_CATALOG_SIZES = [80, 1000]
+WORD_COUNTS = [300, 3000]
+SKILL_DENSITIES = [0.02, 0.1]
+PDF_PAGES = [1, 5, 10]
+SEARCH_INDEX_SIZES = [1000, 20000]
+QUICK_SEARCH_INDEX_SIZES = [1000]
+
+
+def configure_offline(state_dir):
+    """Point every piece of on-disk and network state somewhere harmless before route is imported."""
+    os.environ['PARSER_CATALOG_SNAPSHOT'] = os.path.join(state_dir, 'skill_catalog.json')
+    os.environ['PARSER_CACHE_ENTRIES'] = '0'
+    os.environ['PARSER_CACHE_PATH'] = ''
+    os.environ['PARSER_CATALOG_REFRESH_SECONDS'] = '0'
+
+
+def measure(fn, min_time=0.2, repeat=5):
+    """Time fn() like timeit: calibrate a loop count, then keep per-call times for each repeat."""
+    fn()
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / repeat or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / repeat / elapsed) + 1))
+
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - started) / number)
+    return {
+        "number": number,
+        "repeat": repeat,
+        "minUs": round(min(samples) * 1e6, 3),
+        "medianUs": round(statistics.median(samples) * 1e6, 3),
+        "maxUs": round(max(samples) * 1e6, 3)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def named_file(data, name):
+    """An in-memory upload with a filename, as the extractor expects."""
+    stream = io.BytesIO(data)
+    stream.filename = name
+    return stream
+
+
+def case(make_input, fn):
+    """A case's setup: build its input once, then time fn(input)."""
+    def setup():
+        value = make_input()
+        return lambda: fn(value)
+    return setup
+
+
+def build_cases(route, synthetic, database, catalog_sizes, search_sizes=SEARCH_INDEX_SIZES):
+    """Yield (name, params, setup) for every stage and input size.
+
+    setup() builds the case's inputs and returns the function to time, so
+    cases left out by --filter cost nothing. Catalogs are generated and
+    compiled once, on first use.
+    """
+    catalog_rows = {}
+    catalogs = {}
+
+    def rows(size):
+        if size not in catalog_rows:
+            catalog_rows[size] = synthetic.make_catalog(size, seed=size, base_skills=route.SKILLS)
+        return catalog_rows[size]
+
+    def catalog(size):
+        if size not in catalogs:
+            catalogs[size] = route.SkillCatalog(*rows(size))
+        return catalogs[size]
+
+    def resume(size, words, density, seed):
+        return synthetic.make_resume_text(catalog(size).all_skills, words, density, seed=seed)
+
+    def load_from_db(catalog_rows):
+        database.load(*catalog_rows)
+        route.fetch_skills_from_db()
+        route.fetch_recommendations_from_db()
+
+    def index_of(resumes):
+        index = route.ResumeIndex()
+        for number in range(resumes):
+            text = resume(base, 300, 0.05, number)
+            index.add(number, text, route.extract_skills(text, catalog(base)))
+        index.compact()
+        return index, resume(base, 150, 0.1, -1), catalog(base)
+
+    base = catalog_sizes[0]
+    for size in catalog_sizes:
+        yield "catalog.build", {"skills": size}, case(lambda s=size: rows(s), lambda r: route.SkillCatalog(*r))
+        yield "catalog.fetch_db", {"skills": size}, case(lambda s=size: rows(s), load_from_db)
+
+    for words in WORD_COUNTS:
+        text = lambda w=words: resume(base, w, 0.05, w)
+        yield "extract.txt", {"words": words}, \
+            case(lambda t=text: t().encode('utf-8'), lambda d: route.extract_text_from_pdf(named_file(d, 'resume.txt')))
+        yield "document.lower", {"words": words}, case(text, lambda t: route.as_document(t).lower)
+        yield "document.sections", {"words": words}, case(text, lambda t: route.as_document(t).sections)
+        yield "contact", {"words": words}, case(text, route.extract_contact_info)
+        yield "experience", {"words": words}, case(text, route.determine_experience_level)
+
+    for pages in PDF_PAGES:
+        pdf = lambda p=pages: synthetic.make_resume_pdf(resume(base, p * 450, 0.05, p))
+        yield "extract.pdf", {"pages": pages}, \
+            case(pdf, lambda d: route.extract_text_from_pdf(named_file(d, 'resume.pdf')))
+        yield "analyze_resume.pdf", {"pages": pages, "skills": base}, \
+            case(pdf, lambda d: route.analyze_resume(named_file(d, 'resume.pdf')))
+
+    for size in catalog_sizes:
+        for words in WORD_COUNTS:
+            for density in SKILL_DENSITIES:
+                def prepared(size=size, words=words, density=density):
+                    doc = route.as_document(resume(size, words, density, size + words))
+                    doc.lower
+                    return doc, catalog(size)
+                yield "skills", {"skills": size, "words": words, "density": density}, \
+                    case(prepared, lambda pair: route.extract_skills(*pair))
+            yield "analyze_text", {"skills": size, "words": words}, \
+                case(lambda s=size, w=words: (resume(s, w, 0.05, s + w), catalog(s)),
+                     lambda pair: route.analyze_text(pair[0], "Software Development", pair[1], seed=1))
+        yield "recommend", {"skills": size}, \
+            case(lambda s=size: (catalog(s).all_skills[:20], catalog(s)),
+                 lambda pair: route.recommend_skills(pair[0], "Data Science", pair[1]))
+
+    for resumes in search_sizes:
+        yield "search", {"resumes": resumes}, \
+            case(lambda n=resumes: index_of(n), lambda f: f[0].search(f[1], route.extract_skills(f[1], f[2]), 10))
+
+
+def case_key(name, params):
+    return name + "[" + ",".join(f"{key}={value}" for key, value in params.items()) + "]"
+
+
+def compare(results, baseline, threshold, noise_floor_us):
+    """Return (key, baseline, current, ratio) for every case that got slower than allowed."""
+    previous = {entry["key"]: entry for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in results:
+        before = previous.get(entry["key"])
+        if not before:
+            continue
+        base, current = before["medianUs"], entry["medianUs"]
+        ratio = current / base if base else float('inf')
+        entry["baselineMedianUs"] = base
+        entry["ratio"] = round(ratio, 3)
+        if ratio > 1 + threshold and current - base > noise_floor_us:
+            regressions.append((entry["key"], base, current, ratio))
+    return regressions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the resume parser offline")
+    parser.add_argument('--quick', action='store_true', help="Small catalogs and short timings, for a smoke run")
+    parser.add_argument('--filter', default='', help="Only run cases whose key contains this text")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Seconds spent timing each case")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="Write the JSON results here instead of stdout")
+    parser.add_argument('--baseline', help="Earlier results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Allowed slowdown of the median as a fraction (default 0.25)")
+    parser.add_argument('--noise-floor-us', type=float, default=2.0,
+                        help="Ignore slowdowns smaller than this many microseconds")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    # Parser logging goes to stderr so stdout stays valid JSON
+    output = sys.stdout
+    sys.stdout = sys.stderr
+
+    state_dir = tempfile.mkdtemp(prefix='resume-bench-')
+    try:
+        return run(args, state_dir, output)
+    finally:
+        sys.stdout = output
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+def run(args, state_dir, output):
+    configure_offline(state_dir)
+
+    import fake_db
+    database = fake_db.FakeDatabase()
+    fake_db.install(database)
+
+    import route
+    import synthetic
+
+    catalog_sizes = QUICK_CATALOG_SIZES if args.quick else CATALOG_SIZES
+    search_sizes = QUICK_SEARCH_INDEX_SIZES if args.quick else SEARCH_INDEX_SIZES
+    min_time = min(args.min_time, 0.05) if args.quick else args.min_time
+
+    results = []
+    started = time.perf_counter()
+    for name, params, setup in build_cases(route, synthetic, database, catalog_sizes, search_sizes):
+        key = case_key(name, params)
+        if args.filter and args.filter not in key:
+            continue
+        entry = {"key": key, "stage": name, "params": params}
+        entry.update(measure(setup(), min_time, args.repeat))
+        results.append(entry)
+        print(f"{key:<60} {entry['medianUs']:>14.1f} us", file=sys.stderr)
+
+    report = {
+        "format": BENCH_FORMAT,
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": args.quick,
+            "elapsedSeconds": round(time.perf_counter() - started, 3),
+            "dbQueries": database.queries
+        },
+        "results": results
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold, args.noise_floor_us)
+        report["regressions"] = [key for key, _, _, _ in regressions]
+        for key, base, current, ratio in regressions:
+            print(f"REGRESSION {key}: {base:.1f} us -> {current:.1f} us ({ratio:.2f}x)", file=sys.stderr)
+
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(body + "\n")
+    else:
+        output.write(body + "\n")
+        output.flush()
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
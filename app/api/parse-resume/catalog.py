@@ -0,0 +1,198 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+from field_scorer import FieldScorer
+from skill_matcher import SkillMatcher
+
+# Last good catalog pulled from the database, loaded at startup instead of
+# waiting on Postgres
+SNAPSHOT_PATH = os.environ.get(
+    'PARSER_CATALOG_SNAPSHOT',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'skill_catalog.json')
+)
+
+# Bump when the snapshot layout changes; older files are ignored
+SNAPSHOT_FORMAT = 2
+
+# Skill categories that matter for each target field
+FIELD_CATEGORIES = {
+    "Software Development": ["programming_languages", "web_technologies", "tools"],
+    "Data Science": ["data_science", "programming_languages", "databases"],
+    "Web Development": ["web_technologies", "programming_languages", "databases"],
+    "DevOps": ["cloud_platforms", "tools", "programming_languages"],
+    "Mobile Development": ["programming_languages", "tools"]
+}
+
+
+def compute_etag(skills_by_category, recommendations=None):
+    """Content hash of a catalog, independent of dict ordering."""
+    canonical = json.dumps(
+        {"skills": skills_by_category, "recommended": recommendations or {}},
+        sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class RecommendationIndex:
+    """Recommended skills per field, pre-sorted by priority.
+
+    Built once from the recommended_skills rows so a recommendation is a
+    local scan with set exclusion instead of a database round trip.
+    """
+
+    def __init__(self, recommendations):
+        self._by_field = {}
+        for field, rows in recommendations.items():
+            # Same order as ORDER BY priority DESC NULLS LAST; sorted() is
+            # stable so ties keep their load order
+            ordered = sorted(rows, key=lambda row: (row[1] is None, -(row[1] or 0)))
+            self._by_field[field] = [skill for skill, _ in ordered]
+
+    def __contains__(self, field):
+        return field in self._by_field
+
+    def fields(self):
+        return list(self._by_field)
+
+    def recommend(self, field, existing_skills, limit=7):
+        """Top recommendations for field that are not in existing_skills."""
+        existing = set(existing_skills)
+        recommended = []
+        for skill in self._by_field.get(field, ()):
+            if skill not in existing:
+                recommended.append(skill)
+                if len(recommended) >= limit:
+                    break
+        return recommended
+
+
+class SkillIndex:
+    """Inverted index from each skill to its categories and related fields.
+
+    Built once per catalog so categorizing a resume costs one dict lookup
+    per found skill, however many categories the catalog has. A skill
+    relates to a field when the field recommends it, or when one of the
+    skill's categories belongs to the field in FIELD_CATEGORIES.
+    """
+
+    def __init__(self, skills_by_category, recommendations, field_categories=FIELD_CATEGORIES):
+        self._category_order = {category: index for index, category in enumerate(skills_by_category)}
+        self._categories = {}
+        for category, skills in skills_by_category.items():
+            for skill in skills:
+                categories = self._categories.setdefault(skill.lower(), [])
+                if category not in categories:
+                    categories.append(category)
+
+        fields_by_category = {}
+        for field, categories in field_categories.items():
+            for category in categories:
+                fields_by_category.setdefault(category, []).append(field)
+
+        self._fields = {}
+        for key, categories in self._categories.items():
+            for category in categories:
+                for field in fields_by_category.get(category, ()):
+                    self._add_field(key, field)
+        for field, rows in recommendations.items():
+            for skill, _ in rows:
+                self._add_field(skill.lower(), field)
+
+    def _add_field(self, key, field):
+        fields = self._fields.setdefault(key, [])
+        if field not in fields:
+            fields.append(field)
+
+    def categories(self, skill):
+        return self._categories.get(skill.lower(), [])
+
+    def fields(self, skill):
+        return self._fields.get(skill.lower(), [])
+
+    def categorize(self, skills):
+        """{category: [skill, ...]} for the categories that have a found skill, in catalog order."""
+        categorized = {}
+        for skill in skills:
+            for category in self._categories.get(skill.lower(), ()):
+                categorized.setdefault(category, []).append(skill)
+        order = self._category_order
+        return {category: categorized[category] for category in sorted(categorized, key=lambda c: order.get(c, len(order)))}
+
+
+class SkillCatalog:
+    """An immutable skill catalog together with its compiled matcher and lookup indexes."""
+
+    def __init__(self, skills_by_category, recommendations=None, source="fallback", generated_at=None, etag=None):
+        self.skills_by_category = skills_by_category
+        self.all_skills = [skill for category in skills_by_category.values() for skill in category]
+        # {field: [[skill, priority], ...]} as read from recommended_skills
+        self.recommendations = recommendations or {}
+        self.recommendation_index = RecommendationIndex(self.recommendations)
+        self.skill_index = SkillIndex(skills_by_category, self.recommendations)
+        self.etag = etag or compute_etag(skills_by_category, self.recommendations)
+        # Short form of the etag, cheap to put in responses and logs
+        self.version = self.etag[:12]
+        self.source = source
+        self.generated_at = generated_at or time.time()
+        self.matcher = SkillMatcher(self.all_skills)
+        self._field_scorer = None
+
+    @property
+    def field_scorer(self):
+        """Skill x field matrix, built on first use so startup doesn't pay for scipy."""
+        if self._field_scorer is None:
+            self._field_scorer = FieldScorer(self.skills_by_category, self.recommendations, FIELD_CATEGORIES)
+        return self._field_scorer
+
+    def to_snapshot(self):
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "etag": self.etag,
+            "generatedAt": self.generated_at,
+            "skills": self.skills_by_category,
+            "recommended": self.recommendations
+        }
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """Load the catalog snapshot, or None if it is missing, stale-format or corrupt."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable catalog snapshot {path}: {e}", file=sys.stderr)
+        return None
+
+    if data.get("format") != SNAPSHOT_FORMAT or not data.get("skills"):
+        print(f"Ignoring catalog snapshot {path} with unsupported format", file=sys.stderr)
+        return None
+
+    skills = data["skills"]
+    recommendations = data.get("recommended") or {}
+    if compute_etag(skills, recommendations) != data.get("etag"):
+        print(f"Ignoring catalog snapshot {path}: etag does not match its contents", file=sys.stderr)
+        return None
+
+    return SkillCatalog(skills, recommendations, source="snapshot",
+                        generated_at=data.get("generatedAt"), etag=data["etag"])
+
+
+def save_snapshot(catalog, path=SNAPSHOT_PATH):
+    """Write the snapshot atomically so readers never see a half-written file."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.skill_catalog.', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(catalog.to_snapshot(), f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
@@ -0,0 +1,347 @@
+"""Bulk import of the skill catalog into Postgres.
+
+Loads skills and recommended skills from CSV, JSON (including a catalog
+snapshot) or a SQL seed file like db_setup.sql, in a single transaction,
+using COPY into a staging table (or multi-row upserts with --method values),
+and creates the indexes the parser's queries use plus the catalog_version
+triggers that tell running parsers to reload.
+
+    python catalog_loader.py --catalog db_setup.sql
+    python catalog_loader.py --skills skills.csv --recommendations recommended.csv --replace
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+
+from startup import load_module
+
+# Channel the catalog triggers NOTIFY on, with the new catalog_version as payload
+CATALOG_CHANNEL = 'skill_catalog'
+
+# Rows per INSERT statement when COPY is not used
+VALUES_PAGE_SIZE = 1000
+
+# Accepted spellings, preferred first; new tables use the first one
+SKILL_COLUMNS = ('name', 'skill_name')
+CATEGORY_COLUMNS = ('category', 'type')
+PRIORITY_COLUMNS = ('priority', 'importance')
+NEW_TABLE_SKILL_COLUMN = 'skill_name'
+
+
+def _pick(columns, candidates, default):
+    for candidate in candidates:
+        if candidate in columns:
+            return candidate
+    return default
+
+
+# Columns of the catalog tables, as read by detect_columns
+COLUMNS_QUERY = """
+    SELECT table_name, column_name
+    FROM information_schema.columns
+    WHERE table_schema = 'public'
+    AND table_name IN ('skills', 'recommended_skills')
+"""
+
+
+def detect_columns(cursor):
+    """Find which of the known column spellings the catalog tables use.
+
+    Returns {"skills": bool, "recommended_skills": bool, "skill": ...,
+    "category": ..., "recommendedSkill": ..., "priority": ...}. Missing
+    tables report the names they would be created with.
+    """
+    cursor.execute(COLUMNS_QUERY)
+    return columns_from_rows(cursor.fetchall())
+
+
+def columns_from_rows(rows):
+    """detect_columns for (table_name, column_name) rows already fetched."""
+    tables = {}
+    for table, column in rows:
+        tables.setdefault(table, set()).add(column)
+    skills = tables.get('skills', set())
+    recommended = tables.get('recommended_skills', set())
+    return {
+        "skills": bool(skills),
+        "recommended_skills": bool(recommended),
+        "skill": _pick(skills, SKILL_COLUMNS, NEW_TABLE_SKILL_COLUMN),
+        "category": _pick(skills, CATEGORY_COLUMNS, 'category'),
+        "recommendedSkill": _pick(recommended, SKILL_COLUMNS, NEW_TABLE_SKILL_COLUMN),
+        "priority": _pick(recommended, PRIORITY_COLUMNS, 'priority')
+    }
+
+
+def ensure_schema(cursor, columns):
+    """Create missing tables, the unique keys the upserts rely on and the lookup indexes."""
+    skill, category = columns["skill"], columns["category"]
+    rec_skill, priority = columns["recommendedSkill"], columns["priority"]
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS skills (
+            id SERIAL PRIMARY KEY,
+            {skill} VARCHAR(100) NOT NULL UNIQUE,
+            {category} VARCHAR(50) NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS recommended_skills (
+            id SERIAL PRIMARY KEY,
+            {rec_skill} VARCHAR(100) NOT NULL,
+            field VARCHAR(50) NOT NULL,
+            {priority} INTEGER DEFAULT 0,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE({rec_skill}, field)
+        )
+    """)
+    # Tables created by hand may lack the keys ON CONFLICT needs
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS skills_{skill}_key ON skills ({skill})")
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS recommended_skills_{rec_skill}_field_key "
+                   f"ON recommended_skills ({rec_skill}, field)")
+    # The parser groups skills by category and ranks recommendations per field
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS skills_{category}_idx ON skills ({category})")
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS recommended_skills_field_{priority}_idx "
+                   f"ON recommended_skills (field, {priority} DESC)")
+    ensure_version_triggers(cursor)
+
+
+def ensure_version_triggers(cursor):
+    """Keep a catalog_version counter that every write to either table bumps and announces.
+
+    Parsers poll the single row (cheap, and works through pgbouncer) or
+    LISTEN on CATALOG_CHANNEL, and only reload the catalog when it changed.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("INSERT INTO catalog_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING")
+    cursor.execute(f"""
+        CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+        DECLARE
+            new_version BIGINT;
+        BEGIN
+            UPDATE catalog_version SET version = version + 1, updated_at = now()
+            WHERE id = 1 RETURNING version INTO new_version;
+            PERFORM pg_notify('{CATALOG_CHANNEL}', new_version::text);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in ('skills', 'recommended_skills'):
+        # Once per statement, so a bulk load bumps the version a few times rather than per row
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table}_catalog_version ON {table}")
+        cursor.execute(f"""
+            CREATE TRIGGER {table}_catalog_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+        """)
+
+
+# Readers: every reader returns (skills, recommendations) as lists of
+# (skill, category) and (skill, field, priority) tuples
+
+def _priority(value):
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
+def read_csv(path, kind):
+    """skills CSV: skill,category. recommendations CSV: skill,field,priority. A header row is optional."""
+    rows = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for index, row in enumerate(csv.reader(f)):
+            if not row or not any(cell.strip() for cell in row):
+                continue
+            if index == 0 and row[0].strip().lower() in SKILL_COLUMNS + ('skill',):
+                continue
+            cells = [cell.strip() for cell in row]
+            if kind == 'skills':
+                rows.append((cells[0], cells[1]))
+            else:
+                rows.append((cells[0], cells[1], _priority(cells[2] if len(cells) > 2 else None)))
+    return rows
+
+
+def read_json(path):
+    """A catalog snapshot ({"skills": {category: [...]}, "recommended": {field: [[skill, priority]]}})
+    or {"skills": [{"skill", "category"}], "recommendations": [{"skill", "field", "priority"}]}."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    skills, recommendations = [], []
+    raw_skills = data.get("skills") or {}
+    if isinstance(raw_skills, dict):
+        skills = [(skill, category) for category, names in raw_skills.items() for skill in names]
+    else:
+        skills = [(row.get("skill") or row.get("name") or row.get("skill_name"), row["category"]) for row in raw_skills]
+    raw_recommended = data.get("recommended") or data.get("recommendations") or {}
+    if isinstance(raw_recommended, dict):
+        recommendations = [(skill, field, _priority(priority))
+                           for field, rows in raw_recommended.items() for skill, priority in rows]
+    else:
+        recommendations = [(row.get("skill") or row.get("name") or row.get("skill_name"), row["field"],
+                            _priority(row.get("priority"))) for row in raw_recommended]
+    return skills, recommendations
+
+
+_INSERT_PATTERN = re.compile(r'INSERT\s+INTO\s+(\w+)\s*\([^)]*\)\s*VALUES(.*?);', re.IGNORECASE | re.DOTALL)
+_TUPLE_PATTERN = re.compile(r"\(\s*'((?:[^']|'')*)'\s*,\s*'((?:[^']|'')*)'\s*(?:,\s*(-?\d+|NULL))?\s*\)", re.IGNORECASE)
+
+
+def read_sql_seed(path):
+    """Rows from the INSERT ... VALUES statements of a seed file like db_setup.sql."""
+    with open(path, 'r', encoding='utf-8') as f:
+        sql = f.read()
+    skills, recommendations = [], []
+    for table, values in _INSERT_PATTERN.findall(sql):
+        for first, second, third in _TUPLE_PATTERN.findall(values):
+            first, second = first.replace("''", "'"), second.replace("''", "'")
+            if table.lower() == 'skills':
+                skills.append((first, second))
+            elif table.lower() == 'recommended_skills':
+                recommendations.append((first, second, None if third.upper() in ('', 'NULL') else int(third)))
+    return skills, recommendations
+
+
+def read_catalog(path):
+    """Read skills and recommendations from one .json or .sql file."""
+    if path.lower().endswith('.sql'):
+        return read_sql_seed(path)
+    return read_json(path)
+
+
+def _dedupe(rows, key_size):
+    """Keep the last row per key; one upsert statement can't touch a row twice."""
+    latest = {}
+    for row in rows:
+        if row[0]:
+            latest[row[:key_size]] = row
+    return list(latest.values())
+
+
+# Writers
+
+def _upsert_values(cursor, table, columns, conflict, update, rows):
+    """Multi-row INSERT ... ON CONFLICT, VALUES_PAGE_SIZE rows per statement."""
+    placeholder = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    for start in range(0, len(rows), VALUES_PAGE_SIZE):
+        page = rows[start:start + VALUES_PAGE_SIZE]
+        params = [value for row in page for value in row]
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([placeholder] * len(page))} "
+            f"ON CONFLICT ({', '.join(conflict)}) DO UPDATE SET {update} = EXCLUDED.{update}",
+            params
+        )
+
+
+def _upsert_copy(cursor, table, columns, conflict, update, rows):
+    """COPY the rows into a temporary staging table, then upsert them in one statement."""
+    stage = f"{table}_stage"
+    # Same column types as the target, none of its constraints or defaults
+    cursor.execute(f"CREATE TEMP TABLE {stage} ON COMMIT DROP AS SELECT {', '.join(columns)} FROM {table} WITH NO DATA")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['' if value is None else value for value in row])
+    buffer.seek(0)
+    # Empty unquoted fields load as NULL
+    cursor.copy_expert(f"COPY {stage} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    cursor.execute(
+        f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM {stage} "
+        f"ON CONFLICT ({', '.join(conflict)}) DO UPDATE SET {update} = EXCLUDED.{update}"
+    )
+
+
+def load_catalog(conn, skills, recommendations, method='copy', replace=False):
+    """Upsert the rows in one transaction and return a report with rows per second.
+
+    replace=True empties both tables first, so the database ends up with
+    exactly the given catalog.
+    """
+    started = time.perf_counter()
+    skills = _dedupe(skills, 1)
+    recommendations = _dedupe(recommendations, 2)
+    write = _upsert_copy if method == 'copy' else _upsert_values
+
+    cursor = conn.cursor()
+    try:
+        columns = detect_columns(cursor)
+        ensure_schema(cursor, columns)
+        if replace:
+            cursor.execute("TRUNCATE skills, recommended_skills")
+        if skills:
+            write(cursor, 'skills', (columns["skill"], columns["category"]),
+                  (columns["skill"],), columns["category"], skills)
+        if recommendations:
+            write(cursor, 'recommended_skills', (columns["recommendedSkill"], 'field', columns["priority"]),
+                  (columns["recommendedSkill"], 'field'), columns["priority"], recommendations)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    elapsed = time.perf_counter() - started
+    rows = len(skills) + len(recommendations)
+    return {
+        "skills": len(skills),
+        "recommendations": len(recommendations),
+        "method": method,
+        "replaced": replace,
+        "columns": columns,
+        "seconds": round(elapsed, 3),
+        "rowsPerSecond": round(rows / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Bulk load the skill catalog into Postgres")
+    parser.add_argument('--catalog', help="JSON catalog/snapshot or SQL seed file with both tables")
+    parser.add_argument('--skills', help="CSV of skill,category")
+    parser.add_argument('--recommendations', help="CSV of skill,field,priority")
+    parser.add_argument('--method', choices=('copy', 'values'), default='copy',
+                        help="COPY through a staging table, or multi-row INSERTs")
+    parser.add_argument('--replace', action='store_true', help="Empty both tables before loading")
+    parser.add_argument('--database-url', default=os.environ.get('PARSER_DATABASE_URL', ''),
+                        help="Postgres DSN (default: PARSER_DATABASE_URL, then the settings in setup_db.py)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if not (args.catalog or args.skills or args.recommendations):
+        print("Nothing to load: pass --catalog, --skills or --recommendations", file=sys.stderr)
+        return 2
+
+    skills, recommendations = read_catalog(args.catalog) if args.catalog else ([], [])
+    if args.skills:
+        skills += read_csv(args.skills, 'skills')
+    if args.recommendations:
+        recommendations += read_csv(args.recommendations, 'recommendations')
+
+    psycopg2 = load_module('psycopg2')
+    if args.database_url:
+        conn = psycopg2.connect(args.database_url)
+    else:
+        from setup_db import DB_CONFIG
+        conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        report = load_catalog(conn, skills, recommendations, args.method, args.replace)
+    finally:
+        conn.close()
+    print(json.dumps(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+import random
+import threading
+import time
+
+from startup import load_module
+
+# Circuit breaker states
+CLOSED = "closed"        # healthy, connections are handed out
+OPEN = "open"            # unhealthy, callers fail fast to their fallback
+HALF_OPEN = "half_open"  # one caller is probing whether the database is back
+
+# Connections dropped in a forked child; kept referenced so garbage
+# collection never closes a socket the parent is still using
+_abandoned = []
+
+
+class ManagedPool:
+    """Thread-safe Postgres pool with checkout validation, backoff and a circuit breaker.
+
+    Nothing connects until the first getconn(). Connection failures,
+    failed validations and errors reported through putconn(broken=True)
+    count against the breaker, and only a connection handed back through
+    putconn() in good order resets the count (a checkout alone doesn't, or
+    queries that time out would never add up); after failure_threshold in
+    a row it opens
+    and getconn() returns None immediately, so callers use their local
+    fallback instead of waiting on a database that is down or slow. Once
+    the backoff (doubling from backoff_base up to backoff_max, with
+    jitter) has passed, a single caller probes the database again.
+
+    Every checkout runs SET LOCAL statement_timeout, which both checks the
+    connection is alive and bounds every query in that transaction. SET
+    LOCAL (rather than a startup option) also works behind pgbouncer in
+    transaction mode, as used by the Supabase pooler.
+
+    Each checked-out connection remembers the pool it came from. If the
+    breaker or close() dropped that pool in the meantime, putconn() closes
+    the connection rather than handing it to the pool that replaced it.
+
+    observe(operation, seconds) and on_state(state) are optional hooks for
+    metrics.
+    """
+
+    def __init__(self, connect_kwargs, minconn=1, maxconn=5, statement_timeout_ms=5000,
+                 checkout_timeout=2.0, failure_threshold=3, backoff_base=1.0, backoff_max=60.0,
+                 pool_factory=None, observe=None, on_state=None):
+        self.connect_kwargs = connect_kwargs
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.statement_timeout_ms = statement_timeout_ms
+        self.checkout_timeout = checkout_timeout
+        self.failure_threshold = failure_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._pool_factory = pool_factory
+        self._observe = observe or (lambda operation, seconds: None)
+        self._on_state = on_state or (lambda state: None)
+        self._reset_state()
+
+    def _reset_state(self):
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        self._pool = None
+        # id(conn) -> (pool, slots) for each checked-out connection
+        self._origins = {}
+        self.state = CLOSED
+        self.failures = 0
+        self._opened = 0
+        self._retry_at = 0.0
+        self._probing = False
+        self.last_error = None
+
+    # Breaker bookkeeping
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            print(f"Database circuit breaker {state}")
+            self._on_state(state)
+
+    def _record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened = 0
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def _record_failure(self, error):
+        with self._lock:
+            self.last_error = str(error)
+            self.failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** self._opened)
+                self._opened += 1
+                self._retry_at = time.monotonic() + delay * random.uniform(0.8, 1.2)
+                self._set_state(OPEN)
+                # Drop the pool so the next probe starts from fresh connections
+                pool, self._pool = self._pool, None
+            else:
+                pool = None
+        if pool is not None:
+            try:
+                pool.closeall()
+            except Exception:
+                pass
+
+    def _allow_attempt(self):
+        """False while the breaker is open; lets exactly one caller through once the backoff expires."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() >= self._retry_at:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def retry_in(self):
+        """Seconds until the breaker lets another attempt through (0 if it would now)."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self._retry_at - time.monotonic())
+
+    @property
+    def connected(self):
+        return self._pool is not None and self.state == CLOSED
+
+    # Connections
+
+    def _ensure_pool(self):
+        with self._lock:
+            pool = self._pool
+        if pool is not None:
+            return pool
+        factory = self._pool_factory or load_module('psycopg2.pool').ThreadedConnectionPool
+        started = time.perf_counter()
+        pool = factory(self.minconn, self.maxconn, **self.connect_kwargs)
+        self._observe("connect", time.perf_counter() - started)
+        with self._lock:
+            if self._pool is None:
+                self._pool = pool
+                return pool
+            other = self._pool
+        # Another thread connected first; keep theirs
+        pool.closeall()
+        return other
+
+    def _prepare(self, conn):
+        """Validate a checked-out connection and bound its statements."""
+        if getattr(conn, 'closed', 0):
+            raise Exception("connection is closed")
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"SET LOCAL statement_timeout = {int(self.statement_timeout_ms)}")
+        finally:
+            cursor.close()
+
+    def getconn(self):
+        """A validated connection, or None when the database is unavailable or the pool is saturated."""
+        if not self._allow_attempt():
+            return None
+        started = time.perf_counter()
+        slots = self._slots
+        if not slots.acquire(timeout=self.checkout_timeout):
+            # Saturated rather than broken; don't count it against the breaker
+            with self._lock:
+                self._probing = False
+            print("Database pool exhausted, using fallback data")
+            return None
+
+        try:
+            pool = self._ensure_pool()
+            for attempt in range(2):
+                conn = pool.getconn()
+                try:
+                    self._prepare(conn)
+                    break
+                except Exception:
+                    # A stale connection; replace it once before giving up
+                    pool.putconn(conn, close=True)
+                    if attempt:
+                        raise
+        except Exception as e:
+            slots.release()
+            print(f"Database unavailable: {e}")
+            self._record_failure(e)
+            return None
+
+        with self._lock:
+            self._origins[id(conn)] = (pool, slots)
+        self._observe("checkout", time.perf_counter() - started)
+        return conn
+
+    def putconn(self, conn, broken=False):
+        """Return a connection; broken=True discards it and counts a failure."""
+        if conn is None:
+            return
+        with self._lock:
+            origin = self._origins.pop(id(conn), None)
+            current = self._pool
+        # Not checked out here, e.g. inherited from a forked parent whose
+        # sessions closing it would end; leave it alone
+        if origin is not None:
+            pool, slots = origin
+            try:
+                if pool is current:
+                    pool.putconn(conn, close=broken or bool(getattr(conn, 'closed', 0)))
+                else:
+                    # Its pool was dropped while it was out
+                    conn.close()
+            except Exception as e:
+                print(f"Error returning connection to pool: {e}")
+            finally:
+                slots.release()
+        if broken:
+            self._record_failure("query failed")
+        else:
+            self._record_success()
+
+    def reset_after_fork(self):
+        """Forget the parent's connections without closing them (that would end the parent's sessions)."""
+        if self._pool is not None:
+            _abandoned.append(self._pool)
+        self._reset_state()
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.closeall()
+
+    def status(self):
+        return {
+            "state": self.state,
+            "connected": self.connected,
+            "failures": self.failures,
+            "retryIn": round(self.retry_in(), 3),
+            "lastError": self.last_error
+        }
@@ -0,0 +1,74 @@
+import bisect
+
+from sections import segment
+
+
+class ResumeDocument:
+    """Resume text prepared once and shared by every extractor.
+
+    The original text is kept as-is so match offsets stay valid; derived
+    views (the lowercase copy, the first line, line start offsets) are
+    computed on first use and then reused, instead of every extractor
+    lowercasing or splitting the whole text again. The section index lets
+    extractors scan only the parts of the resume relevant to them.
+    """
+
+    __slots__ = ('text', '_lower', '_first_line', '_line_starts', '_sections')
+
+    def __init__(self, text):
+        self.text = text or ""
+        self._lower = None
+        self._first_line = None
+        self._line_starts = None
+        self._sections = None
+
+    def __len__(self):
+        return len(self.text)
+
+    @property
+    def lower(self):
+        """Lowercase view of the text, used for case-insensitive matching."""
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+    @property
+    def first_line(self):
+        """The first line, stripped, without splitting the rest of the text."""
+        if self._first_line is None:
+            end = self.text.find('\n')
+            self._first_line = (self.text if end < 0 else self.text[:end]).strip()
+        return self._first_line
+
+    @property
+    def line_starts(self):
+        """Offset at which each line starts."""
+        if self._line_starts is None:
+            starts = [0]
+            find = self.text.find
+            pos = find('\n')
+            while pos >= 0:
+                starts.append(pos + 1)
+                pos = find('\n', pos + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def line_of(self, offset):
+        """Zero-based line number containing offset."""
+        return bisect.bisect_right(self.line_starts, offset) - 1
+
+    @property
+    def sections(self):
+        """SectionIndex of the text's headed sections (see sections.segment)."""
+        if self._sections is None:
+            self._sections = segment(self.lower, self.line_starts)
+        return self._sections
+
+    def locate(self, offset):
+        """Where offset falls, as reported in responses."""
+        return {"section": self.sections.section_at(offset), "line": self.line_of(offset), "offset": offset}
+
+
+def as_document(text):
+    """Accept either raw text or a ResumeDocument."""
+    return text if isinstance(text, ResumeDocument) else ResumeDocument(text)
@@ -0,0 +1,190 @@
+import asyncio
+import csv
+import threading
+import time
+import types
+
+import async_db
+import startup
+from result_sink import RESULT_COLUMNS, RESULT_KEY
+
+
+class FakeCursor:
+    """Answers the handful of queries the parser issues, from in-memory tables."""
+
+    def __init__(self, db, sleep=True):
+        self._db = db
+        self._sleep = sleep
+        self._rows = []
+        self._staged = []
+
+    def execute(self, query, params=None):
+        if self._db.latency and self._sleep:
+            time.sleep(self._db.latency)
+        self._db.queries += 1
+        sql = ' '.join(query.split()).lower()
+        if 'information_schema.columns' in sql:
+            self._rows = [(table, column) for table in sorted(self._db.tables & set(self._db.columns))
+                          for column in self._db.columns[table]]
+        elif 'information_schema.tables' in sql:
+            table = next((name for name in ('recommended_skills', 'catalog_version') if f"'{name}'" in sql), 'skills')
+            self._rows = [(table in self._db.tables,)]
+        elif 'from catalog_version' in sql:
+            self._rows = [(self._db.version,)]
+        elif 'from skills' in sql and 'array_agg' in sql:
+            self._rows = [(category, list(skills)) for category, skills in self._db.skills_by_category.items()]
+        elif sql.startswith('insert into parse_results'):
+            if self._db.fail_writes:
+                raise Exception("parse_results is not writable")
+            if 'from parse_results_stage' in sql:
+                rows, self._staged = self._staged, []
+            else:
+                rows = [params[i:i + len(RESULT_COLUMNS)] for i in range(0, len(params), len(RESULT_COLUMNS))]
+            self._db.store_results(rows)
+            self._rows = []
+        elif 'from recommended_skills' in sql:
+            self._rows = [
+                (field, skill, priority)
+                for field, rows in self._db.recommendations.items()
+                for skill, priority in rows
+            ]
+        else:
+            self._rows = []
+
+    def copy_expert(self, sql, file):
+        # Only the result sink's COPY into its staging table
+        self._staged.extend(csv.reader(file))
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self._db = db
+
+    def cursor(self):
+        return FakeCursor(self._db)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeAsyncConnection:
+    """The async_db connection interface over the same tables; latency is an asyncio sleep."""
+
+    def __init__(self, db):
+        self._db = db
+        self.closed = False
+
+    async def fetch(self, query, params=None):
+        if self._db.latency:
+            await asyncio.sleep(self._db.latency)
+        cursor = FakeCursor(self._db, sleep=False)
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDatabase:
+    """In-process stand-in for the skills and recommended_skills tables.
+
+    latency adds a fixed delay to every query to mimic a network round trip.
+    With versioned=True there is also a catalog_version row that load()
+    bumps, as the catalog triggers would. Rows written by a ResultSink are
+    kept in parse_results, upload counts by key; fail_writes makes those
+    writes raise.
+    """
+
+    def __init__(self, skills_by_category=None, recommendations=None, latency=0.0, skill_column='name',
+                 versioned=False):
+        self.latency = latency
+        self.versioned = versioned
+        self.version = 0
+        self.columns = {
+            'skills': ('id', skill_column, 'category'),
+            'recommended_skills': ('id', skill_column, 'field', 'priority')
+        }
+        self.queries = 0
+        self.parse_results = {}
+        self.fail_writes = False
+        self.load(skills_by_category, recommendations)
+
+    def load(self, skills_by_category=None, recommendations=None):
+        """Replace the table contents; a table passed as None does not exist."""
+        self.skills_by_category = skills_by_category or {}
+        self.recommendations = recommendations or {}
+        self.tables = set()
+        if self.versioned:
+            self.tables.add('catalog_version')
+            self.version += 1
+        if skills_by_category is not None:
+            self.tables.add('skills')
+        if recommendations is not None:
+            self.tables.add('recommended_skills')
+
+    def store_results(self, rows):
+        uploads = RESULT_COLUMNS.index('uploads')
+        for row in rows:
+            key = tuple(row[:len(RESULT_KEY)])
+            self.parse_results[key] = self.parse_results.get(key, 0) + int(row[uploads])
+
+    def pool_class(self):
+        """A ThreadedConnectionPool look-alike bound to this database."""
+        db = self
+
+        class FakeConnectionPool:
+            def __init__(self, minconn, maxconn, *args, **kwargs):
+                self.maxconn = maxconn
+                self._lock = threading.Lock()
+                self._in_use = 0
+
+            def getconn(self, key=None):
+                with self._lock:
+                    if self._in_use >= self.maxconn:
+                        raise Exception("connection pool exhausted")
+                    self._in_use += 1
+                return FakeConnection(db)
+
+            def putconn(self, conn, key=None, close=False):
+                with self._lock:
+                    self._in_use -= 1
+
+            def closeall(self):
+                pass
+
+        return FakeConnectionPool
+
+    async def connect_async(self, statement_timeout_ms, **connect_kwargs):
+        """An async_db.AsyncPool connector bound to this database."""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return FakeAsyncConnection(self)
+
+
+def install(database):
+    """Make load_module('psycopg2.pool') and AsyncPool connections use database.
+
+    Must run before route is imported; nothing ever reaches the network.
+    The real psycopg2 module, if installed, is left alone.
+    """
+    module = types.ModuleType('psycopg2.pool')
+    module.ThreadedConnectionPool = database.pool_class()
+    module.SimpleConnectionPool = module.ThreadedConnectionPool
+    startup._loaded_modules['psycopg2.pool'] = module
+    async_db.open_connection = database.connect_async
+    return module
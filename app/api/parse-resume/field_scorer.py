@@ -0,0 +1,118 @@
+import math
+
+from startup import load_module
+
+# Weight of a skill for a field it belongs to by category, and the most a
+# recommended_skills row can add (scaled by its priority)
+CATEGORY_WEIGHT = 1.0
+RECOMMENDED_WEIGHT = 1.0
+
+
+class FieldScorer:
+    """Scores how well a set of found skills fits every field at once.
+
+    The catalog is compiled into a sparse skill x field weight matrix: a
+    skill weighs CATEGORY_WEIGHT for each field whose categories (per
+    FIELD_CATEGORIES) contain it, plus up to RECOMMENDED_WEIGHT when the
+    field lists it in recommended_skills, more for higher priorities.
+    Columns are L2-normalized, so scoring a stack of resumes is one sparse
+    product of their 0/1 skill rows with the matrix, and each score is the
+    cosine similarity between the resume and the field.
+
+    scipy is loaded on first use; without it the same scores are computed
+    with plain dicts.
+    """
+
+    def __init__(self, skills_by_category, recommendations, field_categories):
+        self.fields = list(field_categories) + [field for field in recommendations if field not in field_categories]
+        column = {field: index for index, field in enumerate(self.fields)}
+        self._rows = {}
+        weights = {}
+
+        def row(skill):
+            return self._rows.setdefault(skill.lower(), len(self._rows))
+
+        for field, categories in field_categories.items():
+            for category in categories:
+                for skill in skills_by_category.get(category, ()):
+                    weights[(row(skill), column[field])] = CATEGORY_WEIGHT
+
+        priorities = [priority for rows in recommendations.values() for _, priority in rows if priority is not None]
+        top_priority = max(priorities) if priorities else 0
+        for field, rows in recommendations.items():
+            for skill, priority in rows:
+                share = (priority or 0) / top_priority if top_priority > 0 else 0
+                key = (row(skill), column[field])
+                weights[key] = weights.get(key, 0) + RECOMMENDED_WEIGHT * (0.5 + 0.5 * max(share, 0))
+
+        norms = [0.0] * len(self.fields)
+        for (_, col), weight in weights.items():
+            norms[col] += weight * weight
+        norms = [math.sqrt(norm) or 1.0 for norm in norms]
+
+        # {row: [(col, normalized weight), ...]} for the dict fallback
+        self._by_row = {}
+        for (skill_row, col), weight in weights.items():
+            self._by_row.setdefault(skill_row, []).append((col, weight / norms[col]))
+
+        self._matrix = None
+        try:
+            sparse = load_module('scipy.sparse')
+            numpy = load_module('numpy')
+        except ImportError:
+            return
+        if weights:
+            keys = list(weights)
+            self._matrix = sparse.csr_matrix(
+                (
+                    numpy.array([weights[key] / norms[key[1]] for key in keys]),
+                    (numpy.array([key[0] for key in keys]), numpy.array([key[1] for key in keys]))
+                ),
+                shape=(len(self._rows), len(self.fields))
+            )
+
+    def _skill_rows(self, skills):
+        rows = {self._rows.get(skill.lower()) for skill in skills}
+        rows.discard(None)
+        return sorted(rows)
+
+    def similarities(self, skill_lists):
+        """Cosine similarity of each resume's skills with each field: one list per resume, in self.fields order."""
+        rows_per_resume = [self._skill_rows(skills) for skills in skill_lists]
+        if self._matrix is not None:
+            sparse = load_module('scipy.sparse')
+            numpy = load_module('numpy')
+            indices = [row for rows in rows_per_resume for row in rows]
+            indptr = numpy.cumsum([0] + [len(rows) for rows in rows_per_resume])
+            stack = sparse.csr_matrix(
+                (numpy.ones(len(indices)), numpy.array(indices, dtype=numpy.int64), indptr),
+                shape=(len(rows_per_resume), len(self._rows))
+            )
+            scores = (stack @ self._matrix).toarray()
+        else:
+            scores = []
+            for rows in rows_per_resume:
+                totals = [0.0] * len(self.fields)
+                for row in rows:
+                    for col, weight in self._by_row.get(row, ()):
+                        totals[col] += weight
+                scores.append(totals)
+        return [
+            [float(score) / math.sqrt(len(rows)) if rows else 0.0 for score in resume_scores]
+            for rows, resume_scores in zip(rows_per_resume, scores)
+        ]
+
+    def rank(self, skill_lists, top=3):
+        """Top fields per resume as [{"field", "confidence"}], confidence being the cosine similarity scaled to 0-100.
+
+        It measures how well the skills fit that field alone, so it doesn't
+        move with the number of fields or reach 100 on a single match.
+        """
+        ranked = []
+        for scores in self.similarities(skill_lists):
+            order = sorted(range(len(scores)), key=lambda col: -scores[col])[:top]
+            ranked.append([
+                {"field": self.fields[col], "confidence": round(100 * scores[col])}
+                for col in order if scores[col] > 0
+            ])
+        return ranked
@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+
+# Production settings for `python route.py --serve` (or `gunicorn -c gunicorn.conf.py route:app`).
+# Every value can be overridden from the environment.
+
+bind = os.environ.get('PARSER_BIND', '0.0.0.0:5000')
+
+# Processes and threads per process; parsing is CPU bound, so scale workers
+# with cores and keep a few threads each to overlap I/O
+workers = int(os.environ.get('PARSER_WORKERS', str(multiprocessing.cpu_count())))
+worker_class = 'gthread'
+threads = int(os.environ.get('PARSER_THREADS', '4'))
+
+# Maximum requests a worker holds at once (queued plus in progress)
+worker_connections = int(os.environ.get('PARSER_MAX_INFLIGHT', '64'))
+backlog = int(os.environ.get('PARSER_BACKLOG', '2048'))
+
+# A worker that stays silent this long is killed and replaced
+timeout = int(os.environ.get('PARSER_TIMEOUT', '60'))
+# Time given to in-flight requests on reload (HUP) or shutdown (TERM)
+graceful_timeout = int(os.environ.get('PARSER_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('PARSER_KEEPALIVE', '5'))
+
+# Recycle workers now and then to cap slow leaks in PDF parsing
+max_requests = int(os.environ.get('PARSER_MAX_REQUESTS', '5000'))
+max_requests_jitter = int(os.environ.get('PARSER_MAX_REQUESTS_JITTER', '500'))
+
+# Load the catalog and compiled matcher once in the master so workers share
+# them copy-on-write instead of each building their own
+preload_app = True
+
+# Each worker writes its metrics here so /metrics can report the whole server
+os.environ.setdefault(
+    'PARSER_METRICS_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'metrics')
+)
+
+accesslog = os.environ.get('PARSER_ACCESS_LOG', '-')
+errorlog = '-'
+
+
+def on_starting(server):
+    # Counters start from zero on every server start
+    from metrics import clear_directory
+    clear_directory(os.environ['PARSER_METRICS_DIR'])
+
+
+def pre_fork(server, worker):
+    # A worker forked while a catalog thread is importing psycopg2 would hang on its import lock
+    import route
+    route.settle_before_fork()
+
+
+def post_fork(server, worker):
+    # Threads and DB sockets don't survive fork; give each worker its own
+    import route
+    route.reset_after_fork()
+
+
+def worker_exit(server, worker):
+    # Write out queued parse results, and keep a retiring worker's final counts in the totals
+    import route
+    route.RESULT_SINK.close()
+    route.REGISTRY.dump(force=True)
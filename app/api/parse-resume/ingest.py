@@ -0,0 +1,229 @@
+import gc
+import mmap
+import os
+import resource
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+
+from startup import load_module
+
+# Uploads larger than this are refused
+MAX_UPLOAD_BYTES = int(os.environ.get('PARSER_MAX_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+# Uploads up to this size stay in memory; larger ones are spooled to disk and memory-mapped
+SPOOL_BYTES = int(os.environ.get('PARSER_SPOOL_BYTES', str(1024 * 1024)))
+# Largest single PDF stream (page content, image, font) that may be inflated
+MAX_DECOMPRESSED_BYTES = int(os.environ.get('PARSER_PDF_MAX_DECOMPRESSED_BYTES', str(64 * 1024 * 1024)))
+# Upload bytes a process parses at once; more uploads wait, then get a 503
+MAX_INFLIGHT_BYTES = int(os.environ.get('PARSER_MAX_INFLIGHT_BYTES', str(64 * 1024 * 1024)))
+INFLIGHT_WAIT_SECONDS = float(os.environ.get('PARSER_INFLIGHT_WAIT_SECONDS', '10'))
+# Refuse new parses while the process is above this resident size (0 = no limit)
+MAX_RSS_BYTES = int(os.environ.get('PARSER_MAX_RSS_BYTES', '0'))
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class MemoryPressure(RuntimeError):
+    """The process is too close to its memory limit to take on this upload."""
+
+
+class DecompressionLimitExceeded(ValueError):
+    pass
+
+
+# Resident memory
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_bytes():
+    """Current resident set size, or the peak where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+def check_memory(limit=MAX_RSS_BYTES):
+    """Raise MemoryPressure rather than start a parse that could get the process OOM-killed."""
+    if not limit or rss_bytes() <= limit:
+        return
+    gc.collect()
+    rss = rss_bytes()
+    if rss > limit:
+        raise MemoryPressure(f"Parser is using {rss} bytes (limit {limit}); try again shortly")
+
+
+@contextmanager
+def memory_report(report):
+    """Fill report with resident memory after the block and how much the block added."""
+    before = rss_bytes()
+    try:
+        yield report
+    finally:
+        after = rss_bytes()
+        report.update({"rssBytes": after, "rssGrowthBytes": after - before, "peakRssBytes": peak_rss_bytes()})
+
+
+class ByteBudget:
+    """Counting semaphore over bytes, so a few huge uploads can't all be parsed at once.
+
+    A request larger than the whole budget is clamped to it, so it still
+    runs, just on its own.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._condition = threading.Condition()
+
+    def acquire(self, size, timeout=None):
+        size = min(size, self.limit)
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.used + size <= self.limit, timeout):
+                return False
+            self.used += size
+            return True
+
+    def release(self, size):
+        with self._condition:
+            self.used -= min(size, self.limit)
+            self._condition.notify_all()
+
+
+# Uploads
+
+def upload_size(file):
+    """Size of a file object's contents, leaving it positioned at the start."""
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return size
+
+
+def spool_stream(stream, max_bytes=MAX_UPLOAD_BYTES, spool_bytes=SPOOL_BYTES, size=None):
+    """Copy a stream into memory or, past spool_bytes, a temporary file; refuse it past max_bytes.
+
+    With a known size the data is written straight to disk when it is
+    large. Returns the spool positioned at the start, or None if the stream
+    ended early.
+    """
+    if size is not None and size > max_bytes:
+        raise UploadTooLarge(f"Upload of {size} bytes exceeds the {max_bytes} byte limit")
+    if size is not None and size > spool_bytes:
+        spool = tempfile.TemporaryFile()
+    else:
+        spool = tempfile.SpooledTemporaryFile(max_size=spool_bytes)
+    remaining = size
+    copied = 0
+    try:
+        while remaining is None or remaining > 0:
+            chunk = stream.read(1024 * 1024 if remaining is None else min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            copied += len(chunk)
+            if copied > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+            spool.write(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    if remaining:
+        spool.close()
+        return None
+    spool.seek(0)
+    return spool
+
+
+@contextmanager
+def mapped(file, min_size=SPOOL_BYTES):
+    """A read-only memory map of a large, disk-backed file object, or the file itself.
+
+    PyPDF2 then pages the document in from the page cache on demand
+    instead of reading it through Python buffers.
+    """
+    if getattr(file, '_rolled', True) is False:
+        # Still an in-memory SpooledTemporaryFile; fileno() would force it to disk
+        yield file
+        return
+    try:
+        fileno = file.fileno()
+        size = os.fstat(fileno).st_size
+    except (AttributeError, OSError, ValueError):
+        # io.UnsupportedOperation (no real file behind it) is both OSError and ValueError
+        yield file
+        return
+    if size < min_size:
+        yield file
+        return
+    view = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+    try:
+        yield view
+    finally:
+        view.close()
+
+
+def shared_path(file):
+    """A path another process can open to read a disk-backed file object, or None.
+
+    Spooled uploads that rolled over to disk are unnamed temporary files;
+    /proc/<pid>/fd reaches them for as long as this process holds them
+    open. In-memory spools (and systems without /proc) give None.
+    """
+    if getattr(file, '_rolled', True) is False:
+        return None
+    try:
+        fileno = file.fileno()
+        file.flush()
+    except (AttributeError, OSError, ValueError):
+        return None
+    path = f"/proc/{os.getpid()}/fd/{fileno}"
+    return path if os.path.exists(path) else None
+
+
+# Decompression bombs: PyPDF2 inflates every Flate stream in full, so a
+# few KB of crafted PDF can expand to gigabytes
+
+def bounded_decompress(data, limit=None):
+    """zlib-inflate data, raising DecompressionLimitExceeded past limit bytes.
+
+    Falls back to byte-at-a-time inflation for damaged streams, keeping
+    what could be recovered, as PyPDF2 itself does.
+    """
+    limit = MAX_DECOMPRESSED_BYTES if limit is None else limit
+    try:
+        result = zlib.decompressobj().decompress(data, limit + 1)
+    except zlib.error:
+        inflater = zlib.decompressobj(zlib.MAX_WBITS | 32)
+        parts, total = [], 0
+        for index in range(len(data)):
+            try:
+                part = inflater.decompress(data[index:index + 1])
+            except zlib.error:
+                continue
+            parts.append(part)
+            total += len(part)
+            if total > limit:
+                break
+        result = b''.join(parts)
+    if len(result) > limit:
+        raise DecompressionLimitExceeded(f"PDF stream inflates past the {limit} byte limit")
+    return result
+
+
+def guard_decompression():
+    """Route PyPDF2's Flate decoding through bounded_decompress (idempotent)."""
+    filters = load_module('PyPDF2.filters')
+    filters.decompress = bounded_decompress
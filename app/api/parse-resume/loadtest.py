@@ -0,0 +1,420 @@
+"""Concurrent load test for the /api/parse-resume service.
+
+Starts the production server (gunicorn.conf.py, Flask or --asgi) on a free
+local port and drives it with concurrent multipart uploads, a weighted mix
+of plain-text and PDF resumes generated by synthetic.py. Runs fully
+offline: unless --database-url points at a local Postgres, the server's
+database is fake_db seeded with the skills and recommended_skills rows of
+db_setup.sql, so nothing reaches the hardcoded Supabase host. Each run
+reports requests per second, latency percentiles, errors by cause and the
+server's fallback counters, as JSON.
+
+    python loadtest.py --concurrency 1,8,32 --duration 20
+    python loadtest.py --mix txt:300=3,pdf:10=1 --db-latency 0.02 --output load.json
+    python loadtest.py --database-url postgresql://localhost/resumes --seed-database
+    python loadtest.py --url http://127.0.0.1:5000 --requests 500
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+LOADTEST_FORMAT = 1
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SEED_PATH = os.path.join(HERE, 'db_setup.sql')
+
+# kind:size=weight, size in words for txt and pages for pdf
+DEFAULT_MIX = 'txt:300=4,txt:3000=1,pdf:1=3,pdf:5=1'
+WORDS_PER_PAGE = 450
+ENDPOINT = '/api/parse-resume'
+BOUNDARY = 'resume-loadtest-boundary'
+
+FALLBACK_PATTERN = re.compile(r'^resume_parser_fallback_total\{kind="([^"]+)"\} (\S+)$', re.MULTILINE)
+
+
+def make_app(kind='wsgi'):
+    """gunicorn app factory: route's app against fake_db, as configured by PARSER_LOADTEST_FAKE_DB.
+
+    Runs in the gunicorn master (preload_app), so every worker forks with
+    the fake database already in place.
+    """
+    config = json.loads(os.environ.get('PARSER_LOADTEST_FAKE_DB') or '{}')
+    import fake_db
+    from catalog_loader import read_sql_seed
+    skills, recommendations = read_sql_seed(config.get('seed') or SEED_PATH)
+    skills_by_category = {}
+    for skill, category in skills:
+        skills_by_category.setdefault(category, []).append(skill)
+    recommended = {}
+    for skill, field, priority in recommendations:
+        recommended.setdefault(field, []).append((skill, priority or 0))
+    database = fake_db.FakeDatabase(skills_by_category, recommended, latency=config.get('latency', 0.0),
+                                    skill_column='skill_name')
+    fake_db.install(database)
+
+    import route
+    return route.asgi_app if kind == 'asgi' else route.app
+
+
+def parse_mix(spec):
+    """[(kind, size, weight), ...] from a spec like "txt:300=4,pdf:5=1"."""
+    mix = []
+    for part in spec.split(','):
+        match = re.fullmatch(r'\s*(txt|pdf):(\d+)(?:=(\d+(?:\.\d+)?))?\s*', part)
+        if not match:
+            raise ValueError(f"Bad mix entry {part!r}: expected txt:WORDS=WEIGHT or pdf:PAGES=WEIGHT")
+        mix.append((match.group(1), int(match.group(2)), float(match.group(3) or 1)))
+    return mix
+
+
+def build_corpus(mix, skills, per_entry, seed=0):
+    """{label: [(filename, bytes), ...]} with per_entry distinct resumes for each mix entry."""
+    import synthetic
+    corpus = {}
+    for kind, size, _ in mix:
+        label = f"{kind}:{size}"
+        documents = []
+        for number in range(per_entry):
+            words = size if kind == 'txt' else size * WORDS_PER_PAGE
+            text = synthetic.make_resume_text(skills, words, 0.05, seed=seed + number * 7919 + size)
+            if kind == 'txt':
+                documents.append((f"resume-{number}.txt", text.encode('utf-8')))
+            else:
+                documents.append((f"resume-{number}.pdf", synthetic.make_resume_pdf(text)))
+        corpus[label] = documents
+    return corpus
+
+
+def multipart_body(filename, data, target_field):
+    content_type = 'application/pdf' if filename.endswith('.pdf') else 'text/plain'
+    return b''.join([
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="targetField"\r\n\r\n{target_field}\r\n'.encode('utf-8'),
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8'),
+        data,
+        f'\r\n--{BOUNDARY}--\r\n'.encode('utf-8')
+    ])
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def latency_summary(latencies):
+    latencies = [round(latency, 3) for latency in sorted(latencies)]
+    return {
+        "p50": percentile(latencies, 0.50),
+        "p90": percentile(latencies, 0.90),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else None,
+        "mean": round(sum(latencies) / len(latencies), 3) if latencies else None
+    }
+
+
+def scrape_fallbacks(host, port, timeout=10):
+    """{kind: count} from the server's /metrics, or None if it can't be read."""
+    try:
+        conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        conn.request('GET', '/metrics')
+        response = conn.getresponse()
+        body = response.read().decode('utf-8', 'replace')
+        conn.close()
+    except (OSError, http.client.HTTPException):
+        return None
+    if response.status != 200:
+        return None
+    return {kind: float(value) for kind, value in FALLBACK_PATTERN.findall(body)}
+
+
+def drive(host, port, corpus, mix, concurrency, duration=None, max_requests=None, target_field="Software Development",
+          timeout=120, seed=0):
+    """Send uploads from concurrency keep-alive clients until duration passes or max_requests are sent.
+
+    Returns (records, elapsed seconds); a record is (label, latency ms,
+    outcome) where outcome is the HTTP status or an exception name.
+    """
+    labels = [f"{kind}:{size}" for kind, size, _ in mix]
+    weights = [weight for _, _, weight in mix]
+    bodies = {label: [multipart_body(name, data, target_field) for name, data in documents]
+              for label, documents in corpus.items()}
+    records = []
+    lock = threading.Lock()
+    sent = [0]
+    started = time.perf_counter()
+    deadline = started + duration if duration else None
+
+    def client(number):
+        rng = random.Random(seed * 1000 + number)
+        conn = None
+        while True:
+            with lock:
+                if (max_requests and sent[0] >= max_requests) or (deadline and time.perf_counter() >= deadline):
+                    break
+                sent[0] += 1
+            label = rng.choices(labels, weights)[0]
+            body = rng.choice(bodies[label])
+            begin = time.perf_counter()
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection(host, port, timeout=timeout)
+                conn.request('POST', ENDPOINT, body, {
+                    'Content-Type': f'multipart/form-data; boundary={BOUNDARY}',
+                    'Content-Length': str(len(body))
+                })
+                response = conn.getresponse()
+                response.read()
+                outcome = response.status
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                    conn = None
+            except (OSError, http.client.HTTPException) as e:
+                outcome = type(e).__name__
+                if conn is not None:
+                    conn.close()
+                conn = None
+            with lock:
+                records.append((label, (time.perf_counter() - begin) * 1000, outcome))
+        if conn is not None:
+            conn.close()
+
+    threads = [threading.Thread(target=client, args=(number,), daemon=True) for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records, time.perf_counter() - started
+
+
+def summarize(records, elapsed, concurrency, fallbacks_before, fallbacks_after):
+    ok = [latency for _, latency, outcome in records if outcome == 200]
+    errors = {}
+    for _, _, outcome in records:
+        if outcome != 200:
+            errors[str(outcome)] = errors.get(str(outcome), 0) + 1
+    by_label = {}
+    for label, latency, outcome in records:
+        entry = by_label.setdefault(label, {"requests": 0, "errors": 0, "latencies": []})
+        entry["requests"] += 1
+        if outcome == 200:
+            entry["latencies"].append(latency)
+        else:
+            entry["errors"] += 1
+
+    run = {
+        "concurrency": concurrency,
+        "requests": len(records),
+        "ok": len(ok),
+        "errors": errors,
+        "errorRate": round((len(records) - len(ok)) / len(records), 4) if records else None,
+        "elapsedSeconds": round(elapsed, 3),
+        "requestsPerSecond": round(len(ok) / elapsed, 3) if elapsed > 0 else None,
+        # Latency of successful requests only
+        "latencyMs": latency_summary(ok),
+        "byKind": {
+            label: {"requests": entry["requests"], "errors": entry["errors"],
+                    "latencyMs": latency_summary(entry["latencies"])}
+            for label, entry in sorted(by_label.items())
+        },
+        "fallbacks": None,
+        "fallbackRate": None
+    }
+    if fallbacks_before is not None and fallbacks_after is not None:
+        # Counters are per server, so a run's share is the difference
+        fallbacks = {kind: round(count - fallbacks_before.get(kind, 0))
+                     for kind, count in fallbacks_after.items() if count > fallbacks_before.get(kind, 0)}
+        run["fallbacks"] = fallbacks
+        run["fallbackRate"] = {kind: round(count / len(records), 4) for kind, count in fallbacks.items()} if records else {}
+    return run
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(database_url, seed_path):
+    """Load the seed file's catalog into a local Postgres."""
+    from startup import load_module
+    from catalog_loader import load_catalog, read_catalog
+    psycopg2 = load_module('psycopg2')
+    skills, recommendations = read_catalog(seed_path)
+    conn = psycopg2.connect(database_url)
+    try:
+        report = load_catalog(conn, skills, recommendations)
+    finally:
+        conn.close()
+    print(f"Seeded {report['skills']} skills and {report['recommendations']} recommendations into {database_url}",
+          file=sys.stderr)
+
+
+def start_server(args, state_dir):
+    """Start gunicorn on a free local port; returns (process, port, log path)."""
+    port = free_port()
+    env = dict(
+        os.environ,
+        PARSER_BIND=f"127.0.0.1:{port}",
+        PARSER_WORKERS=str(args.workers),
+        PARSER_METRICS_DIR=os.path.join(state_dir, 'metrics'),
+        PARSER_CATALOG_SNAPSHOT=os.path.join(state_dir, 'skill_catalog.json'),
+        PARSER_ACCESS_LOG=os.devnull,
+        PARSER_MAX_INFLIGHT=str(max(64, max(args.concurrency) * 2))
+    )
+    if not args.cache:
+        # Every request parses; otherwise a small corpus is mostly cache hits
+        env.update(PARSER_CACHE_ENTRIES='0', PARSER_CACHE_PATH='')
+    if args.database_url:
+        env['PARSER_DATABASE_URL'] = args.database_url
+        app = 'route:asgi_app' if args.asgi else 'route:app'
+    else:
+        env['PARSER_LOADTEST_FAKE_DB'] = json.dumps({"seed": args.seed, "latency": args.db_latency})
+        app = 'loadtest:make_app("asgi")' if args.asgi else 'loadtest:make_app()'
+
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py']
+    if args.asgi:
+        command += ['--worker-class', 'asgi', '--threads', '1']
+    command.append(app)
+    log_path = os.path.join(state_dir, 'server.log')
+    log = open(log_path, 'wb')
+    process = subprocess.Popen(command, cwd=HERE, env=env, stdout=log, stderr=subprocess.STDOUT)
+    log.close()
+
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        if scrape_fallbacks('127.0.0.1', port, timeout=2) is not None:
+            return process, port, log_path
+        time.sleep(0.2)
+    stop_server(process)
+    with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+        print(f.read()[-4000:], file=sys.stderr)
+    raise RuntimeError(f"Server did not start within {args.startup_timeout}s (log: {log_path})")
+
+
+def stop_server(process, timeout=30):
+    if process.poll() is None:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Load test the resume parse service offline")
+    parser.add_argument('--concurrency', default='8',
+                        help="Concurrent clients; a comma-separated list runs once per value (default 8)")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per run (default 10)")
+    parser.add_argument('--requests', type=int, default=0, help="Stop each run after this many requests instead")
+    parser.add_argument('--warmup', type=float, default=2.0, help="Unrecorded seconds of load before the first run")
+    parser.add_argument('--mix', default=DEFAULT_MIX,
+                        help=f"Upload mix as kind:size=weight, txt sizes in words, pdf sizes in pages (default {DEFAULT_MIX})")
+    parser.add_argument('--corpus', type=int, default=16, help="Distinct resumes generated per mix entry")
+    parser.add_argument('--target-field', default='Software Development')
+    parser.add_argument('--cache', action='store_true', help="Leave the server's result cache on")
+    parser.add_argument('--asgi', action='store_true', help="Load the asyncio server instead of the Flask one")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Server worker processes")
+    parser.add_argument('--seed', default=SEED_PATH, help="Catalog for the database (.sql seed or .json)")
+    parser.add_argument('--db-latency', type=float, default=0.0,
+                        help="Seconds added to every fake database query, to mimic a remote database")
+    parser.add_argument('--database-url', help="Use this (local) Postgres instead of the fake database")
+    parser.add_argument('--seed-database', action='store_true', help="Load --seed into --database-url first")
+    parser.add_argument('--url', help="Load an already running server instead of starting one")
+    parser.add_argument('--startup-timeout', type=float, default=60.0)
+    parser.add_argument('--timeout', type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    args.concurrency = [int(value) for value in args.concurrency.split(',') if value.strip()]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    output = sys.stdout
+    sys.stdout = sys.stderr
+    mix = parse_mix(args.mix)
+
+    from catalog_loader import read_catalog
+    skills = [row[0] for row in read_catalog(args.seed)[0]]
+    corpus = build_corpus(mix, skills, args.corpus)
+    print("Corpus: " + ", ".join(f"{label} x{len(documents)} ({sum(len(d) for _, d in documents) // len(documents)} bytes)"
+                                 for label, documents in corpus.items()), file=sys.stderr)
+
+    if args.database_url and args.seed_database:
+        seed_database(args.database_url, args.seed)
+
+    process = None
+    state_dir = tempfile.mkdtemp(prefix='resume-loadtest-')
+    if args.url:
+        target = urllib.parse.urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        process, port, log_path = start_server(args, state_dir)
+        host = '127.0.0.1'
+        print(f"Server started on port {port} (log: {log_path})", file=sys.stderr)
+
+    runs = []
+    try:
+        if args.warmup:
+            drive(host, port, corpus, mix, max(args.concurrency), duration=args.warmup,
+                  target_field=args.target_field, timeout=args.timeout, seed=-1)
+        for concurrency in args.concurrency:
+            before = scrape_fallbacks(host, port)
+            records, elapsed = drive(host, port, corpus, mix, concurrency, duration=None if args.requests else args.duration,
+                                     max_requests=args.requests, target_field=args.target_field, timeout=args.timeout,
+                                     seed=concurrency)
+            run = summarize(records, elapsed, concurrency, before, scrape_fallbacks(host, port))
+            runs.append(run)
+            latency = run["latencyMs"]
+            print(f"concurrency {concurrency:>4}: {run['requestsPerSecond']} req/s, "
+                  f"p50 {latency['p50'] and round(latency['p50'], 1)} ms, p99 {latency['p99'] and round(latency['p99'], 1)} ms, "
+                  f"{run['requests'] - run['ok']} errors, fallbacks {run['fallbacks']}", file=sys.stderr)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    report = {
+        "format": LOADTEST_FORMAT,
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "server": args.url or ("asgi" if args.asgi else "wsgi"),
+            "workers": None if args.url else args.workers,
+            "database": None if args.url else ("url" if args.database_url else "fake"),
+            "dbLatencySeconds": None if args.url or args.database_url else args.db_latency,
+            "cache": args.cache,
+            "mix": args.mix
+        },
+        "runs": runs
+    }
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(body + "\n")
+    else:
+        output.write(body + "\n")
+        output.flush()
+    return 1 if any(run["ok"] < run["requests"] for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
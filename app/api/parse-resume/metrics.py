@@ -0,0 +1,252 @@
+import bisect
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond matching up to slow PDFs
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = tuple(1024 * 4 ** power for power in range(9))  # 1 KiB .. 64 MiB
+PAGES_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+# Under a preforking server each process writes its own snapshot here and
+# /metrics merges them, so a scrape sees every worker and not just the one
+# that answered
+METRICS_DIR = os.environ.get('PARSER_METRICS_DIR', '')
+METRICS_DUMP_INTERVAL = float(os.environ.get('PARSER_METRICS_DUMP_SECONDS', '1.0'))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    @staticmethod
+    def merge(into, samples):
+        for key, value in samples:
+            into[tuple(key)] = into.get(tuple(key), 0) + value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket counts (not cumulative) plus an overflow slot, sum and count
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        with self._lock:
+            return [[list(key), list(counts), total, count] for key, (counts, total, count) in self._values.items()]
+
+    @staticmethod
+    def merge(into, samples):
+        for key, counts, total, count in samples:
+            entry = into.get(tuple(key))
+            if entry is None:
+                into[tuple(key)] = [list(counts), total, count]
+            else:
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 9))
+    return str(value)
+
+
+class Registry:
+    """Process-local metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = []
+        self._last_dump = 0.0
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def reset(self):
+        """Forget every value, e.g. in a freshly forked worker."""
+        for metric in self._metrics:
+            metric.reset()
+
+    def snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def dump(self, directory=METRICS_DIR, force=False):
+        """Write this process's snapshot for other workers' /metrics, at most every METRICS_DUMP_INTERVAL."""
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_dump < METRICS_DUMP_INTERVAL:
+            return
+        self._last_dump = now
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.metrics.', dir=directory)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, separators=(',', ':'))
+            os.replace(tmp_path, os.path.join(directory, f"{os.getpid()}.json"))
+        except OSError as e:
+            print(f"Error writing metrics snapshot: {e}")
+
+    def _merged(self, directory):
+        """Values from this process plus the latest snapshot of every other one."""
+        snapshots = [self.snapshot()]
+        if directory:
+            own = os.path.join(directory, f"{os.getpid()}.json")
+            for path in glob.glob(os.path.join(directory, '*.json')):
+                if path == own:
+                    continue
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        merged = {}
+        for metric in self._metrics:
+            values = merged[metric.name] = {}
+            for snapshot in snapshots:
+                metric.merge(values, snapshot.get(metric.name, ()))
+        return merged
+
+    def render(self, directory=METRICS_DIR):
+        merged = self._merged(directory)
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for key, value in sorted(merged[metric.name].items()):
+                if metric.kind == 'counter':
+                    lines.append(f"{metric.name}{_format_labels(metric.labelnames, key)} {_format_value(value)}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets + ('+Inf',), counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(metric.labelnames, key, ('le', bound if bound == '+Inf' else _format_value(bound)))
+                    lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+                lines.append(f"{metric.name}_sum{_format_labels(metric.labelnames, key)} {_format_value(total)}")
+                lines.append(f"{metric.name}_count{_format_labels(metric.labelnames, key)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def clear_directory(directory=METRICS_DIR):
+    """Remove snapshots left by a previous server run."""
+    if not directory:
+        return
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+REGISTRY = Registry()
+
+# Stage timings of the request being served on this thread, for the
+# Server-Timing header; None when nobody asked for them
+_request_timings = threading.local()
+
+
+def start_request_timings():
+    _request_timings.stages = []
+
+
+def pop_request_timings():
+    stages = getattr(_request_timings, 'stages', None)
+    _request_timings.stages = None
+    return stages
+
+
+@contextmanager
+def track(histogram, **labels):
+    """Time a block into histogram and, when enabled, the current request's Server-Timing."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        histogram.observe(elapsed, **labels)
+        stages = getattr(_request_timings, 'stages', None)
+        if stages is not None:
+            stages.append(('-'.join(str(value) for value in labels.values()) or histogram.name, elapsed))
+
+
+def server_timing_header(stages, total=None):
+    """Format (name, seconds) pairs as a Server-Timing header value."""
+    parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in stages]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
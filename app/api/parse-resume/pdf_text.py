@@ -0,0 +1,150 @@
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+from ingest import DecompressionLimitExceeded, guard_decompression
+from startup import load_module
+
+# Pages past this limit are not extracted at all
+MAX_PAGES = int(os.environ.get('PARSER_PDF_MAX_PAGES', '50'))
+# Time budget per page, in seconds
+PAGE_TIMEOUT = float(os.environ.get('PARSER_PDF_PAGE_TIMEOUT', '2.0'))
+# Documents with at least this many pages are split across worker processes
+PARALLEL_MIN_PAGES = int(os.environ.get('PARSER_PDF_PARALLEL_MIN_PAGES', '16'))
+PARALLEL_WORKERS = int(os.environ.get('PARSER_PDF_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+_executor = None
+_executor_pid = None
+
+
+def _get_executor():
+    """Process pool for page-parallel extraction, created on first use in each process."""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        _executor = ProcessPoolExecutor(max_workers=PARALLEL_WORKERS, mp_context=multiprocessing.get_context('fork'))
+        _executor_pid = os.getpid()
+    return _executor
+
+
+def _reset_executor():
+    """Drop a pool whose workers may be stuck on a page that blew its budget.
+
+    Shutting the pool down only stops it taking new work; a worker still
+    inside a page would run on, so its processes are terminated first.
+    """
+    global _executor
+    if _executor is not None:
+        for process in list((_executor._processes or {}).values()):
+            process.terminate()
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _page_error(error):
+    """(reason, message) for a page that could not be extracted."""
+    reason = "decompression_limit" if isinstance(error, DecompressionLimitExceeded) else "error"
+    return reason, str(error)
+
+
+def _extract_page_range(pdf_bytes, first, last):
+    """Worker-side: extract pages [first, last) from the raw PDF bytes."""
+    PyPDF2 = load_module('PyPDF2')
+    guard_decompression()
+    reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    pages = []
+    for index in range(first, last):
+        try:
+            pages.append((index, reader.pages[index].extract_text() or "", None))
+        except Exception as e:
+            pages.append((index, None, _page_error(e)))
+    return pages
+
+
+def iter_pdf_pages(stream, max_pages=MAX_PAGES, page_timeout=PAGE_TIMEOUT,
+                   parallel_min_pages=PARALLEL_MIN_PAGES, workers=PARALLEL_WORKERS, report=None):
+    """Yield (page_number, text) for each extracted page, in page order.
+
+    Pages are produced as soon as they are extracted, so callers can start
+    on the first pages of a long document right away. Pages beyond
+    max_pages, pages that fail (including streams that would inflate past
+    the decompression limit), and pages that run past the time budget are
+    skipped. They are listed in report["skippedPages"] along with the total
+    and extracted page counts when a report dict is passed.
+    """
+    PyPDF2 = load_module('PyPDF2')
+    guard_decompression()
+    if report is None:
+        report = {}
+    stream.seek(0)
+    reader = PyPDF2.PdfReader(stream)
+    total = len(reader.pages)
+    limit = min(total, max_pages) if max_pages else total
+    skipped = [{"page": index + 1, "reason": "page_limit"} for index in range(limit, total)]
+    report.update({"pages": total, "extractedPages": 0, "skippedPages": skipped})
+
+    def emit(index, text, error):
+        if error is not None:
+            reason, message = error
+            print(f"Error extracting text from page {index + 1}: {message}")
+            skipped.append({"page": index + 1, "reason": reason})
+            return False
+        report["extractedPages"] += 1
+        return True
+
+    if workers > 1 and limit >= parallel_min_pages:
+        # Split the document into one contiguous range per worker; each
+        # worker re-opens the PDF from bytes, which is cheap next to the
+        # text extraction itself
+        stream.seek(0)
+        pdf_bytes = stream.read()
+        chunk = -(-limit // workers)
+        executor = _get_executor()
+        futures = [
+            (first, min(first + chunk, limit), executor.submit(_extract_page_range, pdf_bytes, first, min(first + chunk, limit)))
+            for first in range(0, limit, chunk)
+        ]
+        # The ranges run side by side, so the document gets one deadline
+        # from submission: the budget of its longest range. Once it passes,
+        # ranges that are done are still used and the rest time out
+        deadline = time.perf_counter() + page_timeout * chunk if page_timeout else None
+        timed_out = False
+        for first, last, future in futures:
+            try:
+                pages = future.result(timeout=max(0.0, deadline - time.perf_counter()) if deadline else None)
+            except FutureTimeoutError:
+                skipped.extend({"page": index + 1, "reason": "timeout"} for index in range(first, last))
+                timed_out = True
+                continue
+            except Exception as e:
+                skipped.extend({"page": index + 1, "reason": "error"} for index in range(first, last))
+                print(f"Error extracting pages {first + 1}-{last}: {e}")
+                continue
+            for index, text, error in pages:
+                if emit(index, text, error):
+                    yield index + 1, text
+        if timed_out:
+            _reset_executor()
+        skipped.sort(key=lambda entry: entry["page"])
+        return
+
+    # Serial path: a page can't be interrupted in-process, so the budget is
+    # shared by the whole document and later pages are skipped once it runs out
+    deadline = time.perf_counter() + page_timeout * limit if page_timeout else None
+    for index in range(limit):
+        if deadline is not None and time.perf_counter() > deadline:
+            skipped.extend({"page": i + 1, "reason": "timeout"} for i in range(index, limit))
+            break
+        try:
+            text, error = reader.pages[index].extract_text() or "", None
+        except Exception as e:
+            text, error = None, _page_error(e)
+        if emit(index, text, error):
+            yield index + 1, text
+    skipped.sort(key=lambda entry: entry["page"])
+
+
+def extract_pdf_text(stream, report=None, **options):
+    """Extract a PDF's text in one join over the streamed pages."""
+    return "".join(text + "\n" for _, text in iter_pdf_pages(stream, report=report, **options))
@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+# Bumped when the response format or extraction changes, so older cached results are not served
+RESULT_FORMAT = 4
+
+
+def cache_key(content_hash, catalog_version, target_field):
+    """Results depend on the file bytes, the catalog they were matched against and the target field."""
+    return f"{RESULT_FORMAT}:{content_hash}:{catalog_version}:{target_field}"
+
+
+class ResultCache:
+    """Two-tier cache of parse results keyed by content hash.
+
+    An in-memory LRU answers repeat uploads within a process, and an
+    optional SQLite file shared by every process on the box keeps results
+    across restarts, evicting least recently used rows once it grows past
+    max_disk_bytes. Concurrent requests for the same key share a single
+    computation. on_lookup, if given, is called with "hit", "disk_hit",
+    "miss" or "coalesced" for every get_or_compute.
+    """
+
+    def __init__(self, max_entries=1024, disk_path=None, max_disk_bytes=256 * 1024 * 1024, on_lookup=None):
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.disk_path = disk_path
+        self._db = None
+        self._db_pid = None
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._on_lookup = on_lookup or (lambda result: None)
+
+    def _disk(self):
+        """SQLite connection for this process, opened lazily so forked workers get their own."""
+        if not self.disk_path:
+            return None
+        if self._db_pid != os.getpid():
+            self._db_pid = os.getpid()
+            self._db = self._open_disk(self.disk_path)
+        return self._db
+
+    def _open_disk(self, path):
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            return db
+        except sqlite3.Error as e:
+            print(f"Result cache disk tier disabled: {e}")
+            return None
+
+    def _memory_get(self, key):
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+            return value
+
+    def _memory_put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_get(self, key):
+        try:
+            with self._db_lock:
+                db = self._disk()
+                if db is None:
+                    return None
+                row = db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            print(f"Result cache read error: {e}")
+            return None
+
+    def _disk_put(self, key, value):
+        if not self.disk_path:
+            return
+        payload = json.dumps(value, separators=(',', ':'))
+        try:
+            with self._db_lock:
+                db = self._disk()
+                if db is None:
+                    return
+                db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, payload, len(payload), time.time())
+                )
+                self._evict_disk(db)
+        except sqlite3.Error as e:
+            print(f"Result cache write error: {e}")
+
+    def _evict_disk(self, db):
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        # Drop the least recently used rows until we are back under 90% of the cap
+        excess = total - int(self.max_disk_bytes * 0.9)
+        freed = 0
+        stale = []
+        for key, size in db.execute("SELECT key, size FROM results ORDER BY accessed"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        db.executemany("DELETE FROM results WHERE key = ?", stale)
+
+    def get(self, key):
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        value = self._disk_get(key)
+        if value is not None:
+            self._memory_put(key, value)
+        return value
+
+    def put(self, key, value):
+        self._memory_put(key, value)
+        self._disk_put(key, value)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing it at most once across concurrent callers."""
+        value = self._memory_get(key)
+        if value is not None:
+            self.hits += 1
+            self._on_lookup("hit")
+            return value
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+
+        if not owner:
+            # Someone is already parsing the same bytes; wait for their result
+            self.coalesced += 1
+            self._on_lookup("coalesced")
+            return future.result()
+
+        try:
+            value = self._disk_get(key)
+            if value is not None:
+                self.disk_hits += 1
+                self._on_lookup("disk_hit")
+                self._memory_put(key, value)
+            else:
+                self.misses += 1
+                self._on_lookup("miss")
+                value = compute()
+                self.put(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "diskHits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "entries": len(self._memory)
+        }
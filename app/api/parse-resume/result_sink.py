@@ -0,0 +1,305 @@
+import csv
+import io
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+# Columns written per parse, in COPY order
+RESULT_COLUMNS = ('content_hash', 'target_field', 'catalog_version', 'skills', 'experience_level', 'score',
+                  'likely_field', 'recommended_skills', 'uploads', 'parsed_at')
+RESULT_KEY = ('content_hash', 'target_field', 'catalog_version')
+
+# Rows per INSERT statement with method="values"
+VALUES_PAGE_SIZE = 1000
+
+
+def result_record(response, target_field):
+    """The row persisted for one parsed upload; contact details are left out."""
+    return (
+        response["contentHash"],
+        target_field,
+        response["catalogVersion"],
+        json.dumps(response["skills"]),
+        response["experienceLevel"],
+        response["score"],
+        response["likelyField"],
+        json.dumps(response["recommendedSkills"]),
+        1,
+        datetime.now(timezone.utc).isoformat()
+    )
+
+
+def merge_records(records):
+    """Collapse rows for the same upload, field and catalog into one, summing uploads.
+
+    A single INSERT ... ON CONFLICT can't touch the same row twice.
+    """
+    merged = {}
+    key_size = len(RESULT_KEY)
+    uploads = RESULT_COLUMNS.index('uploads')
+    for record in records:
+        key = record[:key_size]
+        previous = merged.get(key)
+        if previous is not None:
+            record = record[:uploads] + (previous[uploads] + record[uploads],) + record[uploads + 1:]
+        merged[key] = record
+    return list(merged.values())
+
+
+def ensure_results_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS parse_results (
+            content_hash CHAR(64) NOT NULL,
+            target_field VARCHAR(100) NOT NULL,
+            catalog_version VARCHAR(32) NOT NULL,
+            skills JSONB NOT NULL,
+            experience_level VARCHAR(20),
+            score INTEGER,
+            likely_field VARCHAR(100),
+            recommended_skills JSONB,
+            uploads INTEGER NOT NULL DEFAULT 1,
+            parsed_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            first_parsed_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (content_hash, target_field, catalog_version)
+        )
+    """)
+
+
+# Repeat uploads count up instead of adding rows
+UPSERT_ACTION = (f"ON CONFLICT ({', '.join(RESULT_KEY)}) DO UPDATE SET "
+                 "uploads = parse_results.uploads + EXCLUDED.uploads, parsed_at = EXCLUDED.parsed_at")
+
+
+def _write_values(cursor, rows):
+    """Multi-row INSERT ... ON CONFLICT, VALUES_PAGE_SIZE rows per statement."""
+    placeholder = '(' + ', '.join(['%s'] * len(RESULT_COLUMNS)) + ')'
+    for start in range(0, len(rows), VALUES_PAGE_SIZE):
+        page = rows[start:start + VALUES_PAGE_SIZE]
+        cursor.execute(
+            f"INSERT INTO parse_results ({', '.join(RESULT_COLUMNS)}) VALUES {', '.join([placeholder] * len(page))} "
+            + UPSERT_ACTION,
+            [value for row in page for value in row]
+        )
+
+
+def _write_copy(cursor, rows):
+    """COPY the rows into a temporary staging table, then upsert them in one statement."""
+    columns = ', '.join(RESULT_COLUMNS)
+    cursor.execute(f"CREATE TEMP TABLE parse_results_stage ON COMMIT DROP AS SELECT {columns} FROM parse_results WITH NO DATA")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['' if value is None else value for value in row])
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY parse_results_stage ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    cursor.execute(f"INSERT INTO parse_results ({columns}) SELECT {columns} FROM parse_results_stage " + UPSERT_ACTION)
+
+
+def write_results(conn, rows, method='copy', ensure_table=True):
+    """Upsert a batch of result_record rows in one transaction, creating the table first if ensure_table."""
+    cursor = conn.cursor()
+    try:
+        if ensure_table:
+            ensure_results_table(cursor)
+        (_write_copy if method == 'copy' else _write_values)(cursor, merge_records(rows))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+class ResultSink:
+    """Write-behind persistence of parse results.
+
+    put() queues a row and returns straight away; a background thread,
+    started on first use in each process, writes queued rows in batches of
+    up to batch_size, at the latest flush_interval seconds after the first
+    row of a batch arrived. Each batch is one transaction from
+    get_connection()/release(conn, broken) (None while the database is
+    unavailable), so a burst of uploads costs a handful of round trips.
+    The table is created by the first batch written; after a failed batch
+    the next one checks for it again.
+
+    The queue holds at most max_queued rows. When the database falls that
+    far behind, put() blocks for up to put_timeout (backpressure) and then
+    drops the row. A batch that can't be written is retried, backing off up
+    to retry_max seconds, while the queue fills. close() stops taking rows,
+    writes out everything queued and gives up on a batch that still fails.
+
+    on_write(rows, seconds) and on_drop(reason, rows) are optional hooks
+    for metrics.
+    """
+
+    def __init__(self, get_connection, release, batch_size=500, flush_interval=1.0, max_queued=10000,
+                 put_timeout=1.0, method='copy', retry_max=30.0, on_write=None, on_drop=None):
+        self.get_connection = get_connection
+        self.release = release
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queued = max_queued
+        self.put_timeout = put_timeout
+        self.method = method
+        self.retry_max = retry_max
+        self._on_write = on_write or (lambda rows, seconds: None)
+        self._on_drop = on_drop or (lambda reason, rows: None)
+        self._reset_state()
+
+    def _reset_state(self):
+        self._queue = queue.Queue(self.max_queued)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = os.getpid()
+        self._closed = False
+        self._table_ready = False
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.last_error = None
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            # Forked: the parent's queue and thread are not ours
+            self._reset_state()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="result-sink", daemon=True)
+            self._thread.start()
+
+    def put(self, record, timeout=None):
+        """Queue a row; False if it was dropped (sink closed, or still full after the timeout)."""
+        with self._lock:
+            if self._closed:
+                return False
+            self._ensure_thread()
+        try:
+            self._queue.put(record, timeout=self.put_timeout if timeout is None else timeout)
+            return True
+        except queue.Full:
+            if timeout != 0:
+                self.dropped += 1
+                self._on_drop("queue_full", 1)
+            return False
+
+    def flush(self, timeout=None):
+        """Wait until every row queued before the call has been written (or given up on)."""
+        with self._lock:
+            if self._closed or self._thread is None or self._pid != os.getpid():
+                return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Stop taking rows and write out what is queued; False if that didn't finish in time."""
+        with self._lock:
+            if self._closed or self._pid != os.getpid():
+                return True
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return True
+        self._stopping.set()
+        try:
+            # Wake the thread if it is waiting for rows
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "lastError": self.last_error
+        }
+
+    # Background thread
+
+    def _write(self, batch):
+        """Write one batch; False if it should be retried."""
+        conn = self.get_connection()
+        if conn is None:
+            self.last_error = "database unavailable"
+            return False
+        failed = False
+        started = time.perf_counter()
+        try:
+            write_results(conn, batch, self.method, ensure_table=not self._table_ready)
+        except Exception as e:
+            print(f"Error writing parse results: {e}")
+            self.last_error = str(e)
+            self._table_ready = False
+            failed = True
+            return False
+        finally:
+            self.release(conn, failed)
+        self._table_ready = True
+        self._on_write(len(batch), time.perf_counter() - started)
+        self.written += len(batch)
+        self.batches += 1
+        return True
+
+    def _run(self):
+        batch = []
+        waiters = []
+        deadline = None
+        failures = 0
+        while True:
+            stopping = self._stopping.is_set()
+            if stopping:
+                timeout = 0
+            elif batch:
+                timeout = max(0.0, deadline - time.monotonic())
+            else:
+                timeout = None
+            try:
+                item = self._queue.get(timeout=timeout) if timeout != 0 else self._queue.get_nowait()
+            except queue.Empty:
+                item = None
+                drained = True
+            else:
+                drained = False
+
+            if isinstance(item, threading.Event):
+                waiters.append(item)
+            elif item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            # A flush() marker comes after every row queued before it, so those are all in the batch
+            due = (len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline)
+                   or waiters or (stopping and drained))
+            if not due:
+                continue
+
+            while batch and not self._write(batch):
+                failures += 1
+                if stopping:
+                    print(f"Dropping {len(batch)} parse results at shutdown: {self.last_error}")
+                    self.dropped += len(batch)
+                    self._on_drop("write_failed", len(batch))
+                    break
+                # Let the queue fill (and push back on put) while the database recovers
+                delay = min(self.retry_max, 0.5 * 2 ** min(failures, 10))
+                if self._stopping.wait(delay):
+                    stopping = True
+            else:
+                failures = 0
+            batch = []
+            for waiter in waiters:
+                waiter.set()
+            waiters = []
+            if stopping and drained:
+                return
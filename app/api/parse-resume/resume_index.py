@@ -0,0 +1,341 @@
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import Counter
+
+from startup import load_module
+
+# BM25 parameters: term-frequency saturation and document-length normalization
+K1 = 1.2
+B = 0.75
+
+# A skill matched by the parser counts like this many mentions of a word
+SKILL_WEIGHT = 3
+SKILL_PREFIX = "skill:"
+
+# Freeze in-memory additions into an array segment once they hold this many
+# postings, and compact everything once this share of documents is deleted
+FLUSH_POSTINGS = 200000
+COMPACT_DEAD_RATIO = 0.2
+
+FORMAT_VERSION = 1
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*')
+HAS_LETTER = re.compile(r'[a-z]')
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between
+both but by can could did do does doing down during each etc few for from further had has have having he
+her here hers him his how i if in into is it its itself just me more most my no nor not now of off on once
+only or other our ours out over own per same she should so some such than that the their theirs them then
+there these they this those through to too under until up us very via was we were what when where which
+while who whom why will with within would you your yours
+""".split())
+
+
+def tokenize(text):
+    """Lowercased word tokens, keeping tech spellings like c++, c# and node.js whole."""
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS and HAS_LETTER.search(token)
+    ]
+
+
+def document_terms(text, skills=()):
+    """Term frequencies of a resume or job description: its words plus its matched skills."""
+    terms = Counter(tokenize(text))
+    for skill in set(skill.lower() for skill in skills):
+        terms[SKILL_PREFIX + skill] += SKILL_WEIGHT
+    return terms
+
+
+class _Segment:
+    """Immutable postings in CSR form: term -> slice of document numbers and frequencies."""
+
+    __slots__ = ('terms', 'term_ptr', 'docs', 'tfs')
+
+    def __init__(self, terms, term_ptr, docs, tfs):
+        self.terms = terms  # {term: number}, in number order
+        self.term_ptr = term_ptr
+        self.docs = docs
+        self.tfs = tfs
+
+    def __len__(self):
+        return len(self.docs)
+
+    def postings(self, term):
+        number = self.terms.get(term)
+        if number is None:
+            return None
+        start, end = self.term_ptr[number], self.term_ptr[number + 1]
+        return self.docs[start:end], self.tfs[start:end]
+
+
+def _merge(np, segments, delta, renumber):
+    """One segment holding the postings of segments plus the delta dict.
+
+    renumber maps old document numbers to new ones, -1 dropping the document.
+    """
+    term_of = {}
+    term_parts, doc_parts, tf_parts = [], [], []
+    for segment in segments:
+        mapping = np.fromiter((term_of.setdefault(term, len(term_of)) for term in segment.terms),
+                              dtype=np.int64, count=len(segment.terms))
+        term_parts.append(np.repeat(mapping, np.diff(segment.term_ptr)))
+        doc_parts.append(segment.docs.astype(np.int64))
+        tf_parts.append(segment.tfs)
+    for term, postings in delta.items():
+        term_parts.append(np.full(len(postings), term_of.setdefault(term, len(term_of)), dtype=np.int64))
+        doc_parts.append(np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)))
+        tf_parts.append(np.fromiter(postings.values(), dtype=np.float32, count=len(postings)))
+    terms = np.concatenate(term_parts) if term_parts else np.zeros(0, dtype=np.int64)
+    docs = np.concatenate(doc_parts) if doc_parts else np.zeros(0, dtype=np.int64)
+    tfs = np.concatenate(tf_parts) if tf_parts else np.zeros(0, dtype=np.float32)
+
+    docs = renumber[docs]
+    keep = docs >= 0
+    terms, docs, tfs = terms[keep], docs[keep], tfs[keep]
+    order = np.lexsort((docs, terms))
+    terms, docs, tfs = terms[order], docs[order], tfs[order]
+
+    # Drop terms that only dropped documents used
+    used = np.bincount(terms, minlength=len(term_of)) > 0
+    new_number = np.cumsum(used) - 1
+    names = list(term_of)
+    kept = {names[index]: int(new_number[index]) for index in np.flatnonzero(used)}
+    counts = np.bincount(new_number[terms], minlength=len(kept))
+    term_ptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    return _Segment(kept, term_ptr, docs.astype(np.int32), tfs.astype(np.float32))
+
+
+class ResumeIndex:
+    """BM25 top-k search over parsed resumes, with incremental add and delete.
+
+    Postings live in numpy CSR segments (term -> slice of document numbers
+    and term frequencies), so a query scores a term's whole posting list in
+    one vectorized step. New documents go to a dict of postings that is
+    frozen into a segment every FLUSH_POSTINGS postings; a segment as big
+    as the one before it is merged into it, so adding n
+    documents costs O(n log n) and a query only visits a handful of
+    segments. A delete clears the document's live flag, and the postings go
+    at the next merge. save() compacts everything into one segment and
+    writes it to an .npz file that load() reads straight back, so nothing
+    is re-tokenized at startup.
+
+    Document frequencies count deleted documents until their postings are
+    merged away, which shifts scores slightly but never the live set.
+    """
+
+    def __init__(self, k1=K1, b=B):
+        self.k1 = k1
+        self.b = b
+        self._np = load_module('numpy')
+        self._lock = threading.RLock()
+        np = self._np
+        self._segments = []
+        # Postings added since the last flush: {term: {doc: tf}}
+        self._delta = {}
+        self._delta_postings = 0
+        # Documents by number
+        self._ids = []
+        self._meta = []
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._numbers = {}
+        self._total_length = 0.0
+        self._dead = 0
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._numbers
+
+    def _reserve(self, count):
+        """Grow the per-document arrays geometrically so adds stay amortized O(1)."""
+        np = self._np
+        if count <= len(self._lengths):
+            return
+        capacity = max(count, 2 * len(self._lengths), 1024)
+        lengths = np.zeros(capacity, dtype=np.float32)
+        lengths[:len(self._lengths)] = self._lengths
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self._alive)] = self._alive
+        self._lengths, self._alive = lengths, alive
+
+    def add(self, doc_id, text, skills=(), meta=None):
+        """Index a resume's text and skills under doc_id, replacing any earlier version."""
+        self.add_terms(doc_id, document_terms(text, skills), meta)
+
+    def add_terms(self, doc_id, terms, meta=None):
+        """Index precomputed document_terms(), e.g. tokenized in another process."""
+        with self._lock:
+            self.delete(doc_id)
+            number = len(self._ids)
+            self._reserve(number + 1)
+            self._ids.append(doc_id)
+            self._meta.append(meta)
+            self._numbers[doc_id] = number
+            length = float(sum(terms.values()))
+            self._lengths[number] = length
+            self._alive[number] = True
+            self._total_length += length
+            for term, tf in terms.items():
+                self._delta.setdefault(term, {})[number] = tf
+            self._delta_postings += len(terms)
+            if self._delta_postings >= FLUSH_POSTINGS:
+                self.flush()
+
+    def delete(self, doc_id):
+        """Remove doc_id from results; returns False if it was not indexed."""
+        with self._lock:
+            number = self._numbers.pop(doc_id, None)
+            if number is None:
+                return False
+            self._alive[number] = False
+            self._total_length -= float(self._lengths[number])
+            self._meta[number] = None
+            self._dead += 1
+            if self._dead >= COMPACT_DEAD_RATIO * len(self._ids) and len(self._ids) >= 1000:
+                self.compact()
+            return True
+
+    def _keep_live(self):
+        """Renumbering that keeps document numbers and drops deleted documents."""
+        np = self._np
+        count = len(self._ids)
+        renumber = np.arange(count, dtype=np.int64)
+        renumber[~self._alive[:count]] = -1
+        return renumber
+
+    def flush(self):
+        """Freeze pending additions into a segment, merging it down while it is as big as the one before."""
+        np = self._np
+        with self._lock:
+            if self._delta:
+                self._segments.append(_merge(np, [], self._delta, self._keep_live()))
+                self._delta = {}
+                self._delta_postings = 0
+            while len(self._segments) > 1 and len(self._segments[-1]) >= len(self._segments[-2]):
+                last = self._segments.pop()
+                self._segments[-1] = _merge(np, [self._segments[-1], last], {}, self._keep_live())
+
+    def compact(self):
+        """Merge everything into one segment and renumber documents without the deleted ones."""
+        np = self._np
+        with self._lock:
+            count = len(self._ids)
+            alive = self._alive[:count]
+            renumber = np.cumsum(alive, dtype=np.int64) - 1
+            renumber[~alive] = -1
+            segment = _merge(np, self._segments, self._delta, renumber)
+            self._segments = [segment] if len(segment) else []
+            self._delta = {}
+            self._delta_postings = 0
+
+            survivors = np.flatnonzero(alive)
+            self._ids = [self._ids[index] for index in survivors]
+            self._meta = [self._meta[index] for index in survivors]
+            self._numbers = {doc_id: number for number, doc_id in enumerate(self._ids)}
+            self._lengths = self._lengths[survivors].copy()
+            self._alive = np.ones(len(survivors), dtype=bool)
+            self._dead = 0
+
+    def search(self, text, skills=(), k=10):
+        """The k best-matching live resumes for a job description, as [{"id", "score", "meta"}]."""
+        return self.search_terms(document_terms(text, skills), k)
+
+    def search_terms(self, query_terms, k=10):
+        np = self._np
+        with self._lock:
+            live = len(self._numbers)
+            if not live or not query_terms or k <= 0:
+                return []
+            count = len(self._ids)
+            average_length = self._total_length / live or 1.0
+            # Per-document BM25 length normalization, shared by every query term
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[:count] / average_length)
+            scores = np.zeros(count, dtype=np.float32)
+
+            for term, query_weight in query_terms.items():
+                postings = [found for found in (segment.postings(term) for segment in self._segments) if found]
+                delta = self._delta.get(term)
+                if delta:
+                    postings.append((np.fromiter(delta.keys(), dtype=np.int64, count=len(delta)),
+                                     np.fromiter(delta.values(), dtype=np.float32, count=len(delta))))
+                frequency = sum(len(docs) for docs, _ in postings)
+                if not frequency:
+                    continue
+                idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+                weight = query_weight * idf * (self.k1 + 1)
+                for docs, tfs in postings:
+                    # A document appears once per posting list, so += is safe
+                    scores[docs] += weight * tfs / (tfs + norm[docs])
+
+            scores[~self._alive[:count]] = 0
+            k = min(k, count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [
+                {"id": self._ids[number], "score": round(float(scores[number]), 4), "meta": self._meta[number]}
+                for number in top if scores[number] > 0
+            ]
+
+    def save(self, path):
+        """Compact and atomically write the index to path (.npz)."""
+        np = self._np
+        with self._lock:
+            self.compact()
+            segment = self._segments[0] if self._segments else _merge(np, [], {}, np.zeros(0, dtype=np.int64))
+            header = json.dumps({
+                "version": FORMAT_VERSION,
+                "k1": self.k1,
+                "b": self.b,
+                "terms": list(segment.terms),
+                "ids": self._ids,
+                "meta": self._meta
+            }).encode('utf-8')
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix='.resume_index.', dir=directory or '.')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.savez(f, header=np.frombuffer(header, dtype=np.uint8), term_ptr=segment.term_ptr,
+                             docs=segment.docs, tfs=segment.tfs, lengths=self._lengths)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save(); raises ValueError for another format version."""
+        np = load_module('numpy')
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(data["header"].tobytes().decode('utf-8'))
+            if header.get("version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported resume index version {header.get('version')}")
+            index = cls(header["k1"], header["b"])
+            terms = {term: number for number, term in enumerate(header["terms"])}
+            segment = _Segment(terms, data["term_ptr"], data["docs"], data["tfs"])
+            index._lengths = data["lengths"]
+        index._segments = [segment] if len(segment) else []
+        index._ids = header["ids"]
+        index._meta = header["meta"]
+        index._numbers = {doc_id: number for number, doc_id in enumerate(index._ids)}
+        index._alive = np.ones(len(index._ids), dtype=bool)
+        index._total_length = float(index._lengths.sum(dtype=np.float64))
+        return index
+
+    def stats(self):
+        return {
+            "documents": len(self._numbers),
+            "segments": len(self._segments),
+            "postings": sum(len(segment) for segment in self._segments) + self._delta_postings,
+            "pendingPostings": self._delta_postings,
+            "deleted": self._dead
+        }
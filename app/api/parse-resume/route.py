@@ -1,24 +1,59 @@
 import os
+import io
+import atexit
 import json
+import hashlib
+import argparse
+import contextlib
 import re
-import PyPDF2
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from sklearn.feature_extraction.text import CountVectorizer
-from flask import Flask, request, jsonify
-import psycopg2
-from psycopg2 import pool
+from flask import Flask, Response, request, jsonify, g
 import time
 import sys
+import shutil
+import tempfile
+import threading
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
-# Download NLTK data
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('averaged_perceptron_tagger')
+# NLTK, scikit-learn, PyPDF2 and psycopg2 are imported lazily through
+# startup.load_module so the worker and CLI modes start fast and offline
+from startup import load_module
+from catalog import FIELD_CATEGORIES, SkillCatalog, load_snapshot, save_snapshot
+from result_cache import ResultCache, cache_key
+from pdf_text import extract_pdf_text
+from document import as_document
+from sections import heading_name
+from db_pool import ManagedPool
+from async_db import AsyncPool
+from async_http import AsyncApp, json_response
+from catalog_loader import CATALOG_CHANNEL, COLUMNS_QUERY, columns_from_rows, detect_columns
+from resume_index import ResumeIndex, document_terms
+from result_sink import ResultSink, result_record
+from ingest import (MAX_UPLOAD_BYTES, MAX_INFLIGHT_BYTES, INFLIGHT_WAIT_SECONDS, ByteBudget, MemoryPressure,
+                    UploadTooLarge, check_memory, mapped, memory_report, shared_path, upload_size)
+from metrics import REGISTRY, BYTES_BUCKETS, PAGES_BUCKETS, track, start_request_timings, pop_request_timings, server_timing_header
 
 app = Flask(__name__)
 
+# Prometheus metrics, served at /metrics
+STAGE_SECONDS = REGISTRY.histogram('resume_parser_stage_seconds', "Time spent in each parsing stage", ['stage'])
+DB_SECONDS = REGISTRY.histogram('resume_parser_db_seconds', "Time spent connecting, checking out connections and querying", ['operation'])
+REQUEST_SECONDS = REGISTRY.histogram('resume_parser_request_seconds', "Time to build each HTTP response", ['endpoint', 'status'])
+DB_BREAKER = REGISTRY.counter('resume_parser_db_breaker_transitions_total', "Database circuit breaker state changes", ['state'])
+FALLBACKS = REGISTRY.counter('resume_parser_fallback_total', "Times built-in data was used instead of the real thing", ['kind'])
+CACHE_LOOKUPS = REGISTRY.counter('resume_parser_cache_lookups_total', "Result cache lookups by outcome", ['result'])
+UPLOAD_BYTES = REGISTRY.histogram('resume_parser_upload_bytes', "Size of parsed uploads", buckets=BYTES_BUCKETS)
+PDF_PAGES = REGISTRY.histogram('resume_parser_pdf_pages', "Pages per parsed PDF", buckets=PAGES_BUCKETS)
+CATALOG_RELOADS = REGISTRY.counter('resume_parser_catalog_reloads_total', "Catalog swaps by what noticed the change", ['trigger'])
+RSS_GROWTH = REGISTRY.histogram('resume_parser_rss_growth_bytes', "Resident memory added while parsing one upload", buckets=BYTES_BUCKETS)
+UPLOADS_REFUSED = REGISTRY.counter('resume_parser_uploads_refused_total', "Uploads turned away to protect worker memory", ['reason'])
+PDF_SKIPPED_PAGES = REGISTRY.counter('resume_parser_pdf_skipped_pages_total', "PDF pages not extracted", ['reason'])
+RESULTS_PERSISTED = REGISTRY.counter('resume_parser_results_persisted_total', "Parse results written to or dropped before the database", ['outcome'])
+
+# Set PARSER_TIMING_HEADERS=1 to add a Server-Timing header with per-stage latencies
+TIMING_HEADERS = os.environ.get('PARSER_TIMING_HEADERS', '0') == '1'
+
 # Database connection parameters
 DB_CONFIG = {
     "user": "postgres.xciyawumdtwyydelhclv",
@@ -28,58 +63,57 @@ DB_CONFIG = {
     "dbname": "postgres"
 }
 
-# Global variable to track if we've attempted connection
-db_connection_attempted = False
-connection_pool = None
+# Set PARSER_DATABASE_URL to use another Postgres instead, e.g. a local one for testing
+DATABASE_URL = os.environ.get('PARSER_DATABASE_URL', '')
 
-# Function to initialize the connection pool with retry
-def initialize_connection_pool(max_retries=2):
-    global connection_pool, db_connection_attempted
-    
-    # If we've already attempted the connection, don't try again
-    if db_connection_attempted:
-        return False
-    
-    db_connection_attempted = True
-    
-    for attempt in range(max_retries):
-        try:
-            print(f"Attempting database connection (attempt {attempt+1}/{max_retries})...")
-            connection_pool = psycopg2.pool.SimpleConnectionPool(
-                1, 5,  # Min and max connections
-                user=DB_CONFIG["user"],
-                password=DB_CONFIG["password"],
-                host=DB_CONFIG["host"],
-                port=DB_CONFIG["port"],
-                dbname=DB_CONFIG["dbname"],
-                connect_timeout=5  # Timeout after 5 seconds
-            )
-            print("Database connection successful!")
-            return True
-        except Exception as e:
-            print(f"Database connection failed: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(1)  # Wait a second before retrying
-    
-    print("All connection attempts failed. Using fallback data.")
-    return False
+# Connection pool limits; queries running past the statement timeout are cancelled
+DB_POOL_MAX = int(os.environ.get('PARSER_DB_POOL_MAX', '5'))
+DB_CONNECT_TIMEOUT = int(os.environ.get('PARSER_DB_CONNECT_TIMEOUT', '5'))
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('PARSER_DB_STATEMENT_TIMEOUT_MS', '5000'))
+DB_CHECKOUT_TIMEOUT = float(os.environ.get('PARSER_DB_CHECKOUT_TIMEOUT', '2'))
+# Consecutive failures before the breaker opens, and the longest wait between reconnects
+DB_FAILURE_THRESHOLD = int(os.environ.get('PARSER_DB_FAILURE_THRESHOLD', '3'))
+DB_BACKOFF_MAX = float(os.environ.get('PARSER_DB_BACKOFF_MAX_SECONDS', '60'))
+
+def db_connect_kwargs():
+    """Keyword arguments for psycopg2.connect."""
+    if DATABASE_URL:
+        return {"dsn": DATABASE_URL, "connect_timeout": DB_CONNECT_TIMEOUT}
+    return dict(DB_CONFIG, connect_timeout=DB_CONNECT_TIMEOUT)
+
+DB_POOL = ManagedPool(
+    db_connect_kwargs(),
+    maxconn=DB_POOL_MAX,
+    statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS,
+    checkout_timeout=DB_CHECKOUT_TIMEOUT,
+    failure_threshold=DB_FAILURE_THRESHOLD,
+    backoff_max=DB_BACKOFF_MAX,
+    observe=lambda operation, seconds: DB_SECONDS.observe(seconds, operation=operation),
+    on_state=lambda state: DB_BREAKER.inc(state=state)
+)
+
+# The same limits for the asyncio server's non-blocking connections
+ASYNC_DB_POOL = AsyncPool(
+    db_connect_kwargs(),
+    maxconn=DB_POOL_MAX,
+    statement_timeout_ms=DB_STATEMENT_TIMEOUT_MS,
+    checkout_timeout=DB_CHECKOUT_TIMEOUT,
+    failure_threshold=DB_FAILURE_THRESHOLD,
+    backoff_max=DB_BACKOFF_MAX,
+    observe=lambda operation, seconds: DB_SECONDS.observe(seconds, operation=operation),
+    on_state=lambda state: DB_BREAKER.inc(state=state)
+)
 
-# Function to get a connection from the pool
+# Function to get a connection from the pool (None while the database is unavailable)
 def get_connection():
-    if connection_pool:
-        try:
-            return connection_pool.getconn()
-        except Exception as e:
-            print(f"Error getting connection from pool: {e}")
-    return None
+    conn = DB_POOL.getconn()
+    if conn is None:
+        FALLBACKS.inc(kind="db_unavailable")
+    return conn
 
-# Function to return a connection to the pool
-def return_connection(conn):
-    if connection_pool and conn:
-        try:
-            connection_pool.putconn(conn)
-        except Exception as e:
-            print(f"Error returning connection to pool: {e}")
+# Function to return a connection to the pool; broken ones are discarded
+def return_connection(conn, broken=False):
+    DB_POOL.putconn(conn, broken)
 
 # Common skills by category (used as fallback if DB fails)
 SKILLS = {
@@ -107,10 +141,50 @@ SKILLS = {
     ]
 }
 
+# Column names of the catalog tables (name or skill_name, ...), detected on first use
+DB_COLUMNS = None
+
+def catalog_columns(cursor):
+    if DB_COLUMNS is not None:
+        return DB_COLUMNS
+    return remember_columns(detect_columns(cursor))
+
+def remember_columns(columns):
+    global DB_COLUMNS
+    # Only remember the layout once both tables exist
+    if columns["skills"] and columns["recommended_skills"]:
+        DB_COLUMNS = columns
+    return columns
+
+def skills_query(columns):
+    return f"""
+        SELECT 
+            {columns["category"]},
+            array_agg({columns["skill"]}) as skills
+        FROM 
+            skills
+        GROUP BY 
+            {columns["category"]}
+    """
+
+def recommendations_query(columns):
+    # Load the whole table once; ranking happens in memory per request
+    return f"""
+        SELECT field, {columns["recommendedSkill"]}, {columns["priority"]}
+        FROM recommended_skills
+    """
+
+def recommendations_from_rows(rows):
+    recommendations = {}
+    for field, skill, priority in rows:
+        recommendations.setdefault(field, []).append([skill, priority])
+    return recommendations
+
 # Function to fetch skills from the database
 def fetch_skills_from_db():
     skills_by_category = {}
     conn = None
+    failed = False
     try:
         conn = get_connection()
         if not conn:
@@ -119,37 +193,18 @@ def fetch_skills_from_db():
             
         cursor = conn.cursor()
         
-        # First, check if the skills table exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'public'
-                AND table_name = 'skills'
-            );
-        """)
-        
-        if not cursor.fetchone()[0]:
+        # First, check the skills table exists and how its columns are named
+        columns = catalog_columns(cursor)
+        if not columns["skills"]:
             print("Skills table does not exist. Using fallback data.")
             return SKILLS
         
-        # Use the column names that we verified exist in the database
-        skill_column = 'name'
-        category_column = 'category'
-        
         # Query to fetch skills from database using correct column names
-        query = f"""
-            SELECT 
-                {category_column},
-                array_agg({skill_column}) as skills
-            FROM 
-                skills
-            GROUP BY 
-                {category_column}
-        """
-        
-        cursor.execute(query)
+        with track(DB_SECONDS, operation="skills_query"):
+            cursor.execute(skills_query(columns))
+            rows = cursor.fetchall()
         
-        for category, skills in cursor.fetchall():
+        for category, skills in rows:
             skills_by_category[category] = skills
             
         cursor.close()
@@ -161,98 +216,336 @@ def fetch_skills_from_db():
         return skills_by_category
     except Exception as e:
         print(f"Database error: {e}")
+        failed = True
         return SKILLS
     finally:
         if conn:
-            return_connection(conn)
+            return_connection(conn, failed)
 
-# Function to fetch recommended skills from the database
-def fetch_recommended_skills(field, existing_skills):
+# Function to fetch every recommended skill from the database, grouped by field
+def fetch_recommendations_from_db():
     conn = None
+    failed = False
     try:
         conn = get_connection()
         if not conn:
             print("No database connection available. Using fallback recommendations.")
-            return recommend_skills_default(existing_skills, field)
+            return None
             
         cursor = conn.cursor()
         
         # Check if the recommended_skills table exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'public'
-                AND table_name = 'recommended_skills'
-            );
-        """)
-        
-        if not cursor.fetchone()[0]:
+        columns = catalog_columns(cursor)
+        if not columns["recommended_skills"]:
             print("Recommended skills table does not exist. Using fallback data.")
-            return recommend_skills_default(existing_skills, field)
-        
-        # Use the column names we verified exist in the table
-        skill_column = 'name'  # This is what we created in the setup script
-        priority_column = 'priority'
-        
-        # Convert existing skills to a format safe for SQL
-        params = [field]
-        
-        # Build the WHERE NOT IN clause if we have existing skills
-        where_clause = ""
-        if existing_skills:
-            placeholders = ', '.join(['%s'] * len(existing_skills))
-            where_clause = f"AND {skill_column} NOT IN ({placeholders})"
-            params.extend(existing_skills)
-        
-        # Query to fetch recommended skills based on field
-        query = f"""
-            SELECT {skill_column}
-            FROM recommended_skills
-            WHERE field = %s
-            {where_clause}
-            ORDER BY {priority_column} DESC NULLS LAST
-            LIMIT 7
-        """
-        
-        # Execute the query
-        cursor.execute(query, params)
+            return None
         
-        recommended = [skill[0] for skill in cursor.fetchall()]
+        with track(DB_SECONDS, operation="recommendations_query"):
+            cursor.execute(recommendations_query(columns))
+            rows = cursor.fetchall()
         cursor.close()
         
-        # If no recommendations found, use default recommendations
-        if not recommended:
-            return recommend_skills_default(existing_skills, field)
-            
-        return recommended
+        return recommendations_from_rows(rows)
     except Exception as e:
         print(f"Database error when fetching recommendations: {e}")
-        return recommend_skills_default(existing_skills, field)
+        failed = True
+        return None
     finally:
         if conn:
-            return_connection(conn)
+            return_connection(conn, failed)
 
-# Try to initialize the connection pool at startup
-db_connected = initialize_connection_pool()
+# Whether the catalog_version table (see catalog_loader.ensure_version_triggers) exists
+CATALOG_VERSION_TABLE = False
+CATALOG_VERSION_EXISTS_QUERY = """
+    SELECT EXISTS (
+        SELECT FROM information_schema.tables
+        WHERE table_schema = 'public' AND table_name = 'catalog_version'
+    )
+"""
+CATALOG_VERSION_QUERY = "SELECT version FROM catalog_version WHERE id = 1"
+# When catalog_version was last read, by the refresh thread or an async request
+catalog_checked_at = None
 
-# Initialize ALL_SKILLS with database values or fallback values
-try:
-    if db_connected:
-        db_skills = fetch_skills_from_db()
-        ALL_SKILLS = [skill for category in db_skills.values() for skill in category]
-    else:
-        # Flatten skills list as fallback
-        ALL_SKILLS = [skill for category in SKILLS.values() for skill in category]
-except:
-    # Flatten skills list as fallback
-    ALL_SKILLS = [skill for category in SKILLS.values() for skill in category]
-
-def extract_text_from_pdf(pdf_file):
-    """Extract text from PDF file or text file."""
+# Function to read the counter the catalog triggers bump on every change
+def fetch_catalog_version():
+    global CATALOG_VERSION_TABLE, catalog_checked_at
+    conn = get_connection()
+    if not conn:
+        return None
+    failed = False
+    try:
+        cursor = conn.cursor()
+        if not CATALOG_VERSION_TABLE:
+            cursor.execute(CATALOG_VERSION_EXISTS_QUERY)
+            if not cursor.fetchone()[0]:
+                catalog_checked_at = time.monotonic()
+                return None
+            CATALOG_VERSION_TABLE = True
+        with track(DB_SECONDS, operation="version_query"):
+            cursor.execute(CATALOG_VERSION_QUERY)
+            row = cursor.fetchone()
+        cursor.close()
+        catalog_checked_at = time.monotonic()
+        return row[0] if row else None
+    except Exception as e:
+        print(f"Database error when checking the catalog version: {e}")
+        failed = True
+        return None
+    finally:
+        return_connection(conn, failed)
+
+# Serve from the last good catalog snapshot so startup never waits on Postgres
+CATALOG = load_snapshot() or SkillCatalog(SKILLS, source="fallback")
+ALL_SKILLS = CATALOG.all_skills
+# On stderr, so the JSON the CLI modes write to stdout is all there is on it
+print(f"Loaded skill catalog {CATALOG.version} from {CATALOG.source} ({len(ALL_SKILLS)} skills)", file=sys.stderr)
+
+def set_catalog(catalog):
+    """Swap in a new catalog; each parse reads CATALOG once so it sees one version."""
+    global CATALOG, ALL_SKILLS
+    CATALOG = catalog
+    ALL_SKILLS = catalog.all_skills
+
+# Serializes refreshes from the background thread and --refresh-catalog
+catalog_refresh_lock = threading.Lock()
+
+def refresh_catalog(trigger="manual"):
+    """Connect to the database, pull the catalog and persist it as the new snapshot."""
+    with catalog_refresh_lock:
+        return _refresh_catalog(trigger)
+
+def _refresh_catalog(trigger):
+    # Both fetches fall back straight away while the circuit breaker is open
+    db_skills = fetch_skills_from_db()
+    recommendations = fetch_recommendations_from_db()
+    return _apply_catalog(db_skills, recommendations, trigger)
+
+def apply_catalog(db_skills, recommendations, trigger):
+    """Swap in a catalog built from rows fetched elsewhere (as by the asyncio server)."""
+    with catalog_refresh_lock:
+        return _apply_catalog(db_skills, recommendations, trigger)
+
+def _apply_catalog(db_skills, recommendations, trigger):
+    if db_skills is SKILLS:
+        FALLBACKS.inc(kind="skills")
+    if recommendations is None:
+        FALLBACKS.inc(kind="recommendations")
+    if db_skills is SKILLS and recommendations is None:
+        # Both queries fell back; keep serving the last good snapshot
+        return False
+
+    # Keep the current half of the catalog when only one query succeeded
+    current = CATALOG
+    catalog = SkillCatalog(
+        current.skills_by_category if db_skills is SKILLS else db_skills,
+        current.recommendations if recommendations is None else recommendations,
+        source="db"
+    )
+    if catalog.etag != current.etag:
+        # Build the lazily created structures here, not in the first request after the swap
+        catalog.field_scorer
+        try:
+            save_snapshot(catalog)
+        except Exception as e:
+            print(f"Error saving catalog snapshot: {e}")
+        set_catalog(catalog)
+        CATALOG_RELOADS.inc(trigger=trigger)
+        print(f"Skill catalog updated to {catalog.version} ({len(catalog.all_skills)} skills, {trigger})")
+    return True
+
+# How often the background thread re-reads the whole catalog (0 disables the
+# thread: the catalog then comes from the snapshot or --refresh-catalog)
+CATALOG_REFRESH_INTERVAL = float(os.environ.get('PARSER_CATALOG_REFRESH_SECONDS', '300'))
+# How often it checks the catalog_version row in between (0 disables polling)
+CATALOG_POLL_INTERVAL = float(os.environ.get('PARSER_CATALOG_POLL_SECONDS', '5'))
+# Also LISTEN for the triggers' notifications on a dedicated connection. Needs a
+# session-mode connection, so not the Supabase transaction pooler on port 6543
+CATALOG_LISTEN = os.environ.get('PARSER_CATALOG_LISTEN', '0') == '1'
+
+# Set by the listener to wake the refresh loop early
+catalog_changed = threading.Event()
+# catalog_version as of the last successful reload
+catalog_db_version = None
+
+def catalog_refresh_loop(interval=CATALOG_REFRESH_INTERVAL, poll_interval=CATALOG_POLL_INTERVAL):
+    """Reload the catalog when its version row changes or a notification arrives, and in full every interval."""
+    global catalog_db_version
+    last_full = None
+    while True:
+        notified = catalog_changed.is_set()
+        catalog_changed.clear()
+        try:
+            # Read the version first so a change made during the reload is seen next time
+            version = fetch_catalog_version()
+            if last_full is None or time.monotonic() - last_full >= interval:
+                trigger = "interval"
+            elif notified:
+                trigger = "notify"
+            elif version is not None and version != catalog_db_version:
+                trigger = "version"
+            else:
+                trigger = None
+            if trigger:
+                if refresh_catalog(trigger):
+                    catalog_db_version = version
+                if trigger == "interval":
+                    last_full = time.monotonic()
+        except Exception as e:
+            print(f"Error refreshing skill catalog: {e}")
+        if interval <= 0:
+            return
+        if not DB_POOL.connected:
+            # Reconnect on the breaker's backoff rather than waiting a whole interval
+            delay = min(interval, max(1.0, DB_POOL.retry_in()))
+        elif last_full is None:
+            # The first full reload failed; retry it at the next poll
+            delay = min(interval, poll_interval) if poll_interval > 0 else interval
+        else:
+            delay = interval - (time.monotonic() - last_full)
+            if poll_interval > 0:
+                delay = min(delay, poll_interval)
+        catalog_changed.wait(max(0.0, delay))
+
+def catalog_listen_loop():
+    """Hold a connection LISTENing on the catalog channel and wake the refresh loop on every change."""
+    psycopg2 = load_module('psycopg2')
+    import select
+    while True:
+        conn = None
+        try:
+            conn = psycopg2.connect(**db_connect_kwargs())
+            conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute(f"LISTEN {CATALOG_CHANNEL}")
+            print(f"Listening for skill catalog changes on {CATALOG_CHANNEL}")
+            # Changes made while disconnected were never delivered
+            catalog_changed.set()
+            while True:
+                if select.select([conn], [], [], 60)[0]:
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        catalog_changed.set()
+                else:
+                    # Notice a dead connection instead of waiting on it forever
+                    cursor.execute("SELECT 1")
+        except Exception as e:
+            print(f"Catalog listener disconnected: {e}")
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        time.sleep(max(5.0, DB_POOL.retry_in()))
+
+def start_catalog_refresh():
+    """Keep the catalog in sync with the database in the background without blocking startup.
+
+    Returns the refresh thread, or None when PARSER_CATALOG_REFRESH_SECONDS is 0.
+    """
+    global catalog_refresh_pid
+    catalog_refresh_pid = os.getpid()
+    if CATALOG_REFRESH_INTERVAL <= 0:
+        return None
+    if CATALOG_LISTEN:
+        threading.Thread(target=catalog_listen_loop, name="catalog-listen", daemon=True).start()
+    thread = threading.Thread(target=catalog_refresh_loop, name="catalog-refresh", daemon=True)
+    thread.start()
+    return thread
+
+# Started by the servers and the worker, not on import, so the CLI, batch and
+# index modes never talk to the database in the background and never fork
+# while these threads run
+catalog_refresh_thread = None
+catalog_refresh_pid = None
+catalog_start_lock = threading.Lock()
+
+def ensure_catalog_refresh():
+    """Start the catalog refresh in this process on first use (servers not set up by gunicorn.conf.py)."""
+    global catalog_refresh_thread
+    if catalog_refresh_pid != os.getpid():
+        with catalog_start_lock:
+            if catalog_refresh_pid != os.getpid():
+                catalog_refresh_thread = start_catalog_refresh()
+    return catalog_refresh_thread
+
+def load_catalog_once():
+    """For the one-shot CLI modes, which run no refresh thread: without a
+    snapshot, read the catalog from the database once rather than parse
+    against the built-in fallback, and warn on stderr if that fails.
+    """
+    if CATALOG.source != "fallback":
+        return
+    # Database errors are logged with print; keep them off the JSON on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        refresh_catalog("startup")
+    if CATALOG.source == "fallback":
+        print(f"Warning: no catalog snapshot and the database is unavailable; "
+              f"parsing with the built-in catalog ({len(ALL_SKILLS)} skills)", file=sys.stderr)
+    # Processes forked by --batch and --index must not share its connections
+    DB_POOL.close()
+
+# Modules the catalog threads import on their own; see settle_before_fork
+BACKGROUND_IMPORTS = ('psycopg2', 'psycopg2.extensions', 'psycopg2.pool', 'numpy', 'scipy.sparse')
+
+def settle_before_fork():
+    """Let imports begun by background threads finish before a preforking server forks.
+
+    A worker forked mid-import inherits that module's import lock, held by
+    a thread that doesn't exist in the child, and hangs the first time it
+    imports the module. Importing here waits for any such import to
+    complete, and preloads the modules for every worker.
+    """
+    for name in BACKGROUND_IMPORTS:
+        try:
+            load_module(name)
+        except ImportError:
+            pass
+
+def reset_after_fork():
+    """Drop state inherited from a preforking parent and restart background work.
+
+    The parent's DB connections must not be shared with the child, so they
+    are abandoned rather than closed (closing would end the parent's
+    sessions). The catalog loaded before the fork is kept.
+    """
+    global catalog_refresh_lock, catalog_start_lock, catalog_refresh_thread, catalog_changed, catalog_lookup, async_parses
+    # Counts recorded by the parent would otherwise be reported once per worker
+    REGISTRY.reset()
+    DB_POOL.reset_after_fork()
+    ASYNC_DB_POOL.reset_after_fork()
+    catalog_lookup = None
+    async_parses = {}
+    catalog_refresh_lock = threading.Lock()
+    catalog_changed = threading.Event()
+    catalog_start_lock = threading.Lock()
+    catalog_refresh_thread = start_catalog_refresh()
+
+class ExtractionFailed(Exception):
+    """An upload's text could not be extracted."""
+
+# Stands in for a resume whose text can't be extracted, where a result is
+# expected regardless (the one-shot CLI, the worker and the upload route)
+FALLBACK_TEXT = """John Smith
+Email: john.smith@example.com
+Phone: (555) 123-4567
+
+SKILLS
+JavaScript, React, TypeScript, Node.js, Python, HTML, CSS"""
+
+def extract_text_from_pdf(pdf_file, report=None, fallback=True):
+    """Extract text from PDF file or text file.
+
+    For PDFs, pass a report dict to learn the page count and which pages
+    were skipped (page limit, time budget or extraction errors). Text that
+    can't be extracted is replaced by FALLBACK_TEXT, or raises
+    ExtractionFailed when fallback is False.
+    """
     try:
         if hasattr(pdf_file, 'read'):
-            # File object passed
-            filename = getattr(pdf_file, 'name', '')
+            # File object passed; Flask uploads carry the client's name in .filename
+            filename = getattr(pdf_file, 'filename', None) or getattr(pdf_file, 'name', '') or ''
             is_file_object = True
         else:
             # Path string passed
@@ -279,52 +572,71 @@ def extract_text_from_pdf(pdf_file):
                     text = f.read()
             return text
             
-        # For PDF files
+        # For PDF files, stream pages with page limits and a time budget
+        # Large files on disk are memory-mapped rather than read through buffers
         try:
             if is_file_object:
-                # Reset file pointer
-                pdf_file.seek(0)
-                reader = PyPDF2.PdfReader(pdf_file)
-            else:
-                # Open and read PDF file
-                with open(filename, 'rb') as f:
-                    reader = PyPDF2.PdfReader(f)
-                    
-            text = ""
-            for page in reader.pages:
-                try:
-                    text += page.extract_text() + "\n"
-                except Exception as e:
-                    print(f"Error extracting text from page: {e}")
-            
-            return text
+                with mapped(pdf_file) as source:
+                    return extract_pdf_text(source, report)
+            # Keep the file open while pages are read lazily
+            with open(filename, 'rb') as f, mapped(f) as source:
+                return extract_pdf_text(source, report)
         except Exception as e:
             raise Exception(f"Error processing PDF: {e}")
             
     except Exception as e:
         print(f"Error extracting text: {e}")
-        # Return some dummy text for testing
-        return """John Smith
-Email: john.smith@example.com
-Phone: (555) 123-4567
+        if not fallback:
+            raise ExtractionFailed(str(e)) from e
+        FALLBACKS.inc(kind="dummy_text")
+        return FALLBACK_TEXT
 
-SKILLS
-JavaScript, React, TypeScript, Node.js, Python, HTML, CSS"""
+# Extractor patterns, compiled once at import instead of on every resume
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'(?:\+\d{1,2}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}')
+# Matched against the lowercase text
+YEARS_PATTERNS = (
+    re.compile(r'\b(\d+)\+?\s+years?\s+(?:of\s+)?experience\b'),
+    re.compile(r'\bexperienced\s+(?:for|with)?\s+(\d+)\+?\s+years\b')
+)
+SENIOR_PATTERN = re.compile(r'\bsenior\b|\bsr\.?\b|\blead\b|\barchitect\b|\bhead\b|\bprincipal\b')
+JUNIOR_PATTERN = re.compile(r'\bjunior\b|\bjr\.?\b|\bentry\b|\bintern\b|\btrainee\b')
+
+# Sections each extractor reads (see sections.py); contact details are looked
+# for in the rest of the resume only when they aren't in these
+CONTACT_SECTIONS = ('header', 'contact')
+EXPERIENCE_SECTIONS = ('header', 'summary', 'experience')
+# Skills are matched everywhere except these; education is kept, since
+# coursework and thesis skills count towards the score
+SKILL_SKIP_SECTIONS = ('contact', 'interests', 'references')
+
+# Function to find the first match of a pattern within the given spans, in order
+def search_spans(pattern, text, spans):
+    for start, end in spans:
+        match = pattern.search(text, start, end)
+        if match:
+            return match
+    return None
 
-def extract_contact_info(text):
-    """Extract contact information from resume text."""
-    # Email
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    email = re.search(email_pattern, text)
+def extract_contact_info(text, locations=None):
+    """Extract contact information from resume text or a ResumeDocument.
     
-    # Phone
-    phone_pattern = r'(?:\+\d{1,2}\s?)?\(?\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}'
-    phone = re.search(phone_pattern, text)
+    If locations is a dict, where the email and phone were found is added to it.
+    """
+    doc = as_document(text)
+    spans = doc.sections.spans(CONTACT_SECTIONS, fallback=False) + doc.sections.spans_except(CONTACT_SECTIONS)
+    email = search_spans(EMAIL_PATTERN, doc.text, spans)
+    phone = search_spans(PHONE_PATTERN, doc.text, spans)
+    if locations is not None:
+        locations["email"] = doc.locate(email.start()) if email else None
+        locations["phone"] = doc.locate(phone.start()) if phone else None
     
-    # Name (simple heuristic: first line or first capitalized words)
+    # Name (simple heuristic: first line or first capitalized words), unless
+    # the resume opens with a heading such as "Profile"
     name = ""
-    first_line = text.split('\n')[0].strip()
-    if len(first_line) < 40 and not re.search(email_pattern, first_line) and not re.search(phone_pattern, first_line):
+    first_line = doc.first_line
+    if (len(first_line) < 40 and not EMAIL_PATTERN.search(first_line) and not PHONE_PATTERN.search(first_line)
+            and heading_name(first_line.lower()) is None):
         name = first_line
     
     return {
@@ -333,49 +645,66 @@ def extract_contact_info(text):
         "phone": phone.group(0) if phone else ""
     }
 
-def extract_skills(text):
-    """Extract skills from resume text."""
-    text = text.lower()
-    found_skills = []
+def extract_skills(text, catalog=None, locations=None):
+    """Extract skills from resume text or a ResumeDocument.
     
-    for skill in ALL_SKILLS:
-        skill_pattern = r'\b' + re.escape(skill.lower()) + r'\b'
-        if re.search(skill_pattern, text):
-            found_skills.append(skill)
-    
-    return found_skills
+    If locations is a dict, locations["skills"] maps each skill to where it was first found.
+    """
+    doc = as_document(text)
+    spans = doc.sections.spans_except(SKILL_SKIP_SECTIONS)
+    if locations is None:
+        return (catalog or CATALOG).matcher.find_skills(doc.text, doc.lower, spans)
+    first = (catalog or CATALOG).matcher.first_offsets(doc.text, doc.lower, spans)
+    locations["skills"] = {skill: doc.locate(offset) for skill, offset in first.items()}
+    return list(first)
 
-def categorize_skills(skills):
-    """Categorize skills by category."""
-    categorized = {}
-    for category, category_skills in SKILLS.items():
-        categorized[category] = [skill for skill in skills if skill in category_skills]
-    return categorized
+def extract_skill_matches(text, catalog=None):
+    """Extract skills with their match counts and character offsets."""
+    doc = as_document(text)
+    return (catalog or CATALOG).matcher.match(doc.text, doc.lower, doc.sections.spans_except(SKILL_SKIP_SECTIONS))
 
-def determine_experience_level(text):
-    """Determine experience level based on years mentioned."""
-    # Look for years of experience
-    year_patterns = [
-        r'\b(\d+)\+?\s+years?\s+(?:of\s+)?experience\b',
-        r'\bexperienced\s+(?:for|with)?\s+(\d+)\+?\s+years\b'
-    ]
+def categorize_skills(skills, catalog=None):
+    """Group skills by their categories in the loaded catalog (empty categories are left out)."""
+    return (catalog or CATALOG).skill_index.categorize(skills)
+
+def determine_experience_level(text, locations=None):
+    """Determine experience level based on years mentioned.
     
+    Only the header, summary and experience sections are read, so words like
+    "lead" in project descriptions don't count. If locations is a dict, where
+    the deciding phrase was found is added to it.
+    """
+    doc = as_document(text)
+    lowered = doc.lower
+    spans = doc.sections.spans(EXPERIENCE_SECTIONS)
+    
+    # Look for years of experience
     max_years = 0
-    for pattern in year_patterns:
-        matches = re.finditer(pattern, text.lower())
-        for match in matches:
-            years = int(match.group(1))
-            max_years = max(max_years, years)
+    evidence = None
+    for pattern in YEARS_PATTERNS:
+        for start, end in spans:
+            for match in pattern.finditer(lowered, start, end):
+                if int(match.group(1)) > max_years:
+                    max_years = int(match.group(1))
+                    evidence = match
     
     if max_years == 0:
         # Check if title contains terms like "Senior", "Junior", etc.
-        if re.search(r'\bsenior\b|\bsr\.?\b|\blead\b|\barchitect\b|\bhead\b|\bprincipal\b', text.lower()):
+        senior = search_spans(SENIOR_PATTERN, lowered, spans)
+        junior = None if senior else search_spans(JUNIOR_PATTERN, lowered, spans)
+        if locations is not None:
+            evidence = senior or junior
+            locations["experienceLevel"] = doc.locate(evidence.start()) if evidence else None
+        if senior:
             return "Senior"
-        elif re.search(r'\bjunior\b|\bjr\.?\b|\bentry\b|\bintern\b|\btrainee\b', text.lower()):
+        elif junior:
             return "Junior"
         else:
             return "Intermediate"
-    elif max_years < 3:
+    
+    if locations is not None:
+        locations["experienceLevel"] = doc.locate(evidence.start())
+    if max_years < 3:
         return "Junior"
     elif max_years < 7:
         return "Intermediate"
@@ -384,17 +713,8 @@ def determine_experience_level(text):
 
 def recommend_skills_default(found_skills, target_field="Software Development"):
     """Default recommendation function used as fallback."""
-    # Map target fields to skill categories
-    field_to_categories = {
-        "Software Development": ["programming_languages", "web_technologies", "tools"],
-        "Data Science": ["data_science", "programming_languages", "databases"],
-        "Web Development": ["web_technologies", "programming_languages", "databases"],
-        "DevOps": ["cloud_platforms", "tools", "programming_languages"],
-        "Mobile Development": ["programming_languages", "tools"]
-    }
-    
     # Default to Software Development if target field not in mapping
-    categories = field_to_categories.get(target_field, field_to_categories["Software Development"])
+    categories = FIELD_CATEGORIES.get(target_field, FIELD_CATEGORIES["Software Development"])
     
     # Get relevant skills for the field
     relevant_skills = []
@@ -407,22 +727,31 @@ def recommend_skills_default(found_skills, target_field="Software Development"):
     # Limit to top 7
     return recommended[:7]
 
-def recommend_skills(found_skills, target_field="Software Development"):
+def recommend_skills(found_skills, target_field="Software Development", catalog=None):
     """Recommend skills based on found skills and target field."""
+    catalog = catalog or CATALOG
     try:
-        if db_connected:
-            # Try to get recommendations from the database
-            return fetch_recommended_skills(target_field, found_skills)
-        else:
-            # Fall back to default recommendations
-            return recommend_skills_default(found_skills, target_field)
+        # Rank from the in-memory index loaded with the catalog
+        if target_field in catalog.recommendation_index:
+            recommended = catalog.recommendation_index.recommend(target_field, found_skills)
+            if recommended:
+                return recommended
     except Exception as e:
         print(f"Error in skill recommendations: {e}")
-        # Fall back to default recommendations
-        return recommend_skills_default(found_skills, target_field)
+    # Fall back to default recommendations
+    FALLBACKS.inc(kind="default_recommendations")
+    return recommend_skills_default(found_skills, target_field)
+
+def score_fields(skill_lists, catalog=None, top=3):
+    """Rank the likeliest fields for a stack of resumes' skills in one pass."""
+    return (catalog or CATALOG).field_scorer.rank(skill_lists, top)
+
+def calculate_score(skills, experience_level, seed=None):
+    """Calculate resume score based on skills and experience level.
 
-def calculate_score(skills, experience_level):
-    """Calculate resume score based on skills and experience level."""
+    With a seed (the content hash) the jitter is deterministic, so the same
+    file always gets the same score and cached results stay consistent.
+    """
     base_score = min(30 + len(skills) * 3, 70)
     
     # Adjust based on experience level
@@ -433,13 +762,273 @@ def calculate_score(skills, experience_level):
     
     # Randomize slightly to avoid identical scores
     import random
-    score = base_score + random.randint(-5, 5)
+    rng = random.Random(seed) if seed is not None else random
+    score = base_score + rng.randint(-5, 5)
     
     # Ensure score is between 0 and 100
     return max(0, min(score, 100))
 
+# Parse-result cache keyed by content hash, catalog version and target field
+RESULT_CACHE_ENTRIES = int(os.environ.get('PARSER_CACHE_ENTRIES', '1024'))
+RESULT_CACHE_PATH = os.environ.get(
+    'PARSER_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'results.sqlite3')
+)
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('PARSER_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+# Seed the score jitter from the content hash (required for cached results to be consistent)
+DETERMINISTIC_SCORE = os.environ.get('PARSER_DETERMINISTIC_SCORE', '1') != '0'
+
+RESULT_CACHE = ResultCache(RESULT_CACHE_ENTRIES, RESULT_CACHE_PATH or None, RESULT_CACHE_MAX_BYTES,
+                           on_lookup=lambda result: CACHE_LOOKUPS.inc(result=result))
+CACHE_ENABLED = RESULT_CACHE_ENTRIES > 0 or bool(RESULT_CACHE_PATH)
+
+# Write-behind storage of parse results in the parse_results table (off by
+# default so CLI runs never touch the database). Rows are queued per upload
+# and written in batches by a background thread; uploads whose text could
+# not be extracted are not written
+PERSIST_RESULTS = os.environ.get('PARSER_PERSIST_RESULTS', '0') == '1'
+RESULTS_BATCH_SIZE = int(os.environ.get('PARSER_RESULTS_BATCH_SIZE', '500'))
+RESULTS_FLUSH_SECONDS = float(os.environ.get('PARSER_RESULTS_FLUSH_SECONDS', '1'))
+# Queue bound; past it uploads wait PARSER_RESULTS_PUT_TIMEOUT for room, then the row is dropped
+RESULTS_MAX_QUEUED = int(os.environ.get('PARSER_RESULTS_MAX_QUEUED', '10000'))
+RESULTS_PUT_TIMEOUT = float(os.environ.get('PARSER_RESULTS_PUT_TIMEOUT', '1'))
+# "copy" (COPY into a staging table, then upsert) or "values" (multi-row INSERT)
+RESULTS_METHOD = os.environ.get('PARSER_RESULTS_METHOD', 'copy')
+
+def record_results_written(rows, seconds):
+    RESULTS_PERSISTED.inc(rows, outcome="written")
+    DB_SECONDS.observe(seconds, operation="results_write")
+
+RESULT_SINK = ResultSink(
+    DB_POOL.getconn,
+    DB_POOL.putconn,
+    batch_size=RESULTS_BATCH_SIZE,
+    flush_interval=RESULTS_FLUSH_SECONDS,
+    max_queued=RESULTS_MAX_QUEUED,
+    put_timeout=RESULTS_PUT_TIMEOUT,
+    method=RESULTS_METHOD,
+    on_write=record_results_written,
+    on_drop=lambda reason, rows: RESULTS_PERSISTED.inc(rows, outcome=f"dropped_{reason}")
+)
+# Write out queued rows on a normal exit (worker.py turns SIGTERM into one)
+atexit.register(RESULT_SINK.close)
+
+def hash_upload(file):
+    """SHA-256 and size of an uploaded file's bytes, leaving the file positioned at the start."""
+    file.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: file.read(1024 * 1024), b''):
+        chunk = chunk.encode('utf-8') if isinstance(chunk, str) else chunk
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return digest.hexdigest(), size
+
+def analyze_text(text, target_field="Software Development", catalog=None, seed=None):
+    """Run every extractor over already-extracted resume text and build the response."""
+    catalog = catalog or CATALOG
+    
+    # Normalize once; every extractor shares the same document
+    doc = as_document(text)
+    
+    # Find the section headings the extractors narrow their search with
+    with track(STAGE_SECONDS, stage="sections"):
+        sections = [{"name": name, "start": start, "end": end, "line": doc.line_of(start)}
+                    for name, start, end in doc.sections]
+    locations = {}
+    
+    # Extract contact info
+    with track(STAGE_SECONDS, stage="contact"):
+        contact_info = extract_contact_info(doc, locations)
+    
+    # Extract skills
+    with track(STAGE_SECONDS, stage="skills"):
+        skills = extract_skills(doc, catalog, locations)
+        categorized_skills = categorize_skills(skills, catalog)
+    
+    # Determine experience level
+    with track(STAGE_SECONDS, stage="experience"):
+        experience_level = determine_experience_level(doc, locations)
+    
+    # Calculate score
+    with track(STAGE_SECONDS, stage="scoring"):
+        score = calculate_score(skills, experience_level, seed)
+    
+    # Recommend skills
+    with track(STAGE_SECONDS, stage="recommendation"):
+        recommended_skills = recommend_skills(skills, target_field, catalog)
+    
+    # Work out which fields the skills fit best
+    with track(STAGE_SECONDS, stage="field_scoring"):
+        field_matches = score_fields([skills], catalog)[0]
+    
+    # Generate response
+    return {
+        "name": contact_info["name"],
+        "email": contact_info["email"],
+        "phone": contact_info["phone"],
+        "skills": skills,
+        "categorizedSkills": categorized_skills,
+        "experienceLevel": experience_level,
+        "score": score,
+        # Without any matched skill, fall back to the requested field
+        "likelyField": field_matches[0]["field"] if field_matches else target_field,
+        "matchConfidence": field_matches[0]["confidence"] if field_matches else min(95, score + 5),
+        "fieldMatches": field_matches,
+        "recommendedSkills": recommended_skills,
+        "sections": sections,
+        "locations": locations,
+        "catalogVersion": catalog.version
+    }
+
+def analyze_resume(file, target_field="Software Development", fallback=True):
+    """Run the full analysis pipeline on a file object and build the response.
+    
+    With fallback=False an upload whose text can't be extracted raises
+    ExtractionFailed instead of being parsed as FALLBACK_TEXT.
+    """
+    # Read the catalog once so a concurrent refresh can't mix two versions
+    catalog = CATALOG
+    with track(STAGE_SECONDS, stage="hash"):
+        content_hash, size = hash_upload(file)
+    UPLOAD_BYTES.observe(size)
+    seed = int(content_hash[:16], 16) if DETERMINISTIC_SCORE else None
+    
+    def compute():
+        # Extract text from PDF
+        pdf_report = {}
+        with track(STAGE_SECONDS, stage="extraction"):
+            text = extract_text_from_pdf(file, pdf_report, fallback=False)
+        if pdf_report:
+            PDF_PAGES.observe(pdf_report["pages"])
+            for skipped in pdf_report["skippedPages"]:
+                PDF_SKIPPED_PAGES.inc(reason=skipped["reason"])
+        response = analyze_text(text, target_field, catalog, seed)
+        response["contentHash"] = content_hash
+        if pdf_report:
+            response["pdf"] = pdf_report
+        return response
+    
+    try:
+        if not CACHE_ENABLED:
+            return compute()
+        # Identical uploads are served from cache, and concurrent ones parsed once
+        key = cache_key(content_hash, catalog.version, target_field)
+        return dict(RESULT_CACHE.get_or_compute(key, compute))
+    except ExtractionFailed as e:
+        if not fallback:
+            raise
+        return fallback_response(e, target_field, catalog, seed, content_hash)
+
+def fallback_response(error, target_field, catalog, seed, content_hash):
+    """The FALLBACK_TEXT analysis for an upload whose text couldn't be extracted.
+    
+    It is built outside the result cache, so a later upload of the same
+    bytes is extracted again, and carries extractionError so it is never
+    mistaken for the upload's own result.
+    """
+    FALLBACKS.inc(kind="dummy_text")
+    response = analyze_text(FALLBACK_TEXT, target_field, catalog, seed)
+    response["contentHash"] = content_hash
+    response["extractionError"] = str(error)
+    return response
+
+# Caps how many upload bytes this process parses at once
+UPLOAD_BUDGET = ByteBudget(MAX_INFLIGHT_BYTES)
+
+def admit_upload(file):
+    """The upload's size, after refusing it if it is too large or the process is short of memory."""
+    size = upload_size(file)
+    if size > MAX_UPLOAD_BYTES:
+        UPLOADS_REFUSED.inc(reason="too_large")
+        raise UploadTooLarge(f"Upload of {size} bytes exceeds the {MAX_UPLOAD_BYTES} byte limit")
+    try:
+        check_memory()
+    except MemoryPressure:
+        UPLOADS_REFUSED.inc(reason="rss_limit")
+        raise
+    return size
+
+def analyze_upload(file, target_field="Software Development", fallback=True):
+    """analyze_resume within the memory limits, reporting the resident memory it used.
+    
+    Raises UploadTooLarge for files over PARSER_MAX_UPLOAD_BYTES and
+    MemoryPressure when the process is over PARSER_MAX_RSS_BYTES, too many
+    upload bytes are already being parsed, or the parse itself runs out of
+    memory, so callers can refuse the upload instead of the worker dying.
+    """
+    size = admit_upload(file)
+    if not UPLOAD_BUDGET.acquire(size, INFLIGHT_WAIT_SECONDS):
+        UPLOADS_REFUSED.inc(reason="inflight_bytes")
+        raise MemoryPressure("Too many large uploads are being parsed; try again shortly")
+    try:
+        memory = {}
+        with memory_report(memory):
+            response = analyze_resume(file, target_field, fallback)
+        RSS_GROWTH.observe(max(0, memory["rssGrowthBytes"]))
+        response["memory"] = memory
+        # The dummy result of a failed extraction is not the upload's
+        if PERSIST_RESULTS and "extractionError" not in response:
+            # Blocks only while the sink's queue is full
+            RESULT_SINK.put(result_record(response, target_field))
+        return response
+    except MemoryError:
+        UPLOADS_REFUSED.inc(reason="out_of_memory")
+        raise MemoryPressure("Ran out of memory parsing this upload")
+    finally:
+        UPLOAD_BUDGET.release(size)
+
+def apply_guest_defaults(response):
+    """Fill missing contact details the way the Next.js frontend expects."""
+    response["name"] = response["name"] or "Guest User"
+    response["email"] = response["email"] or "guest@example.com"
+    response["phone"] = response["phone"] or "+1 (555) 123-4567"
+    return response
+
+def parse_resume_file(file_path, target_field="Software Development", guest_defaults=True, fallback=True):
+    """Parse a resume from a path on disk, as used by the CLI, worker and batch modes."""
+    with open(file_path, 'rb') as file:
+        response = analyze_upload(file, target_field, fallback)
+    return apply_guest_defaults(response) if guest_defaults else response
+
+def parse_resume_file_raw(file_path, target_field="Software Development"):
+    """Batch-mode parse that reports missing contact details as empty and unreadable files as errors."""
+    return parse_resume_file(file_path, target_field, guest_defaults=False, fallback=False)
+
+@app.before_request
+def start_request_metrics():
+    ensure_catalog_refresh()
+    g.started = time.perf_counter()
+    if TIMING_HEADERS:
+        start_request_timings()
+
+@app.after_request
+def finish_request_metrics(response):
+    elapsed = time.perf_counter() - g.get('started', time.perf_counter())
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, status=response.status_code)
+    stages = pop_request_timings()
+    if stages is not None:
+        response.headers['Server-Timing'] = server_timing_header(stages, elapsed)
+    # Share this worker's numbers with whichever worker answers the next scrape
+    REGISTRY.dump()
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+# Room for the multipart boundaries and form fields around the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
 @app.route('/api/parse-resume', methods=['POST'])
 def parse_resume():
+    # Refuse oversized uploads before Flask parses the multipart body
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+        UPLOADS_REFUSED.inc(reason="too_large")
+        return jsonify({"error": f"Upload exceeds the {MAX_UPLOAD_BYTES} byte limit"}), 413
+    
     if 'file' not in request.files:
         return jsonify({"error": "No file provided"}), 400
     
@@ -451,90 +1040,621 @@ def parse_resume():
     target_field = request.form.get('targetField', 'Software Development')
     
     try:
-        # Extract text from PDF
-        text = extract_text_from_pdf(file)
-        
-        # Extract contact info
-        contact_info = extract_contact_info(text)
-        
-        # Extract skills
-        skills = extract_skills(text)
-        
-        # Determine experience level
-        experience_level = determine_experience_level(text)
-        
-        # Calculate score
-        score = calculate_score(skills, experience_level)
-        
-        # Recommend skills
-        recommended_skills = recommend_skills(skills, target_field)
-        
-        # Generate response
-        response = {
-            "name": contact_info["name"],
-            "email": contact_info["email"],
-            "phone": contact_info["phone"],
-            "skills": skills,
-            "experienceLevel": experience_level,
-            "score": score,
-            "likelyField": target_field,
-            "matchConfidence": min(95, score + 5),  # Slightly higher than score
-            "recommendedSkills": recommended_skills
-        }
-        
-        return jsonify(response)
+        # Werkzeug has already spooled large uploads to a temporary file
+        return jsonify(analyze_upload(file, target_field))
     
+    except UploadTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except MemoryPressure as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(max(1, int(INFLIGHT_WAIT_SECONDS)))}
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Limits for a single batch upload
+BATCH_MAX_FILES = int(os.environ.get('PARSER_BATCH_MAX_FILES', '200'))
+BATCH_MAX_FILE_BYTES = int(os.environ.get('PARSER_BATCH_MAX_FILE_BYTES', str(20 * 1024 * 1024)))
+BATCH_CONCURRENCY = int(os.environ.get('PARSER_BATCH_CONCURRENCY', '4'))
+BATCH_MAX_INFLIGHT_BYTES = int(os.environ.get('PARSER_BATCH_MAX_INFLIGHT_BYTES', str(64 * 1024 * 1024)))
+
+# Uploads up to this size are kept in memory, larger ones are spooled to disk
+BATCH_SPOOL_BYTES = int(os.environ.get('PARSER_BATCH_SPOOL_BYTES', str(256 * 1024)))
+
+def spool_upload(file):
+    """Copy an upload out of the request so it outlives the view while results stream."""
+    spool = tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_BYTES)
+    shutil.copyfileobj(file.stream, spool)
+    return spool
+
+def load_spooled_upload(spool, filename):
+    """Hand over the spooled upload itself, named so .txt detection sees the real filename."""
+    spool.seek(0)
+    spool.filename = filename
+    return spool
+
+@app.route('/api/parse-resume/batch', methods=['POST'])
+def parse_resume_batch():
+    # Refuse oversized batches before Flask parses the multipart body
+    max_batch_bytes = BATCH_MAX_FILES * BATCH_MAX_FILE_BYTES
+    if request.content_length and request.content_length > max_batch_bytes:
+        return jsonify({"error": f"Batch exceeds the {max_batch_bytes} byte limit"}), 413
+    
+    files = [file for file in request.files.getlist('files') + request.files.getlist('file') if file.filename]
+    if not files:
+        return jsonify({"error": "No files provided"}), 400
+    if len(files) > BATCH_MAX_FILES:
+        return jsonify({"error": f"Too many files: {len(files)} (limit {BATCH_MAX_FILES})"}), 413
+    
+    # Get target field if provided
+    target_field = request.form.get('targetField', 'Software Development')
+    
+    # The request's own file streams are closed once this view returns
+    uploads = [(file.filename, spool_upload(file)) for file in files]
+    
+    def items():
+        for index, (filename, spool) in enumerate(uploads):
+            size = spool.tell()
+            
+            def load(spool=spool, filename=filename, size=size):
+                # Reject oversized files before reading them into memory
+                if size > BATCH_MAX_FILE_BYTES:
+                    spool.close()
+                    raise ValueError(f"File exceeds the {BATCH_MAX_FILE_BYTES} byte limit")
+                return load_spooled_upload(spool, filename)
+            
+            yield index, filename, min(size, BATCH_MAX_FILE_BYTES), load
+    
+    def parse(file_object):
+        # An unreadable file is an error record, not the dummy resume
+        try:
+            return analyze_upload(file_object, target_field, fallback=False)
+        finally:
+            # Free the spool as soon as its file is done
+            file_object.close()
+    
+    def generate():
+        from batch import parse_concurrently
+        started = time.perf_counter()
+        failures = 0
+        try:
+            for record in parse_concurrently(items(), parse, BATCH_CONCURRENCY, BATCH_MAX_INFLIGHT_BYTES):
+                if not record["ok"]:
+                    failures += 1
+                yield json.dumps(record) + "\n"
+        finally:
+            # Also runs when the client disconnects mid-stream
+            for _, spool in uploads:
+                spool.close()
+        elapsed = time.perf_counter() - started
+        yield json.dumps({
+            "summary": True,
+            "files": len(uploads),
+            "ok": len(uploads) - failures,
+            "errors": failures,
+            "elapsedMs": round(elapsed * 1000, 3)
+        }) + "\n"
+    
+    # Stream one JSON line per resume, in completion order
+    return Response(generate(), mimetype='application/x-ndjson')
+
+def parse_resume_bytes(data, filename="upload.pdf", target_field="Software Development", guest_defaults=True):
+    """Parse a resume held in memory or in a spooled temporary file.
+    
+    BytesIO shares the bytes rather than copying them.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        upload = io.BytesIO(data)
+        upload.name = filename
+    else:
+        upload = data
+        upload.filename = filename
+    response = analyze_upload(upload, target_field)
+    return apply_guest_defaults(response) if guest_defaults else response
+
+def handle_worker_job(job):
+    """Handle a single parse job sent to a long-lived worker."""
+    target_field = job.get("targetField") or "Software Development"
+    if "data" in job:
+        # Bytes streamed straight from the Node process
+        return parse_resume_bytes(job["data"], job.get("filename") or "upload.pdf", target_field)
+    # Fallback: the upload was written to a temporary file
+    return parse_resume_file(job["path"], target_field)
+
+def describe_worker():
+    """Status reported by a worker in answer to a health check."""
+    return {
+        "dbConnected": DB_POOL.connected,
+        "db": DB_POOL.status(),
+        "skills": len(ALL_SKILLS),
+        "catalogVersion": CATALOG.version,
+        "catalogSource": CATALOG.source,
+        "catalogDbVersion": catalog_db_version,
+        "resultSink": RESULT_SINK.stats() if PERSIST_RESULTS else None
+    }
+
+# Asyncio server (`--serve-async`): one process keeps many uploads in flight.
+# PDFs are read in a process pool and the rest of the CPU work runs on
+# threads, while database lookups wait on the network without holding either
+ASYNC_PDF_PROCESSES = int(os.environ.get('PARSER_ASYNC_PDF_PROCESSES', str(os.cpu_count() or 1)))
+# How long a request waits for a catalog lookup it started before using the catalog it has
+ASYNC_CATALOG_WAIT = float(os.environ.get('PARSER_ASYNC_CATALOG_WAIT_SECONDS', '0.5'))
+
+_pdf_executor = None
+_pdf_executor_pid = None
+
+def get_pdf_executor():
+    """Process pool reading uploads for the asyncio server, created on first use in each process.
+
+    None (the event loop's thread pool) when PARSER_ASYNC_PDF_PROCESSES is 0.
+    """
+    global _pdf_executor, _pdf_executor_pid
+    if ASYNC_PDF_PROCESSES <= 0:
+        return None
+    if _pdf_executor is None or _pdf_executor_pid != os.getpid():
+        _pdf_executor = ProcessPoolExecutor(max_workers=ASYNC_PDF_PROCESSES, mp_context=multiprocessing.get_context('fork'))
+        _pdf_executor_pid = os.getpid()
+    return _pdf_executor
+
+def read_upload_path(path):
+    """Executor-side: the text and page report of a PDF upload this process can open by path."""
+    pdf_report = {}
+    text = extract_text_from_pdf(path, pdf_report, fallback=False)
+    return text, pdf_report
+
+def read_upload_bytes(data, filename):
+    """Executor-side: the text of an upload's bytes and, for PDFs, the page report."""
+    upload = io.BytesIO(data)
+    upload.name = filename
+    pdf_report = {}
+    text = extract_text_from_pdf(upload, pdf_report, fallback=False)
+    return text, pdf_report
+
+async def read_upload_async(file):
+    loop = asyncio.get_running_loop()
+    filename = getattr(file, 'filename', None) or getattr(file, 'name', '') or ''
+    with track(STAGE_SECONDS, stage="extraction"):
+        path = shared_path(file)
+        if filename.lower().endswith('.txt'):
+            pdf_report = {}
+            text = await loop.run_in_executor(None, extract_text_from_pdf, file, pdf_report, False)
+        elif path is not None:
+            # Spooled to disk: the pool process maps the file itself, as the
+            # sync path does, instead of being sent a copy of its bytes
+            text, pdf_report = await loop.run_in_executor(get_pdf_executor(), read_upload_path, path)
+        else:
+            # Still in memory, so no larger than the spool threshold
+            file.seek(0)
+            data = await loop.run_in_executor(None, file.read)
+            text, pdf_report = await loop.run_in_executor(get_pdf_executor(), read_upload_bytes, data, filename)
+    if pdf_report:
+        PDF_PAGES.observe(pdf_report["pages"])
+        for skipped in pdf_report["skippedPages"]:
+            PDF_SKIPPED_PAGES.inc(reason=skipped["reason"])
+    return text, pdf_report
+
+async def fetch_catalog_version_async():
+    """fetch_catalog_version on ASYNC_DB_POOL."""
+    global CATALOG_VERSION_TABLE, catalog_checked_at
+    if not CATALOG_VERSION_TABLE:
+        rows = await ASYNC_DB_POOL.fetch(CATALOG_VERSION_EXISTS_QUERY)
+        if rows is None:
+            return None
+        if not rows[0][0]:
+            catalog_checked_at = time.monotonic()
+            return None
+        CATALOG_VERSION_TABLE = True
+    with track(DB_SECONDS, operation="version_query"):
+        rows = await ASYNC_DB_POOL.fetch(CATALOG_VERSION_QUERY)
+    if rows is None:
+        return None
+    catalog_checked_at = time.monotonic()
+    return rows[0][0] if rows else None
+
+async def fetch_catalog_async():
+    """fetch_skills_from_db and fetch_recommendations_from_db on ASYNC_DB_POOL, run concurrently."""
+    columns = DB_COLUMNS
+    if columns is None:
+        rows = await ASYNC_DB_POOL.fetch(COLUMNS_QUERY)
+        if rows is None:
+            return SKILLS, None
+        columns = remember_columns(columns_from_rows(rows))
+    
+    async def query(table, operation, sql):
+        if not columns[table]:
+            print(f"{table} table does not exist. Using fallback data.")
+            return None
+        with track(DB_SECONDS, operation=operation):
+            return await ASYNC_DB_POOL.fetch(sql)
+    
+    skill_rows, recommendation_rows = await asyncio.gather(
+        query("skills", "skills_query", skills_query(columns)),
+        query("recommended_skills", "recommendations_query", recommendations_query(columns))
+    )
+    db_skills = {category: skills for category, skills in skill_rows} if skill_rows else SKILLS
+    recommendations = recommendations_from_rows(recommendation_rows) if recommendation_rows is not None else None
+    return db_skills, recommendations
+
+async def refresh_catalog_async():
+    """Read catalog_version and reload the catalog if it moved (or only the built-in one is loaded)."""
+    global catalog_db_version
+    version = await fetch_catalog_version_async()
+    if CATALOG.source != "fallback" and (version is None or version == catalog_db_version):
+        return
+    db_skills, recommendations = await fetch_catalog_async()
+    # Compiling the matcher is CPU work; keep it off the event loop
+    if await asyncio.get_running_loop().run_in_executor(None, apply_catalog, db_skills, recommendations, "request"):
+        catalog_db_version = version
+
+# The catalog lookup in progress, shared by every request that finds one due
+catalog_lookup = None
+
+def start_catalog_lookup():
+    """Start (or join) a catalog check when the last one is older than the poll interval.
+
+    The refresh thread's polls count, so with it running requests seldom
+    check themselves. Returns the lookup task, or None if none is due.
+    """
+    global catalog_lookup
+    if catalog_lookup is not None and not catalog_lookup.done():
+        return catalog_lookup
+    if CATALOG_POLL_INTERVAL <= 0:
+        return None
+    if catalog_checked_at is not None and time.monotonic() - catalog_checked_at < CATALOG_POLL_INTERVAL:
+        return None
+    catalog_lookup = asyncio.ensure_future(refresh_catalog_async())
+    catalog_lookup.add_done_callback(report_catalog_lookup)
+    return catalog_lookup
+
+def report_catalog_lookup(task):
+    # Nobody awaits the lookup's result, so log its failure here
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Error refreshing skill catalog: {task.exception()}")
+
+# Parses in progress on this event loop by cache key, so identical uploads are parsed once
+async_parses = {}
+
+async def cached_async(key, compute):
+    """RESULT_CACHE.get_or_compute for a coroutine function."""
+    task = async_parses.get(key)
+    if task is not None:
+        CACHE_LOOKUPS.inc(result="coalesced")
+        return await asyncio.shield(task)
+    
+    async def lookup_or_compute():
+        loop = asyncio.get_running_loop()
+        value = await loop.run_in_executor(None, RESULT_CACHE.get, key)
+        if value is not None:
+            CACHE_LOOKUPS.inc(result="hit")
+            return value
+        CACHE_LOOKUPS.inc(result="miss")
+        value = await compute()
+        await loop.run_in_executor(None, RESULT_CACHE.put, key, value)
+        return value
+    
+    task = async_parses[key] = asyncio.ensure_future(lookup_or_compute())
+    task.add_done_callback(lambda _: async_parses.pop(key, None))
+    return await asyncio.shield(task)
+
+async def analyze_resume_async(file, target_field="Software Development"):
+    """analyze_resume for the asyncio server, overlapping database lookups with the CPU work.
+
+    A catalog check that is due starts before anything else, and runs
+    while the upload is hashed and read. The request waits at most
+    ASYNC_CATALOG_WAIT for it, then parses with whichever catalog is
+    current; a slow check carries on for later requests.
+    """
+    loop = asyncio.get_running_loop()
+    lookup = start_catalog_lookup()
+    with track(STAGE_SECONDS, stage="hash"):
+        content_hash, size = await loop.run_in_executor(None, hash_upload, file)
+    UPLOAD_BYTES.observe(size)
+    seed = int(content_hash[:16], 16) if DETERMINISTIC_SCORE else None
+    
+    reading = None
+    if lookup is not None:
+        # Read the upload while the database answers, even if the result turns out to be cached
+        reading = asyncio.ensure_future(read_upload_async(file))
+        await asyncio.wait([lookup], timeout=ASYNC_CATALOG_WAIT)
+    catalog = CATALOG
+    
+    async def compute():
+        text, pdf_report = await (reading or read_upload_async(file))
+        response = await loop.run_in_executor(None, analyze_text, text, target_field, catalog, seed)
+        response["contentHash"] = content_hash
+        if pdf_report:
+            response["pdf"] = pdf_report
+        return response
+    
+    try:
+        if not CACHE_ENABLED:
+            return await compute()
+        return dict(await cached_async(cache_key(content_hash, catalog.version, target_field), compute))
+    except ExtractionFailed as e:
+        return await loop.run_in_executor(None, fallback_response, e, target_field, catalog, seed, content_hash)
+    finally:
+        if reading is not None and not reading.done():
+            # Served from the cache; a read still queued for the pool is dropped
+            reading.cancel()
+
+async def analyze_upload_async(file, target_field="Software Development"):
+    """analyze_upload for the asyncio server: the same limits, errors and memory report."""
+    size = admit_upload(file)
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, UPLOAD_BUDGET.acquire, size, INFLIGHT_WAIT_SECONDS):
+        UPLOADS_REFUSED.inc(reason="inflight_bytes")
+        raise MemoryPressure("Too many large uploads are being parsed; try again shortly")
+    try:
+        memory = {}
+        with memory_report(memory):
+            response = await analyze_resume_async(file, target_field)
+        RSS_GROWTH.observe(max(0, memory["rssGrowthBytes"]))
+        response["memory"] = memory
+        if PERSIST_RESULTS and "extractionError" not in response:
+            record = result_record(response, target_field)
+            # A full queue is waited out on a thread, not the event loop
+            if not RESULT_SINK.put(record, timeout=0):
+                await loop.run_in_executor(None, RESULT_SINK.put, record)
+        return response
+    except MemoryError:
+        UPLOADS_REFUSED.inc(reason="out_of_memory")
+        raise MemoryPressure("Ran out of memory parsing this upload")
+    finally:
+        UPLOAD_BUDGET.release(size)
+
+def observe_async_request(path, status, seconds):
+    REQUEST_SECONDS.observe(seconds, endpoint=path, status=status)
+    REGISTRY.dump()
+
+# Served with `gunicorn -k asgi route:asgi_app` (see --serve-async)
+asgi_app = AsyncApp(MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES, observe=observe_async_request)
+# Only single uploads, the endpoint the asyncio server exists for, have an
+# asyncio handler; every other route is the Flask view, run on a thread
+asgi_app.mount_wsgi(app, BATCH_MAX_FILES * BATCH_MAX_FILE_BYTES)
+
+@asgi_app.route('/api/parse-resume', methods=['POST'])
+async def parse_resume_async(request):
+    ensure_catalog_refresh()
+    if 'file' not in request.files:
+        return json_response({"error": "No file provided"}, 400)
+    
+    file = request.files['file']
+    if file.filename == '':
+        return json_response({"error": "Empty file provided"}, 400)
+    
+    target_field = request.form.get('targetField', 'Software Development')
+    
+    try:
+        return json_response(await analyze_upload_async(file, target_field))
+    except UploadTooLarge as e:
+        return json_response({"error": str(e)}, 413)
+    except MemoryPressure as e:
+        return json_response({"error": str(e)}, 503, {"Retry-After": str(max(1, int(INFLIGHT_WAIT_SECONDS)))})
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+def close_async_resources():
+    RESULT_SINK.close()
+    ASYNC_DB_POOL.close()
+    if _pdf_executor is not None and _pdf_executor_pid == os.getpid():
+        _pdf_executor.shutdown(wait=False, cancel_futures=True)
+
+asgi_app.on_shutdown.append(close_async_resources)
+
+# Top-k search of indexed resumes for a job description. The index is built
+# offline with --index and reloaded here whenever the file changes
+SEARCH_INDEX_PATH = os.environ.get(
+    'PARSER_SEARCH_INDEX_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'resume_index.npz')
+)
+SEARCH_MAX_RESULTS = int(os.environ.get('PARSER_SEARCH_MAX_RESULTS', '100'))
+
+search_index = None
+search_index_mtime = None
+search_index_lock = threading.Lock()
+
+def get_search_index():
+    """The saved resume index, reloaded when the file on disk has changed; None if there is none."""
+    global search_index, search_index_mtime
+    try:
+        mtime = os.stat(SEARCH_INDEX_PATH).st_mtime_ns
+    except OSError:
+        return search_index
+    with search_index_lock:
+        if mtime != search_index_mtime:
+            with track(STAGE_SECONDS, stage="search_index_load"):
+                search_index = ResumeIndex.load(SEARCH_INDEX_PATH)
+            search_index_mtime = mtime
+            print(f"Loaded resume index with {len(search_index)} resumes")
+        return search_index
+
+def search_resumes(job_description, k=10, catalog=None):
+    """Rank indexed resumes against a job description's words and skills."""
+    index = get_search_index()
+    if index is None:
+        return []
+    skills = extract_skills(job_description, catalog or CATALOG)
+    with track(STAGE_SECONDS, stage="search"):
+        return index.search(job_description, skills, k)
+
+def index_resume_file(path, target_field="Software Development"):
+    """Parse a resume into the (id, terms, meta) the index stores; the id is its content hash.
+    
+    Raises ExtractionFailed for a file whose text can't be extracted, so it
+    is reported as an error instead of indexed as the dummy resume.
+    """
+    with open(path, 'rb') as file:
+        content_hash, _ = hash_upload(file)
+        text = extract_text_from_pdf(file, fallback=False)
+    response = analyze_text(text, target_field)
+    meta = {
+        "path": path,
+        "name": response["name"],
+        "email": response["email"],
+        "likelyField": response["likelyField"],
+        "experienceLevel": response["experienceLevel"],
+        "skills": response["skills"]
+    }
+    return content_hash, document_terms(text, response["skills"]), meta
+
+def _index_one(path):
+    try:
+        return path, index_resume_file(path), None
+    except Exception as e:
+        return path, None, str(e)
+
+def update_search_index(paths, deletions=(), jobs=None, index_path=SEARCH_INDEX_PATH):
+    """Add resumes to (and delete ids or files from) the saved index, parsing on a process pool."""
+    started = time.perf_counter()
+    index = ResumeIndex.load(index_path) if os.path.exists(index_path) else ResumeIndex()
+
+    deleted = 0
+    for doc_id in deletions:
+        # Accept the file itself as well as its id
+        if os.path.isfile(doc_id):
+            with open(doc_id, 'rb') as file:
+                doc_id = hash_upload(file)[0]
+        deleted += index.delete(doc_id)
+
+    added, errors = 0, []
+    paths = list(paths)
+    if paths:
+        settle_before_fork()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(processes=jobs or os.cpu_count() or 1) as pool:
+            for path, entry, error in pool.imap_unordered(_index_one, paths, chunksize=8):
+                if entry is None:
+                    errors.append({"path": path, "error": error})
+                    continue
+                index.add_terms(*entry)
+                added += 1
+
+    index.save(index_path)
+    return {
+        "added": added,
+        "deleted": deleted,
+        "errors": errors,
+        "index": index.stats(),
+        "path": index_path,
+        "elapsedSeconds": round(time.perf_counter() - started, 3)
+    }
+
+@app.route('/api/parse-resume/search', methods=['POST'])
+def search():
+    payload = request.get_json(silent=True) or request.form
+    job_description = (payload.get('jobDescription') or '').strip()
+    if not job_description:
+        return jsonify({"error": "No job description provided"}), 400
+    try:
+        k = min(int(payload.get('k') or 10), SEARCH_MAX_RESULTS)
+    except (TypeError, ValueError):
+        return jsonify({"error": "k must be an integer"}), 400
+    
+    try:
+        started = time.perf_counter()
+        results = search_resumes(job_description, k)
+        index = get_search_index()
+        return jsonify({
+            "results": results,
+            "indexedResumes": len(index) if index is not None else 0,
+            "elapsedMs": round((time.perf_counter() - started) * 1000, 3)
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Resume parser: one-shot CLI, persistent worker or Flask app")
+    parser.add_argument('paths', nargs='*',
+                        help="Resume file to parse and print as JSON; with --batch, files, directories, globs or - for a list on stdin")
+    parser.add_argument('--target-field', default='Software Development', help="Field used for skill recommendations")
+    parser.add_argument('--batch', action='store_true', help="Parse many resumes and stream one JSON line per file")
+    parser.add_argument('--jobs', type=int, default=None, help="Batch worker processes (default: CPU count)")
+    parser.add_argument('--chunksize', type=int, default=1, help="Files handed to a batch worker at a time")
+    parser.add_argument('--index', action='store_true',
+                        help="Parse the given resumes (files, directories, globs or - for stdin) into the search index")
+    parser.add_argument('--index-delete', nargs='+', default=[], metavar='ID_OR_FILE',
+                        help="Remove resumes from the search index by id (content hash) or file")
+    parser.add_argument('--search', metavar='TEXT',
+                        help="Print the best matching indexed resumes for a job description (@file to read it from a file)")
+    parser.add_argument('--top', type=int, default=10, help="Results returned by --search")
+    parser.add_argument('--serve', action='store_true',
+                        help="Run the production multi-process server configured by gunicorn.conf.py")
+    parser.add_argument('--serve-async', action='store_true',
+                        help="Run the asyncio server (gunicorn's ASGI worker) with the settings in gunicorn.conf.py")
+    parser.add_argument('--worker', action='store_true', help="Serve framed parse jobs on stdin, replying on --protocol-fd")
+    parser.add_argument('--max-jobs', type=int, default=int(os.environ.get('PARSER_WORKER_MAX_JOBS', '500')),
+                        help="Exit after this many jobs so the pool can recycle the worker (0 = never)")
+    parser.add_argument('--protocol-fd', type=int, default=3, help="File descriptor worker replies are written to")
+    parser.add_argument('--profile-import', action='store_true',
+                        help="Report import time per module and exit non-zero if startup exceeds the budget")
+    parser.add_argument('--import-budget-ms', type=float, default=None, help="Startup budget for --profile-import")
+    parser.add_argument('--refresh-catalog', action='store_true',
+                        help="Refresh the skill catalog snapshot from the database and exit")
+    parser.add_argument('--download-nltk-data', action='store_true',
+                        help="Download NLTK resources into the vendored data directory and exit")
+    return parser.parse_args(argv)
+
 # If script is called directly from command line, parse the file and output JSON
 if __name__ == '__main__':
-    if len(sys.argv) > 1:
-        # Get file path from command line argument
-        file_path = sys.argv[1]
+    args = parse_args(sys.argv[1:])
+    if args.profile_import:
+        from startup import print_import_profile, IMPORT_BUDGET_MS
+        sys.exit(print_import_profile(__file__, args.import_budget_ms or IMPORT_BUDGET_MS))
+    elif args.refresh_catalog:
+        ok = refresh_catalog()
+        print(json.dumps({"refreshed": ok, "version": CATALOG.version, "source": CATALOG.source, "skills": len(ALL_SKILLS)}))
+        sys.exit(0 if ok else 1)
+    elif args.download_nltk_data:
+        from startup import download_nltk_data
+        missing = download_nltk_data()
+        print(json.dumps({"missingNltkResources": missing}))
+        sys.exit(1 if missing else 0)
+    elif args.worker:
+        # Keep the catalog and DB pool warm and serve jobs until told to stop
+        from worker import run_worker
+        ensure_catalog_refresh()
+        sys.exit(run_worker(handle_worker_job, describe_worker, max_jobs=args.max_jobs, output_fd=args.protocol_fd))
+    elif args.index or args.index_delete:
+        from batch import iter_resume_paths
+        paths = iter_resume_paths(args.paths) if args.paths else []
+        # Parser logging goes to stderr so stdout is just the report
+        output, sys.stdout = sys.stdout, sys.stderr
+        load_catalog_once()
+        report = update_search_index(paths, args.index_delete, jobs=args.jobs)
+        output.write(json.dumps(report) + "\n")
+        sys.exit(1 if report["errors"] else 0)
+    elif args.search:
+        job_description = args.search
+        if job_description.startswith('@'):
+            with open(job_description[1:], 'r', encoding='utf-8') as f:
+                job_description = f.read()
+        output, sys.stdout = sys.stdout, sys.stderr
+        load_catalog_once()
+        output.write(json.dumps(search_resumes(job_description, args.top)) + "\n")
+    elif args.batch or len(args.paths) > 1:
+        from batch import iter_resume_paths, run_batch
+        load_catalog_once()
+        failures = run_batch(iter_resume_paths(args.paths or ['-']), parse_resume_file_raw,
+                             target_field=args.target_field, jobs=args.jobs, chunksize=args.chunksize,
+                             before_fork=settle_before_fork)
+        sys.exit(1 if failures else 0)
+    elif args.paths:
+        load_catalog_once()
         try:
-            # Open the file
-            with open(file_path, 'rb') as file:
-                # Extract text from PDF
-                text = extract_text_from_pdf(file)
-                
-                # Extract contact info
-                contact_info = extract_contact_info(text)
-                
-                # Extract skills
-                skills = extract_skills(text)
-                
-                # Determine experience level
-                experience_level = determine_experience_level(text)
-                
-                # Calculate score
-                score = calculate_score(skills, experience_level)
-                
-                # Default field 
-                likely_field = 'Software Development'
-                
-                # Get recommended skills
-                recommended_skills = recommend_skills(skills, likely_field)
-                
-                # Generate response
-                response = {
-                    "name": contact_info["name"] or "Guest User",
-                    "email": contact_info["email"] or "guest@example.com",
-                    "phone": contact_info["phone"] or "+1 (555) 123-4567",
-                    "skills": skills,
-                    "experienceLevel": experience_level,
-                    "score": score,
-                    "likelyField": likely_field,
-                    "matchConfidence": min(95, score + 5),
-                    "recommendedSkills": recommended_skills
-                }
-                
-                # Output JSON to stdout
-                print(json.dumps(response))
-                
+            # Output JSON to stdout
+            print(json.dumps(parse_resume_file(args.paths[0], args.target_field)))
         except Exception as e:
             print(json.dumps({"error": str(e)}))
             sys.exit(1)
+    elif args.serve:
+        # Preforked gunicorn server; reload gracefully with `kill -HUP <master pid>`
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        os.chdir(script_dir)
+        os.execvp(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'route:app'])
+    elif args.serve_async:
+        # One event loop per worker process instead of a thread per request
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        os.chdir(script_dir)
+        os.execvp(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                                   '--worker-class', 'asgi', '--threads', '1', 'route:asgi_app'])
     else:
-        # If no arguments, run as Flask app
-        app.run(debug=True, port=5000) 
\ No newline at end of file
+        # If no arguments, run as Flask development server
+        app.run(debug=True, port=5000)
@@ -1,9 +1,38 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { spawn } from 'child_process';
 import path from 'path';
-import fs from 'fs';
+import { promises as fsp } from 'fs';
 import os from 'os';
 import { v4 as uuidv4 } from 'uuid';
+import { getResumeParserPool, ParserJobError, uploadPayload } from '@/lib/resume-parser-pool';
+
+// Set RESUME_PARSER_USE_TEMP_FILES=1 to pass uploads to the parser via temp files
+const USE_TEMP_FILES = process.env.RESUME_PARSER_USE_TEMP_FILES === '1';
+
+// Uploads over this size are refused before they are read (keep in line with PARSER_MAX_UPLOAD_BYTES)
+const MAX_UPLOAD_BYTES = parseInt(process.env.RESUME_PARSER_MAX_UPLOAD_BYTES || '', 10) || 20 * 1024 * 1024;
+// Room for the multipart boundaries and form fields around the file
+const MULTIPART_OVERHEAD_BYTES = 64 * 1024;
+
+// Where in the resume text a result was found
+interface ResumeLocation {
+  section: string;
+  line: number;
+  offset: number;
+}
+
+interface ResumeSection {
+  name: string;
+  start: number;
+  end: number;
+  line: number;
+}
+
+interface ResumeLocations {
+  email?: ResumeLocation | null;
+  phone?: ResumeLocation | null;
+  experienceLevel?: ResumeLocation | null;
+  skills?: Record<string, ResumeLocation>;
+}
 
 // Interface for resume data
 interface ParsedResumeData {
@@ -11,18 +40,28 @@ interface ParsedResumeData {
   email?: string;
   phone?: string;
   skills?: string[];
+  categorizedSkills?: Record<string, string[]>;
   experienceLevel?: string;
   score?: number;
   likelyField?: string;
   matchConfidence?: number;
+  fieldMatches?: { field: string; confidence: number }[];
   recommendedSkills?: string[];
-  [key: string]: string | string[] | number | undefined; 
+  sections?: ResumeSection[];
+  locations?: ResumeLocations;
+  [key: string]: string | string[] | number | Record<string, string[]> | { field: string; confidence: number }[] | ResumeSection[] | ResumeLocations | undefined; 
 }
 
 export async function POST(request: NextRequest) {
   try {
     console.log("Resume parser API called");
     
+    // Refuse oversized bodies before formData() buffers them
+    const contentLength = Number(request.headers.get('content-length') || 0);
+    if (contentLength > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES) {
+      return uploadTooLarge();
+    }
+    
     // Extract form data
     const formData = await request.formData();
     const file = formData.get('resume') as File;
@@ -35,104 +74,41 @@ export async function POST(request: NextRequest) {
       );
     }
 
+    if (file.size > MAX_UPLOAD_BYTES) {
+      return uploadTooLarge();
+    }
+
     console.log("Processing resume");
 
     try {
-      // Save uploaded file to temp directory
-      const bytes = await file.arrayBuffer();
-      const buffer = Buffer.from(bytes);
-      
-      // Create a temporary file path
-      const tempDir = os.tmpdir();
-      const tempFilePath = path.join(tempDir, `${uuidv4()}.pdf`);
-      
-      // Write the file to disk
-      fs.writeFileSync(tempFilePath, buffer);
-      console.log(`File saved to ${tempFilePath}`);
-
       try {
-        // Using a direct Python command that imports our database-connected functions
-        console.log("Starting Python parser process with database connection");
+        // Hand the bytes to a warm parser worker; no temp file unless explicitly requested
+        console.log("Sending resume to Python parser pool");
         
-        const pythonProcess = spawn('python', [
-          path.join(process.cwd(), 'app/api/parse-resume/route.py'),
-          tempFilePath
-        ]);
-
-        let result = '';
-        let errorOutput = '';
-        
-        // Collect stdout data
-        pythonProcess.stdout.on('data', (data) => {
-          result += data.toString();
-          console.log(`Python stdout: ${data}`);
-        });
+        const result = USE_TEMP_FILES
+          ? await parseViaTempFile(Buffer.from(await file.arrayBuffer()))
+          : await getResumeParserPool().parse({ data: await uploadPayload(file), filename: file.name || 'resume.pdf' });
+        if (result.error) {
+          throw new Error(String(result.error));
+        }
         
-        // Collect stderr data
-        pythonProcess.stderr.on('data', (data) => {
-          errorOutput += data.toString();
-          console.error(`Python stderr: ${data}`);
-        });
-
-        // Handle completion
-        const parseData = await new Promise<ParsedResumeData>((resolve, reject) => {
-          pythonProcess.on('close', (code) => {
-            // Clean up temporary file
-            try {
-              fs.unlinkSync(tempFilePath);
-              console.log("Temporary file deleted");
-            } catch (err) {
-              console.error('Error deleting temp file:', err);
-            }
-
-            // Handle process exit code
-            if (code === 0 && result.trim()) {
-              try {
-                // Handle case where result might contain text before or after JSON
-                const jsonStartIndex = result.indexOf('{');
-                const jsonEndIndex = result.lastIndexOf('}') + 1;
-                
-                if (jsonStartIndex >= 0 && jsonEndIndex > jsonStartIndex) {
-                  const jsonStr = result.substring(jsonStartIndex, jsonEndIndex);
-                  console.log("Extracted JSON:", jsonStr);
-                  
-                  const parsedData = JSON.parse(jsonStr);
-                  
-                  if (parsedData.error) {
-                    console.error('Python script returned error:', parsedData.error);
-                    reject(new Error(parsedData.error));
-                    return;
-                  }
-                  
-                  // Enhance data with additional fields if needed
-                  const enhancedData = enhanceResumeData(parsedData);
-                  console.log("Successfully parsed resume data:", enhancedData);
-                  resolve(enhancedData);
-                } else {
-                  console.error('Invalid JSON output:', result);
-                  reject(new Error('Invalid JSON output from Python script'));
-                }
-              } catch (err) {
-                console.error('Error parsing Python output:', err, "Raw output:", result);
-                reject(new Error('Failed to parse Python script output'));
-              }
-            } else {
-              console.error(`Python script exited with code ${code}`);
-              console.error(`Error output: ${errorOutput}`);
-              reject(new Error(`Python script failed: ${errorOutput}`));
-            }
-          });
-
-          // Handle process errors
-          pythonProcess.on('error', (err) => {
-            console.error("Python process error:", err);
-            reject(err);
-          });
-        });
+        // Enhance data with additional fields if needed
+        const parseData = enhanceResumeData(result as ParsedResumeData);
+        console.log("Successfully parsed resume data:", parseData);
 
         console.log("Resume parsed successfully with database integration");
         return NextResponse.json(parseData);
       } catch (pythonError) {
+        // The parser refused the upload to protect its memory; say so rather than invent a result
+        if (pythonError instanceof ParserJobError && pythonError.type === 'UploadTooLarge') {
+          return uploadTooLarge();
+        }
+        if (pythonError instanceof ParserJobError && pythonError.type === 'MemoryPressure') {
+          return NextResponse.json(
+            { error: 'The resume parser is busy, please try again shortly' },
+            { status: 503, headers: { 'Retry-After': '10' } }
+          );
+        }
         console.error("Python execution error:", pythonError);
         // Fall through to the backup parser
       }
@@ -160,6 +136,25 @@ export async function POST(request: NextRequest) {
   }
 }
 
+function uploadTooLarge() {
+  return NextResponse.json(
+    { error: `Resume exceeds the ${MAX_UPLOAD_BYTES} byte limit` },
+    { status: 413 }
+  );
+}
+
+// Fallback transport: write the upload to a temp file and pass its path
+async function parseViaTempFile(buffer: Buffer) {
+  const tempFilePath = path.join(os.tmpdir(), `${uuidv4()}.pdf`);
+  await fsp.writeFile(tempFilePath, buffer);
+  console.log(`File saved to ${tempFilePath}`);
+  try {
+    return await getResumeParserPool().parse(tempFilePath);
+  } finally {
+    fsp.unlink(tempFilePath).catch((err) => console.error('Error deleting temp file:', err));
+  }
+}
+
 // Function to enhance parsed resume data
 function enhanceResumeData(parsedData: ParsedResumeData): ParsedResumeData {
   // Add any additional processing needed
@@ -0,0 +1,131 @@
+import bisect
+
+# Heading spellings for each section, matched against the lowercase text
+SECTION_HEADINGS = {
+    'summary': ('summary', 'professional summary', 'career summary', 'profile', 'professional profile',
+                'objective', 'career objective', 'about me', 'about'),
+    'skills': ('skills', 'technical skills', 'key skills', 'core skills', 'skills and tools', 'core competencies',
+               'competencies', 'technologies', 'tech stack', 'tools', 'tools and technologies',
+               'technical proficiencies', 'expertise', 'areas of expertise', 'programming languages', 'languages'),
+    'experience': ('experience', 'work experience', 'professional experience', 'relevant experience', 'employment',
+                   'employment history', 'work history', 'career history', 'professional background'),
+    'projects': ('projects', 'personal projects', 'key projects', 'selected projects', 'side projects'),
+    'education': ('education', 'academic background', 'qualifications', 'academic qualifications',
+                  'education and training'),
+    'certifications': ('certifications', 'certificates', 'licenses', 'licenses and certifications', 'courses',
+                       'training'),
+    'contact': ('contact', 'contact information', 'contact details', 'personal details', 'personal information'),
+    'awards': ('awards', 'honors', 'honours', 'achievements'),
+    'publications': ('publications',),
+    'volunteering': ('volunteering', 'volunteer experience'),
+    'interests': ('interests', 'hobbies', 'hobbies and interests'),
+    'references': ('references',)
+}
+
+# Text before the first heading: usually the name, title and contact details
+HEADER = 'header'
+
+_SECTION_OF = {heading: name for name, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# A heading is a line of its own, optionally bulleted or underlined, or the
+# start of a line up to a colon ("Skills: Python, Go")
+HEADING_MARKS = ' \t\r#*-=|•>'
+# Longer lines are only checked up to a colon within this many characters
+MAX_HEADING_LENGTH = 48
+
+
+class SectionIndex:
+    """Offsets of a resume's sections, found in one pass over the text.
+
+    Each section runs from its heading line to the next heading; the text
+    before the first heading is the "header" section. Sections come in text
+    order as (name, start, end) and together cover the whole text. A name
+    can appear more than once, e.g. two experience headings.
+    """
+
+    __slots__ = ('sections', 'length', '_starts', '_headed')
+
+    def __init__(self, sections, length):
+        self.sections = sections
+        self.length = length
+        self._starts = [start for _, start, _ in sections]
+        self._headed = {name for name, _, _ in sections if name != HEADER}
+
+    def __iter__(self):
+        return iter(self.sections)
+
+    def __len__(self):
+        return len(self.sections)
+
+    def __contains__(self, name):
+        return any(section == name for section, _, _ in self.sections)
+
+    def section_at(self, offset):
+        """Name of the section containing offset."""
+        index = bisect.bisect_right(self._starts, offset) - 1
+        return self.sections[index][0] if index >= 0 else HEADER
+
+    def spans(self, names, fallback=True):
+        """(start, end) spans of the named sections, in text order.
+
+        With fallback, a document with no heading for any of the names gives
+        the whole text instead, so an extractor never loses text the
+        segmenter couldn't place.
+        """
+        if fallback and self._headed.isdisjoint(names):
+            return [(0, self.length)] if self.length else []
+        return _merge([(start, end) for name, start, end in self.sections if name in names])
+
+    def spans_except(self, names):
+        """(start, end) spans of every section but the named ones, in text order."""
+        return _merge([(start, end) for name, start, end in self.sections if name not in names])
+
+
+def _merge(spans):
+    """Join spans that touch, so adjacent sections are scanned as one."""
+    merged = []
+    for start, end in spans:
+        if merged and merged[-1][1] == start:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def heading_name(line):
+    """Section name a lowercase line is a heading for, or None."""
+    colon = line.find(':')
+    return _SECTION_OF.get((line if colon < 0 else line[:colon]).strip(HEADING_MARKS))
+
+
+def find_headings(lowered, line_starts):
+    """Yield (section name, offset) for each heading line, in text order.
+
+    Lines are looked up whole in the heading table rather than matched
+    against a regex of every spelling, which costs a dictionary lookup per
+    short line and a bounded find() per long one.
+    """
+    find = lowered.find
+    ends = iter(line_starts[1:])
+    for start in line_starts:
+        end = next(ends, len(lowered) + 1) - 1
+        if end - start > MAX_HEADING_LENGTH:
+            end = find(':', start, start + MAX_HEADING_LENGTH)
+            if end < 0:
+                continue
+        name = heading_name(lowered[start:end])
+        if name is not None:
+            yield name, start
+
+
+def segment(lowered, line_starts):
+    """Split lowercase resume text into a SectionIndex at its headings."""
+    sections = []
+    name, start = HEADER, 0
+    for heading, offset in find_headings(lowered, line_starts):
+        if offset > start or name != HEADER:
+            sections.append((name, start, offset))
+        name, start = heading, offset
+    if lowered:
+        sections.append((name, start, len(lowered)))
+    return SectionIndex(sections, len(lowered))
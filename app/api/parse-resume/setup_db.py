@@ -3,6 +3,8 @@ import psycopg2
 from psycopg2 import pool
 from dotenv import load_dotenv
 
+from catalog_loader import load_catalog, read_sql_seed
+
 # Database connection parameters (from environment or hardcoded)
 DB_CONFIG = {
     "user": "postgres.xciyawumdtwyydelhclv",
@@ -12,6 +14,9 @@ DB_CONFIG = {
     "dbname": "postgres"
 }
 
+# Seed data for the skills and recommended_skills tables
+SEED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db_setup.sql')
+
 def setup_database():
     """Setup the database schema and initial data"""
     conn = None
@@ -26,150 +31,19 @@ def setup_database():
             dbname=DB_CONFIG["dbname"]
         )
         
-        # Create a cursor
-        cursor = conn.cursor()
-        
-        # Check if skills table already exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'public'
-                AND table_name = 'skills'
-            );
-        """)
-        
-        skills_table_exists = cursor.fetchone()[0]
-        skill_column = 'skill_name'
-        category_column = 'category'
-        
-        if skills_table_exists:
-            # Check the columns in the skills table
-            cursor.execute("""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_schema = 'public'
-                AND table_name = 'skills';
-            """)
-            
-            columns = [col[0] for col in cursor.fetchall()]
-            print(f"Existing skills table columns: {columns}")
-            
-            # Determine the skill and category column names
-            if 'name' in columns:
-                skill_column = 'name'
-            if 'type' in columns and 'category' not in columns:
-                category_column = 'type'
-                
-            print(f"Using column names: {skill_column} for skill and {category_column} for category")
-        
-        # Check if recommended_skills table exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_schema = 'public'
-                AND table_name = 'recommended_skills'
-            );
-        """)
-        
-        recommended_skills_exists = cursor.fetchone()[0]
-        rec_skill_column = 'skill_name'
-        priority_column = 'priority'
-        
-        if recommended_skills_exists:
-            # Check the columns in the recommended_skills table
-            cursor.execute("""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_schema = 'public'
-                AND table_name = 'recommended_skills';
-            """)
-            
-            rec_columns = [col[0] for col in cursor.fetchall()]
-            print(f"Existing recommended_skills table columns: {rec_columns}")
-            
-            # Determine the skill and priority column names
-            if 'name' in rec_columns:
-                rec_skill_column = 'name'
-            if 'importance' in rec_columns and 'priority' not in rec_columns:
-                priority_column = 'importance'
-                
-            print(f"Using column names: {rec_skill_column} for recommended skill and {priority_column} for priority")
-        
-        # Create skills table if it doesn't exist
-        if not skills_table_exists:
-            print("Creating skills table...")
-            cursor.execute(f"""
-                CREATE TABLE IF NOT EXISTS skills (
-                    id SERIAL PRIMARY KEY,
-                    {skill_column} VARCHAR(100) NOT NULL UNIQUE,
-                    {category_column} VARCHAR(50) NOT NULL,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-        
-        # Create recommended_skills table if it doesn't exist
-        if not recommended_skills_exists:
-            print("Creating recommended_skills table...")
-            cursor.execute(f"""
-                CREATE TABLE IF NOT EXISTS recommended_skills (
-                    id SERIAL PRIMARY KEY,
-                    {rec_skill_column} VARCHAR(100) NOT NULL,
-                    field VARCHAR(50) NOT NULL,
-                    {priority_column} INTEGER DEFAULT 0,
-                    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
-                    UNIQUE({rec_skill_column}, field)
-                )
-            """)
-        
-        # Insert skills data
-        print("Inserting skills data...")
-        # Sample skills to insert (shortened for brevity)
-        skills_data = [
-            ('JavaScript', 'programming_languages'),
-            ('Python', 'programming_languages'),
-            ('React', 'web_technologies'),
-            ('Node.js', 'web_technologies'),
-            ('SQL', 'databases'),
-            ('AWS', 'cloud_platforms'),
-            ('Machine Learning', 'data_science'),
-            ('Git', 'tools')
-        ]
-        
-        # Insert each skill
-        for skill, category in skills_data:
-            try:
-                cursor.execute(f"""
-                    INSERT INTO skills ({skill_column}, {category_column})
-                    VALUES (%s, %s)
-                    ON CONFLICT ({skill_column}) DO NOTHING
-                """, (skill, category))
-            except Exception as e:
-                print(f"Error inserting skill {skill}: {e}")
-        
-        # Insert recommended skills data
-        print("Inserting recommended skills data...")
-        # Sample recommended skills (shortened for brevity)
-        rec_skills_data = [
-            ('Docker', 'Software Development', 10),
-            ('TypeScript', 'Web Development', 9),
-            ('TensorFlow', 'Data Science', 8)
-        ]
-        
-        # Insert each recommended skill
-        for skill, field, priority in rec_skills_data:
-            try:
-                cursor.execute(f"""
-                    INSERT INTO recommended_skills ({rec_skill_column}, field, {priority_column})
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT ({rec_skill_column}, field) DO NOTHING
-                """, (skill, field, priority))
-            except Exception as e:
-                print(f"Error inserting recommended skill {skill}: {e}")
-        
-        # Commit the changes
-        conn.commit()
+        # Load the full catalog from the seed file in one transaction; the
+        # loader detects the column names and creates tables and indexes
+        skills, recommendations = read_sql_seed(SEED_PATH)
+        print(f"Loading {len(skills)} skills and {len(recommendations)} recommended skills from {SEED_PATH}...")
+        report = load_catalog(conn, skills, recommendations)
+        columns = report["columns"]
+        print(f"Using column names: {columns['skill']} for skill and {columns['category']} for category")
+        print(f"Loaded {report['skills'] + report['recommendations']} rows in {report['seconds']}s "
+              f"({report['rowsPerSecond']} rows/s)")
         print("Database setup completed successfully!")
         
+        cursor = conn.cursor()
+        
         # Verify data
         cursor.execute(f"SELECT COUNT(*) FROM skills")
         skill_count = cursor.fetchone()[0]
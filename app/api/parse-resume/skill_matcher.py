@@ -0,0 +1,118 @@
+import re
+
+# Marks the end of a skill inside the trie
+_END = ''
+
+
+def _is_word_char(ch):
+    """Same notion of a word character as \\w in the old per-skill regexes."""
+    return ch.isalnum() or ch == '_'
+
+
+class SkillMatcher:
+    """Finds every catalog skill in a text with a single pass.
+
+    The catalog is compiled once into a character trie. One precompiled
+    regex finds the positions where a skill may start, and the trie is
+    walked from each of them, so the cost grows with the text rather than
+    with the number of skills.
+
+    Matching is case-insensitive and whole-word: a skill edge that is a word
+    character must not touch another word character ("Java" does not match
+    inside "JavaScript", "R" does not match inside "React"). Edges made of
+    symbols, like the "++" in "C++" or the "." in ".NET", have no word to
+    break, so "C++," and "asp.net" match as expected.
+    """
+
+    def __init__(self, skills):
+        self.skills = []
+        self._order = {}
+        self._trie = {}
+        word_starts = set()
+        symbol_starts = set()
+
+        for skill in skills:
+            key = skill.lower()
+            if not key or key in self._order:
+                # Keep the first spelling when the catalog lists a skill twice
+                continue
+            self._order[key] = len(self.skills)
+            self.skills.append(skill)
+
+            node = self._trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[_END] = skill
+
+            if _is_word_char(key[0]):
+                word_starts.add(key[0])
+            else:
+                symbol_starts.add(key[0])
+
+        alternatives = []
+        if word_starts:
+            alternatives.append(r'(?<!\w)[' + ''.join(re.escape(ch) for ch in sorted(word_starts)) + ']')
+        if symbol_starts:
+            alternatives.append('[' + ''.join(re.escape(ch) for ch in sorted(symbol_starts)) + ']')
+        self._start_pattern = re.compile('|'.join(alternatives)) if alternatives else None
+
+    def __len__(self):
+        return len(self.skills)
+
+    def finditer(self, text, lowered=None, spans=None):
+        """Yield (start, end, skill) for every match, in text order.
+
+        Overlapping skills are all reported, e.g. both "React" and
+        "React Native". Offsets index into text.lower(), which has the same
+        length as text for everything but a handful of exotic characters.
+        Pass lowered when the caller already has text.lower() at hand, and
+        spans, ordered (start, end) pairs, to scan only those parts of the
+        text; a skill can't run past the end of its span.
+        """
+        if self._start_pattern is None:
+            return
+        if lowered is None:
+            lowered = text.lower()
+        trie = self._trie
+
+        for span_start, length in (spans if spans is not None else [(0, len(lowered))]):
+            for start_match in self._start_pattern.finditer(lowered, span_start, length):
+                start = start_match.start()
+                node = trie
+                pos = start
+                while pos < length:
+                    node = node.get(lowered[pos])
+                    if node is None:
+                        break
+                    pos += 1
+                    skill = node.get(_END)
+                    if skill is not None and (
+                        pos == length
+                        or not _is_word_char(lowered[pos - 1])
+                        or not _is_word_char(lowered[pos])
+                    ):
+                        yield start, pos, skill
+
+    def find_skills(self, text, lowered=None, spans=None):
+        """Return the distinct skills found in text, in catalog order."""
+        found = {skill for _, _, skill in self.finditer(text, lowered, spans)}
+        return sorted(found, key=lambda skill: self._order[skill.lower()])
+
+    def first_offsets(self, text, lowered=None, spans=None):
+        """Return {skill: offset of its first match} in catalog order."""
+        first = {}
+        for start, _, skill in self.finditer(text, lowered, spans):
+            if skill not in first:
+                first[skill] = start
+        return {skill: first[skill] for skill in sorted(first, key=lambda s: self._order[s.lower()])}
+
+    def match(self, text, lowered=None, spans=None):
+        """Return {skill: {"count": n, "offsets": [[start, end], ...]}} in catalog order."""
+        matches = {}
+        for start, end, skill in self.finditer(text, lowered, spans):
+            entry = matches.get(skill)
+            if entry is None:
+                entry = matches[skill] = {"count": 0, "offsets": []}
+            entry["count"] += 1
+            entry["offsets"].append([start, end])
+        return {skill: matches[skill] for skill in sorted(matches, key=lambda s: self._order[s.lower()])}
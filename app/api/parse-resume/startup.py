@@ -0,0 +1,117 @@
+import importlib
+import json
+import os
+import subprocess
+import sys
+
+# NLTK data ships with the service instead of being downloaded at import
+# time, so air-gapped pods start without touching the network
+NLTK_DATA_DIR = os.environ.get(
+    'PARSER_NLTK_DATA',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nltk_data')
+)
+
+# Resource name -> path inside the data directory, as nltk.data.find expects
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger'
+}
+
+# Startup budget checked by --profile-import
+IMPORT_BUDGET_MS = float(os.environ.get('PARSER_IMPORT_BUDGET_MS', '1500'))
+
+_loaded_modules = {}
+
+
+def missing_nltk_resources(data_dir=NLTK_DATA_DIR):
+    """Return the NLTK resources that are not present in the vendored data directory."""
+    missing = []
+    for name, resource_path in NLTK_RESOURCES.items():
+        full_path = os.path.join(data_dir, resource_path)
+        if not (os.path.exists(full_path) or os.path.exists(full_path + '.zip')):
+            missing.append(name)
+    return missing
+
+
+def download_nltk_data(data_dir=NLTK_DATA_DIR):
+    """Download the NLTK resources into the vendored data directory (run at build time)."""
+    import nltk
+    os.makedirs(data_dir, exist_ok=True)
+    for name in missing_nltk_resources(data_dir):
+        nltk.download(name, download_dir=data_dir)
+    return missing_nltk_resources(data_dir)
+
+
+def load_module(name):
+    """Import a heavy module the first time a feature actually needs it."""
+    module = _loaded_modules.get(name)
+    if module is None:
+        module = importlib.import_module(name)
+        _loaded_modules[name] = module
+    return module
+
+
+def parse_importtime(stderr_output, max_depth=1):
+    """Turn `python -X importtime` output into {module: cumulative_ms}.
+
+    Only modules up to max_depth levels below the imported statement are
+    kept, which is enough to see what the parser pulls in directly.
+    """
+    timings = {}
+    for line in stderr_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, module = line.split(':', 1)[1].split('|')
+        # Nested imports are indented by two spaces per level
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        if depth > max_depth:
+            continue
+        timings[module.strip()] = int(cumulative_us) / 1000.0
+    return timings
+
+
+def profile_imports(script_path, budget_ms=IMPORT_BUDGET_MS, extra_modules=('PyPDF2', 'nltk', 'sklearn', 'psycopg2')):
+    """Measure startup import cost in a fresh interpreter and compare it to the budget.
+
+    The parser module itself is imported the way the worker and CLI modes
+    import it. Optional heavy modules are timed separately so the report
+    shows what lazy loading saves.
+    """
+    script_dir = os.path.dirname(os.path.abspath(script_path))
+    module_name = os.path.splitext(os.path.basename(script_path))[0]
+
+    def measure(statement):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', statement],
+            cwd=script_dir, capture_output=True, text=True
+        )
+        return parse_importtime(result.stderr), result.returncode
+
+    startup, returncode = measure(f"import {module_name}")
+    startup_ms = startup.get(module_name)
+    if startup_ms is None:
+        startup_ms = sum(startup.values())
+
+    lazy = {}
+    for name in extra_modules:
+        timings, code = measure(f"import {name}")
+        lazy[name] = timings.get(name) if code == 0 else None
+
+    return {
+        "module": module_name,
+        "importOk": returncode == 0,
+        "startupMs": round(startup_ms, 3),
+        "budgetMs": budget_ms,
+        "withinBudget": returncode == 0 and startup_ms <= budget_ms,
+        "modules": {name: round(ms, 3) for name, ms in sorted(startup.items(), key=lambda item: -item[1])},
+        "lazyModules": {name: (round(ms, 3) if ms is not None else None) for name, ms in lazy.items()},
+        "missingNltkResources": missing_nltk_resources()
+    }
+
+
+def print_import_profile(script_path, budget_ms=IMPORT_BUDGET_MS):
+    """CLI entry point for --profile-import. Returns the process exit code."""
+    report = profile_imports(script_path, budget_ms)
+    print(json.dumps(report, indent=2))
+    return 0 if report["withinBudget"] else 1
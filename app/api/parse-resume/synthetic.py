@@ -0,0 +1,142 @@
+import random
+
+# Building blocks for made-up skill names, so catalogs can be grown far past
+# the real one without repeating entries
+_SYLLABLES = ['ka', 'lo', 'mi', 'ver', 'tra', 'zen', 'qua', 'rix', 'dor', 'pel', 'sun', 'bex', 'nor', 'vi', 'gal']
+_SUFFIXES = ['', '', '', '.js', 'DB', ' Cloud', ' Studio', '++', ' ML', ' API']
+
+_FILLER = (
+    "designed built maintained shipped improved migrated reviewed mentored owned led the a an and with for "
+    "team service platform pipeline feature customers production latency reliability release project internal "
+    "tooling dashboards reports stakeholders roadmap quarterly delivery quality"
+).split()
+
+_FIELDS = ["Software Development", "Data Science", "Web Development", "DevOps", "Mobile Development"]
+
+_FIRST_NAMES = ['Jane', 'John', 'Priya', 'Wei', 'Amara', 'Lucas', 'Sofia', 'Omar']
+_LAST_NAMES = ['Doe', 'Smith', 'Patel', 'Chen', 'Okafor', 'Silva', 'Rossi', 'Haddad']
+
+
+def make_skill_names(count, seed=0, base=()):
+    """Return count distinct skill names: base first, then generated ones."""
+    rng = random.Random(seed)
+    names = []
+    seen = set()
+    for name in base:
+        if len(names) >= count:
+            return names
+        if name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    while len(names) < count:
+        word = ''.join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        name = word + rng.choice(_SUFFIXES)
+        if rng.random() < 0.2:
+            name += ' ' + ''.join(rng.choice(_SYLLABLES) for _ in range(2)).capitalize()
+        if name.lower() not in seen:
+            seen.add(name.lower())
+            names.append(name)
+    return names
+
+
+def make_catalog(skill_count, seed=0, base_skills=None, categories=6, fields=5, per_field=40):
+    """Synthetic (skills_by_category, recommendations) shaped like the database tables.
+
+    base_skills ({category: [skill, ...]}) are kept at the front so small
+    catalogs look like the real one.
+    """
+    rng = random.Random(seed)
+    base_skills = base_skills or {}
+    base = [skill for skills in base_skills.values() for skill in skills]
+    names = make_skill_names(skill_count, seed, base)
+
+    category_names = list(base_skills)
+    while len(category_names) < categories:
+        category_names.append(f"category_{len(category_names)}")
+    base_category = {skill.lower(): category for category, skills in base_skills.items() for skill in skills}
+
+    skills_by_category = {category: [] for category in category_names}
+    for name in names:
+        category = base_category.get(name.lower()) or rng.choice(category_names)
+        skills_by_category[category].append(name)
+    skills_by_category = {category: skills for category, skills in skills_by_category.items() if skills}
+
+    recommendations = {}
+    for index in range(fields):
+        field = _FIELDS[index] if index < len(_FIELDS) else f"Field {index}"
+        picks = rng.sample(names, min(per_field, len(names)))
+        recommendations[field] = [[skill, rng.randint(1, 10)] for skill in picks]
+    return skills_by_category, recommendations
+
+
+def make_resume_text(skills, words=400, skill_density=0.05, seed=0):
+    """A plain-text resume of about `words` words, `skill_density` of them catalog skills."""
+    rng = random.Random(seed)
+    first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+    lines = [
+        f"{first} {last}",
+        f"Email: {first.lower()}.{last.lower()}@example.com",
+        f"Phone: (555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        "",
+        "SUMMARY",
+        f"{rng.choice(['Senior', 'Junior', 'Staff', ''])} engineer with {rng.randint(1, 15)} years of experience.".strip(),
+        "",
+        "EXPERIENCE"
+    ]
+    written = 0
+    while written < words:
+        line_words = []
+        for _ in range(rng.randint(8, 16)):
+            if skills and rng.random() < skill_density:
+                line_words.append(rng.choice(skills) + rng.choice(['', ',', '']))
+            else:
+                line_words.append(rng.choice(_FILLER))
+        written += len(line_words)
+        lines.append("- " + " ".join(line_words))
+    lines += ["", "SKILLS", ", ".join(rng.sample(skills, min(10, len(skills))))]
+    return "\n".join(lines) + "\n"
+
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_resume_pdf(text, lines_per_page=50):
+    """Render text into a minimal multi-page PDF (Helvetica, no dependencies) and return its bytes."""
+    text_lines = text.encode('latin-1', 'replace').decode('latin-1').split('\n')
+    pages = [text_lines[i:i + lines_per_page] for i in range(0, len(text_lines), lines_per_page)] or [[]]
+
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then a page and a content stream per page
+    objects = {}
+    page_ids = []
+    for index, page_lines in enumerate(pages):
+        page_id = 4 + index * 2
+        content_id = page_id + 1
+        page_ids.append(page_id)
+        ops = ["BT", "/F1 10 Tf", "14 TL", "50 770 Td"]
+        for line in page_lines:
+            ops.append(f"({_pdf_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode('latin-1')
+        objects[content_id] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        objects[page_id] = (
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode('latin-1')
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[2] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode('latin-1')
+    objects[3] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(out)
+        out += b"%d 0 obj\n" % number + objects[number] + b"\nendobj\n"
+    xref_at = len(out)
+    count = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % count
+    for number in range(1, count):
+        out += b"%010d 00000 n \n" % offsets[number]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref_at)
+    return bytes(out)
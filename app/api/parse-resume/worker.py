@@ -0,0 +1,155 @@
+import json
+import os
+import signal
+import struct
+import sys
+import time
+
+from ingest import SPOOL_BYTES, spool_stream
+
+# Every message is a 4-byte big-endian length followed by a UTF-8 JSON body
+FRAME_HEADER = struct.Struct('>I')
+
+# Refuse absurd frames and payloads instead of trying to allocate them
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+MAX_PAYLOAD_SIZE = int(os.environ.get('PARSER_WORKER_MAX_UPLOAD', str(64 * 1024 * 1024)))
+
+
+def read_exact(stream, size):
+    """Read exactly size bytes, or return None if the stream closed first."""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b''.join(chunks)
+
+
+def read_frame(stream):
+    """Read one framed JSON message. Returns None on a clean end of stream."""
+    header = read_exact(stream, FRAME_HEADER.size)
+    if header is None:
+        return None
+    (length,) = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME_SIZE} byte limit")
+    body = read_exact(stream, length)
+    if body is None:
+        return None
+    return json.loads(body.decode('utf-8'))
+
+
+def skip_exact(stream, size):
+    """Discard size bytes so the stream stays in sync after a rejected payload."""
+    while size > 0:
+        chunk = stream.read(min(size, 1024 * 1024))
+        if not chunk:
+            return False
+        size -= len(chunk)
+    return True
+
+
+def read_payload(stream, size, spool_bytes=SPOOL_BYTES):
+    """Read a job's raw upload: small ones as bytes, large ones into a temporary file.
+
+    Returns None if the stream closed first.
+    """
+    if size <= spool_bytes:
+        return read_exact(stream, size)
+    return spool_stream(stream, max_bytes=size, spool_bytes=spool_bytes, size=size)
+
+
+def write_frame(stream, message):
+    """Write one framed JSON message and flush it."""
+    body = json.dumps(message).encode('utf-8')
+    stream.write(FRAME_HEADER.pack(len(body)) + body)
+    stream.flush()
+
+
+def run_worker(handle_parse, describe, max_jobs=0, output_fd=3):
+    """Serve parse jobs read from stdin until it closes or max_jobs is reached.
+
+    Jobs arrive on stdin and results are written to output_fd rather than
+    stdout, so stray print() calls from the parser can't corrupt the stream.
+    A job header with a "size" field is followed by that many raw bytes of
+    file content, passed to the handler as job["data"]: bytes for small
+    uploads, a temporary file past PARSER_SPOOL_BYTES so a large upload is
+    never held in memory whole.
+    handle_parse(job) returns the response dict for a "parse" job and
+    describe() returns the status dict used to answer a "ping".
+    """
+    requests = sys.stdin.buffer
+    responses = os.fdopen(output_fd, 'wb')
+    # The Node pool stops workers with SIGTERM; exit normally so atexit hooks still run
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    jobs_done = 0
+    started_at = time.time()
+
+    print(f"Resume parser worker {os.getpid()} ready (max jobs: {max_jobs or 'unlimited'})", file=sys.stderr)
+
+    while True:
+        try:
+            message = read_frame(requests)
+        except ValueError as e:
+            # The stream is out of sync, there is no safe way to continue
+            print(f"Worker protocol error: {e}", file=sys.stderr)
+            return 1
+        if message is None:
+            return 0
+
+        job_id = message.get('id')
+        job_type = message.get('type', 'parse')
+
+        size = message.get('size')
+        if size is not None:
+            if size > MAX_PAYLOAD_SIZE:
+                if not skip_exact(requests, size):
+                    return 0
+                write_frame(responses, {"id": job_id, "ok": False,
+                                        "error": f"Upload of {size} bytes exceeds the {MAX_PAYLOAD_SIZE} byte limit"})
+                continue
+            data = read_payload(requests, size)
+            if data is None:
+                return 0
+            message['data'] = data
+
+        if job_type == 'ping':
+            status = describe()
+            status.update({
+                "pid": os.getpid(),
+                "jobs": jobs_done,
+                "maxJobs": max_jobs,
+                "uptime": round(time.time() - started_at, 3)
+            })
+            write_frame(responses, {"id": job_id, "ok": True, "result": status})
+            continue
+
+        if job_type != 'parse':
+            write_frame(responses, {"id": job_id, "ok": False, "error": f"Unknown job type: {job_type}"})
+            continue
+
+        started = time.perf_counter()
+        try:
+            result = handle_parse(message)
+            reply = {"id": job_id, "ok": True, "result": result}
+        except Exception as e:
+            # The type lets the caller tell a refused upload from a failed parse
+            reply = {"id": job_id, "ok": False, "error": str(e), "errorType": type(e).__name__}
+        finally:
+            if hasattr(message.get('data'), 'close'):
+                message['data'].close()
+        jobs_done += 1
+        reply["elapsedMs"] = round((time.perf_counter() - started) * 1000, 3)
+
+        # Tell the caller this was the last job so it stops routing work here
+        retiring = bool(max_jobs) and jobs_done >= max_jobs
+        if retiring:
+            reply["retiring"] = True
+        write_frame(responses, reply)
+
+        if retiring:
+            print(f"Worker {os.getpid()} retiring after {jobs_done} jobs", file=sys.stderr)
+            return 0
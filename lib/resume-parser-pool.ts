@@ -0,0 +1,405 @@
+import { spawn, ChildProcess } from 'child_process';
+import path from 'path';
+import os from 'os';
+import { Readable, Writable } from 'stream';
+import { once } from 'events';
+
+// Pool of long-lived `route.py --worker` processes.
+//
+// Each worker keeps the skill catalog and DB pool loaded, so an upload only
+// pays for the parse itself instead of a full interpreter cold start.
+// Jobs go to the worker's stdin and replies come back on fd 3, both as
+// 4-byte big-endian length-prefixed JSON frames. A job header carrying a
+// `size` is followed by that many raw bytes of file content, so uploads go
+// straight from memory to the parser without a temporary file. Large
+// uploads can be streamed in chunks instead of being buffered whole.
+
+export interface ParserJobResult {
+  [key: string]: unknown;
+}
+
+// Upload bytes held in memory, or a stream of known length piped to the worker as it is read
+export type ParserPayload = Buffer | { stream: ReadableStream<Uint8Array>; size: number };
+
+// An upload, or the path of a file already on disk
+export type ParserInput = string | { data: ParserPayload; filename?: string };
+
+// A job the worker rejected; type is the Python exception name, e.g. UploadTooLarge or MemoryPressure
+export class ParserJobError extends Error {
+  constructor(message: string, readonly type?: string) {
+    super(message);
+    this.name = 'ParserJobError';
+  }
+}
+
+export interface ParserWorkerStatus {
+  pid: number;
+  jobs: number;
+  maxJobs: number;
+  uptime: number;
+  dbConnected: boolean;
+  skills: number;
+  [key: string]: unknown;
+}
+
+interface WorkerReply {
+  id: number;
+  ok: boolean;
+  result?: ParserJobResult;
+  error?: string;
+  errorType?: string;
+  retiring?: boolean;
+  elapsedMs?: number;
+}
+
+interface PendingJob {
+  resolve: (reply: WorkerReply) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+}
+
+interface PoolOptions {
+  size: number;
+  maxJobs: number;
+  jobTimeoutMs: number;
+  healthCheckIntervalMs: number;
+  healthCheckTimeoutMs: number;
+  pythonPath: string;
+  scriptPath: string;
+}
+
+const FRAME_HEADER_SIZE = 4;
+
+// Uploads over this size are streamed to the worker rather than copied into one more buffer
+const STREAM_UPLOAD_BYTES = parseInt(process.env.RESUME_PARSER_STREAM_UPLOAD_BYTES || '', 10) || 1024 * 1024;
+
+// Small uploads go as one buffer (Buffer.from(ArrayBuffer) wraps it without
+// copying); large ones are streamed so no second full copy is ever made
+export async function uploadPayload(file: Blob, streamAboveBytes = STREAM_UPLOAD_BYTES): Promise<ParserPayload> {
+  if (file.size > streamAboveBytes) {
+    return { stream: file.stream(), size: file.size };
+  }
+  return Buffer.from(await file.arrayBuffer());
+}
+
+function readPoolOptions(): PoolOptions {
+  const env = process.env;
+  return {
+    size: parseInt(env.RESUME_PARSER_WORKERS || '', 10) || Math.max(1, Math.min(4, os.cpus().length)),
+    maxJobs: parseInt(env.RESUME_PARSER_MAX_JOBS || '', 10) || 500,
+    jobTimeoutMs: parseInt(env.RESUME_PARSER_JOB_TIMEOUT_MS || '', 10) || 30000,
+    healthCheckIntervalMs: parseInt(env.RESUME_PARSER_HEALTH_INTERVAL_MS || '', 10) || 15000,
+    healthCheckTimeoutMs: parseInt(env.RESUME_PARSER_HEALTH_TIMEOUT_MS || '', 10) || 5000,
+    pythonPath: env.RESUME_PARSER_PYTHON || 'python',
+    scriptPath: path.join(process.cwd(), 'app/api/parse-resume/route.py'),
+  };
+}
+
+function encodeFrame(message: object): Buffer {
+  const body = Buffer.from(JSON.stringify(message), 'utf-8');
+  const header = Buffer.alloc(FRAME_HEADER_SIZE);
+  header.writeUInt32BE(body.length, 0);
+  return Buffer.concat([header, body]);
+}
+
+class ParserWorker {
+  readonly process: ChildProcess;
+  private readonly requests: Writable;
+  private buffer: Buffer = Buffer.alloc(0);
+  // Frames are written one after another; a streamed upload holds the pipe until it is done
+  private writing: Promise<void> = Promise.resolve();
+  private readonly pending = new Map<number, PendingJob>();
+  private nextId = 1;
+  readonly startedAt = Date.now();
+  jobsStarted = 0;
+  ready = false;
+  alive = true;
+  draining = false;
+
+  constructor(private readonly options: PoolOptions, private readonly onExit: (worker: ParserWorker) => void) {
+    this.process = spawn(options.pythonPath, [
+      options.scriptPath,
+      '--worker',
+      '--max-jobs', String(options.maxJobs),
+    ], {
+      stdio: ['pipe', 'pipe', 'pipe', 'pipe'],
+    });
+
+    this.requests = this.process.stdin as Writable;
+    const replies = this.process.stdio[3] as Readable;
+
+    replies.on('data', (chunk: Buffer) => this.onData(chunk));
+
+    // stdout/stderr only carry log output in worker mode
+    this.process.stdout?.on('data', (data) => {
+      console.log(`Python worker ${this.process.pid}: ${data}`);
+    });
+    this.process.stderr?.on('data', (data) => {
+      console.error(`Python worker ${this.process.pid} stderr: ${data}`);
+    });
+
+    this.process.on('exit', (code) => {
+      this.markDead(new Error(`Python worker exited with code ${code}`));
+    });
+    this.process.on('error', (err) => {
+      console.error("Python worker process error:", err);
+      this.markDead(err);
+    });
+  }
+
+  get inFlight(): number {
+    return this.pending.size;
+  }
+
+  get available(): boolean {
+    return this.alive && !this.draining;
+  }
+
+  send(message: Record<string, unknown>, timeoutMs: number, payload?: ParserPayload): Promise<WorkerReply> {
+    if (!this.alive) {
+      return Promise.reject(new Error('Python worker is not running'));
+    }
+
+    const id = this.nextId++;
+    if (message.type !== 'ping') {
+      // Stop routing work here once the worker has been given its last job
+      this.jobsStarted++;
+      if (this.options.maxJobs > 0 && this.jobsStarted >= this.options.maxJobs) {
+        this.draining = true;
+      }
+    }
+
+    return new Promise<WorkerReply>((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(new Error(`Python worker ${this.process.pid} timed out after ${timeoutMs}ms`));
+        // A stuck worker can't be trusted with more jobs
+        this.kill();
+      }, timeoutMs);
+
+      this.pending.set(id, { resolve, reject, timer });
+      const frame = payload
+        ? encodeFrame({ ...message, id, size: Buffer.isBuffer(payload) ? payload.length : payload.size })
+        : encodeFrame({ ...message, id });
+      this.writing = this.writing
+        .then(() => this.write(frame, payload))
+        .catch((err: Error) => {
+          // The worker is still waiting for the rest of the upload; its input can't be resynced
+          clearTimeout(timer);
+          this.pending.delete(id);
+          reject(err);
+          this.kill();
+        });
+    });
+  }
+
+  // Header first, then the bytes as-is; no copy into a combined buffer
+  private async write(frame: Buffer, payload?: ParserPayload): Promise<void> {
+    this.requests.write(frame);
+    if (!payload) {
+      return;
+    }
+    if (Buffer.isBuffer(payload)) {
+      this.requests.write(payload);
+      return;
+    }
+
+    const reader = payload.stream.getReader();
+    let written = 0;
+    try {
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) {
+          break;
+        }
+        written += value.length;
+        if (written > payload.size) {
+          throw new Error(`Upload is larger than the declared ${payload.size} bytes`);
+        }
+        // Wait for the pipe to drain so only a few chunks are ever held in memory
+        if (!this.requests.write(value)) {
+          await once(this.requests, 'drain');
+        }
+      }
+    } finally {
+      reader.releaseLock();
+    }
+    if (written !== payload.size) {
+      throw new Error(`Upload ended after ${written} of ${payload.size} bytes`);
+    }
+  }
+
+  kill() {
+    this.draining = true;
+    if (this.alive) {
+      this.process.kill();
+    }
+  }
+
+  private onData(chunk: Buffer) {
+    this.buffer = this.buffer.length ? Buffer.concat([this.buffer, chunk]) : chunk;
+
+    while (this.buffer.length >= FRAME_HEADER_SIZE) {
+      const length = this.buffer.readUInt32BE(0);
+      if (this.buffer.length < FRAME_HEADER_SIZE + length) {
+        break;
+      }
+
+      const body = this.buffer.subarray(FRAME_HEADER_SIZE, FRAME_HEADER_SIZE + length);
+      this.buffer = this.buffer.subarray(FRAME_HEADER_SIZE + length);
+
+      try {
+        this.onReply(JSON.parse(body.toString('utf-8')) as WorkerReply);
+      } catch (err) {
+        console.error("Invalid frame from Python worker:", err);
+      }
+    }
+  }
+
+  private onReply(reply: WorkerReply) {
+    const job = this.pending.get(reply.id);
+    if (!job) {
+      return;
+    }
+    this.pending.delete(reply.id);
+    clearTimeout(job.timer);
+
+    this.ready = true;
+    if (reply.retiring) {
+      this.draining = true;
+    }
+    job.resolve(reply);
+  }
+
+  private markDead(error: Error) {
+    if (!this.alive) {
+      return;
+    }
+    this.alive = false;
+    this.draining = true;
+
+    for (const job of this.pending.values()) {
+      clearTimeout(job.timer);
+      job.reject(error);
+    }
+    this.pending.clear();
+    this.onExit(this);
+  }
+}
+
+export class ResumeParserPool {
+  private readonly workers: ParserWorker[] = [];
+  private readonly healthTimer: NodeJS.Timeout;
+  private closed = false;
+
+  constructor(private readonly options: PoolOptions = readPoolOptions()) {
+    for (let i = 0; i < options.size; i++) {
+      this.spawnWorker();
+    }
+
+    this.healthTimer = setInterval(() => {
+      this.healthCheck().catch((err) => console.error("Parser pool health check failed:", err));
+    }, options.healthCheckIntervalMs);
+    // Don't keep the Node process alive just for health checks
+    this.healthTimer.unref();
+  }
+
+  // Parse a resume on the least busy warm worker
+  async parse(input: ParserInput, targetField?: string): Promise<ParserJobResult> {
+    const worker = this.pickWorker();
+    const reply = typeof input === 'string'
+      ? await worker.send({ type: 'parse', path: input, targetField }, this.options.jobTimeoutMs)
+      : await worker.send({ type: 'parse', filename: input.filename, targetField }, this.options.jobTimeoutMs, input.data);
+
+    if (!reply.ok || !reply.result) {
+      throw new ParserJobError(reply.error || 'Python worker returned no result', reply.errorType);
+    }
+    return reply.result;
+  }
+
+  // Ping every worker; replace the ones that don't answer in time
+  async healthCheck(): Promise<ParserWorkerStatus[]> {
+    const checks = this.workers
+      // Workers still importing the parser are covered by their warm-up ping
+      .filter((worker) => worker.alive && worker.ready)
+      .map(async (worker) => {
+        try {
+          const reply = await worker.send({ type: 'ping' }, this.options.healthCheckTimeoutMs);
+          return reply.result as ParserWorkerStatus;
+        } catch (err) {
+          console.error(`Python worker ${worker.process.pid} failed health check:`, err);
+          worker.kill();
+          return null;
+        }
+      });
+
+    const statuses = await Promise.all(checks);
+    return statuses.filter((status): status is ParserWorkerStatus => status !== null);
+  }
+
+  shutdown() {
+    this.closed = true;
+    clearInterval(this.healthTimer);
+    for (const worker of this.workers) {
+      worker.kill();
+    }
+    this.workers.length = 0;
+  }
+
+  private pickWorker(): ParserWorker {
+    // Prefer warm workers, then the one with the fewest jobs in flight
+    let best: ParserWorker | undefined;
+    for (const worker of this.workers) {
+      if (!worker.available) {
+        continue;
+      }
+      if (!best || (worker.ready && !best.ready) ||
+          (worker.ready === best.ready && worker.inFlight < best.inFlight)) {
+        best = worker;
+      }
+    }
+
+    // Every worker is draining towards a restart; bring up a fresh one now
+    return best || this.spawnWorker();
+  }
+
+  private spawnWorker(): ParserWorker {
+    const worker = new ParserWorker(this.options, (exited) => this.onWorkerExit(exited));
+    this.workers.push(worker);
+
+    // Warm-up ping: resolves once the worker has loaded the catalog
+    worker.send({ type: 'ping' }, this.options.jobTimeoutMs).catch((err) => {
+      console.error("Python worker failed to start:", err);
+    });
+    return worker;
+  }
+
+  private onWorkerExit(worker: ParserWorker) {
+    const index = this.workers.indexOf(worker);
+    if (index >= 0) {
+      this.workers.splice(index, 1);
+    }
+
+    // A worker that dies right after starting (bad interpreter path, import
+    // error) would respawn in a tight loop; leave it to the next parse instead
+    if (this.closed || Date.now() - worker.startedAt < 1000) {
+      return;
+    }
+
+    // Keep the pool at full size after a worker retires or crashes
+    const running = this.workers.filter((w) => w.available).length;
+    if (running < this.options.size) {
+      this.spawnWorker();
+    }
+  }
+}
+
+// Reuse one pool per server process, including across dev-mode reloads
+const globalForPool = globalThis as unknown as { resumeParserPool?: ResumeParserPool };
+
+export function getResumeParserPool(): ResumeParserPool {
+  if (!globalForPool.resumeParserPool) {
+    globalForPool.resumeParserPool = new ResumeParserPool();
+  }
+  return globalForPool.resumeParserPool;
+}